@@ -0,0 +1,60 @@
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+
+from app.bench.loadgen import _percentile
+from app.bench.seed import AREAS, CITIES, RESULTS_DIR
+from app.services.autocomplete import LocationIndex
+
+
+# -------------------- CLI --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark location autocomplete lookups.")
+    parser.add_argument("--properties", type=int, default=500_000)
+    parser.add_argument("--lookups", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, default=RESULTS_DIR / "autocomplete.json")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # house/road numbers make most locations distinct, like real addresses
+    grouped = {}
+    for _ in range(args.properties):
+        location = f"Road {rng.randrange(1, 300)}, {rng.choice(AREAS)}, {rng.choice(CITIES)}"
+        grouped[location] = grouped.get(location, 0) + 1
+
+    index = LocationIndex()
+    started = time.perf_counter()
+    index.load(grouped.items())
+    build_s = time.perf_counter() - started
+
+    words = [w.lower() for w in AREAS + CITIES] + ["road 1", "road 12"]
+    prefixes = [w[: rng.randint(1, len(w))] for w in rng.choices(words, k=args.lookups)]
+
+    samples = []
+    for prefix in prefixes:
+        index._cache.clear()  # measure the uncached path
+        begin = time.perf_counter()
+        index.suggest(prefix)
+        samples.append(time.perf_counter() - begin)
+    samples.sort()
+
+    result = {
+        "properties": args.properties,
+        "terms": len(index),
+        "build_s": round(build_s, 3),
+        "lookups": len(samples),
+        "p50_us": round(_percentile(samples, 50) * 1e6, 1),
+        "p95_us": round(_percentile(samples, 95) * 1e6, 1),
+        "p99_us": round(_percentile(samples, 99) * 1e6, 1),
+    }
+    print(json.dumps(result, indent=2))
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
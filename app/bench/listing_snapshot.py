@@ -0,0 +1,125 @@
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+
+from app.bench.loadgen import _percentile
+from app.bench.recommendations import synthetic_properties
+from app.bench.seed import AREAS, CITIES, RESULTS_DIR
+from app.models.property import PropertyType
+from app.routers.pages import ID_CHUNK
+from app.services.listing_snapshot import Snapshot, _Columns
+
+
+# -------------------- SYNTHETIC DATA --------------------
+
+def as_row(prop):
+    # the column tuple the snapshot writer selects
+    return (prop.id, prop.rent_amount, prop.property_type, prop.availability_status,
+            prop.updated_at, prop.updated_at, prop.location)
+
+
+def random_filters(rng: random.Random) -> dict:
+    filters = {}
+    if rng.random() < 0.6:
+        filters["location"] = rng.choice(AREAS + CITIES)[: rng.randint(3, 8)]
+    if rng.random() < 0.5:
+        filters["min_rent"] = rng.randrange(5_000, 80_000, 1_000)
+    if rng.random() < 0.5:
+        filters["max_rent"] = filters.get("min_rent", 5_000) + rng.randrange(10_000, 80_000, 1_000)
+    if rng.random() < 0.4:
+        filters["property_type"] = rng.choice(list(PropertyType)).value
+    return filters
+
+
+def _timings(snapshot: Snapshot, queries: list[dict]) -> dict:
+    # What pages.home asks the snapshot for: every matching id, newest first.
+    # The follow-up SELECT ... WHERE id IN (...) per ID_CHUNK ids is database
+    # work and is not timed here (loadgen measures the whole route).
+    samples, matches = [], []
+    for filters in queries:
+        started = time.perf_counter()
+        ids = snapshot.query(**filters)
+        samples.append(time.perf_counter() - started)
+        matches.append(len(ids))
+    samples.sort()
+    return {
+        "queries": len(samples),
+        "mean_matches": round(sum(matches) / len(matches), 1),
+        "mean_id_chunks": round(sum(-(-m // ID_CHUNK) for m in matches) / len(matches), 2),
+        "p50_ms": round(_percentile(samples, 50) * 1e3, 2),
+        "p95_ms": round(_percentile(samples, 95) * 1e3, 2),
+        "p99_ms": round(_percentile(samples, 99) * 1e3, 2),
+    }
+
+
+# -------------------- CLI --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the columnar listing snapshot.")
+    parser.add_argument("--properties", type=int, default=500_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--updates", type=int, default=1_000, help="rows changed for the incremental merge")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, default=RESULTS_DIR / "listing_snapshot.json")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    props = list(synthetic_properties(args.properties, rng))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        state = _Columns()
+        started = time.perf_counter()
+        state.merge(as_row(p) for p in props)
+        state.write(Path(tmp) / "full")
+        build_s = time.perf_counter() - started
+
+        # an incremental round: some rows change after the watermark
+        later = state.watermark + timedelta(seconds=1)
+        changed = rng.sample(props, min(args.updates, len(props)))
+        for prop in changed:
+            prop.rent_amount = rng.randrange(5_000, 150_000, 500)
+            prop.location = f"{rng.choice(AREAS)}, {rng.choice(CITIES)}"
+            prop.updated_at = later
+        started = time.perf_counter()
+        state.merge(as_row(p) for p in changed)
+        state.write(Path(tmp) / "incremental")
+        merge_s = time.perf_counter() - started
+
+        rebuilt = _Columns()
+        rebuilt.merge(as_row(p) for p in props)
+        rebuilt.write(Path(tmp) / "rebuilt")
+
+        snapshot = Snapshot(Path(tmp) / "incremental")
+        reference = Snapshot(Path(tmp) / "rebuilt")
+        queries = [random_filters(rng) for _ in range(args.queries)]
+        mismatches = sum(snapshot.query(**f) != reference.query(**f) for f in queries[:200])
+
+        memory = sum(c.nbytes for c in snapshot.columns.values()) + snapshot.locations.nbytes
+        result = {
+            "properties": args.properties,
+            "locations": len(snapshot.locations),
+            "build_s": round(build_s, 2),
+            "incremental_rows": len(changed),
+            "incremental_merge_s": round(merge_s, 3),
+            "memory_mb": round(memory / 2**20, 1),
+            "cold_location_masks": _timings(snapshot, queries),
+            "warm": _timings(snapshot, queries),
+            "mismatches_vs_rebuild": mismatches,
+            "numpy": np.__version__,
+        }
+    print(json.dumps(result, indent=2))
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(result, indent=2))
+    print(f"Results written to {args.out}")
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
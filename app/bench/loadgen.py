@@ -0,0 +1,416 @@
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from app.bench.seed import CITIES, AREAS, RESULTS_DIR
+
+
+# -------------------- ROUTE MIX --------------------
+# (route template, weight) per role. Every route in app/ appears at least
+# once except GET /admin/profiles/{name}, which needs a saved capture; the
+# destructive ones only run with --destructive.
+
+ANON_ROUTES = [
+    ("GET /", 30),
+    ("GET /?filters", 20),
+    ("GET /tenant/properties/{property_id}", 30),
+    ("GET /login", 3),
+    ("GET /register", 2),
+    ("POST /register", 1),
+    ("GET /locations/suggest", 10),
+    ("GET /health", 1),
+    ("GET /metrics", 1),
+]
+
+TENANT_ROUTES = ANON_ROUTES + [
+    ("GET /tenant/rent-history", 10),
+    ("GET /tenant/searches", 5),
+    ("POST /tenant/searches", 2),
+    ("POST /tenant/searches/{search_id}/delete", 1),
+    ("POST /tenant/alerts/seen", 1),
+    ("GET /events/stream", 3),
+    ("GET /profile", 5),
+    ("POST /profile", 2),
+    ("GET /logout", 1),
+]
+
+OWNER_ROUTES = [
+    ("GET /owner/dashboard", 20),
+    ("GET /owner/properties/new", 3),
+    ("POST /owner/properties/new", 2),
+    ("GET /owner/properties/{property_id}/edit", 5),
+    ("POST /owner/properties/{property_id}/edit", 3),
+    ("GET /owner/properties/{property_id}/payments", 15),
+    ("POST /owner/properties/{property_id}/payments", 5),
+    ("POST /owner/properties/{property_id}/delete", 1),
+    ("GET /events/stream", 3),
+    ("GET /", 5),
+    ("GET /profile", 2),
+]
+
+ADMIN_ROUTES = [
+    ("GET /admin/dashboard", 10),
+    ("GET /admin/profiles", 2),
+    ("GET /admin/profiles/continuous.folded", 1),
+    ("POST /admin/profiles/reset", 1),
+    ("POST /admin/properties/{property_id}/remove", 1),
+    ("POST /admin/users/{user_id}/remove", 1),
+    ("GET /", 2),
+]
+
+DESTRUCTIVE = {
+    "POST /owner/properties/{property_id}/delete",
+    "POST /admin/profiles/reset",
+    "POST /admin/properties/{property_id}/remove",
+    "POST /admin/users/{user_id}/remove",
+}
+
+# SSE streams never end; the first event (the retry hint) counts as a
+# response and the stream is closed there
+STREAMS = {"GET /events/stream"}
+SEARCH_ID_RE = re.compile(rb'/tenant/searches/(\d+)/delete')
+
+
+# -------------------- STATS --------------------
+
+class Recorder:
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.ttfb: dict[str, list[float]] = {}
+        self.wire_bytes: dict[str, int] = {}
+        self.body_bytes: dict[str, int] = {}
+
+    def add(self, route: str, seconds: float, ok: bool, ttfb: float | None = None,
+            wire: int = 0, body: int = 0):
+        self.samples.setdefault(route, []).append(seconds)
+        if not ok:
+            self.errors[route] = self.errors.get(route, 0) + 1
+        if ttfb is not None:
+            self.ttfb.setdefault(route, []).append(ttfb)
+        self.wire_bytes[route] = self.wire_bytes.get(route, 0) + wire
+        self.body_bytes[route] = self.body_bytes.get(route, 0) + body
+
+    def summary(self, elapsed: float) -> dict:
+        routes = {}
+        everything, first_bytes = [], []
+        for route, values in sorted(self.samples.items()):
+            everything.extend(values)
+            first_bytes.extend(self.ttfb.get(route, []))
+            routes[route] = {
+                **_describe(values, self.errors.get(route, 0), elapsed),
+                **_transfer(self.ttfb.get(route, []), self.wire_bytes.get(route, 0), self.body_bytes.get(route, 0)),
+            }
+        total = {
+            **_describe(everything, sum(self.errors.values()), elapsed),
+            **_transfer(first_bytes, sum(self.wire_bytes.values()), sum(self.body_bytes.values())),
+        }
+        return {"routes": routes, "total": total}
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def _describe(values: list[float], errors: int, elapsed: float) -> dict:
+    ordered = sorted(values)
+    ms = 1000.0
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * ms, 3) if ordered else 0.0,
+        "p50_ms": round(_percentile(ordered, 50) * ms, 3),
+        "p95_ms": round(_percentile(ordered, 95) * ms, 3),
+        "p99_ms": round(_percentile(ordered, 99) * ms, 3),
+        "max_ms": round(ordered[-1] * ms, 3) if ordered else 0.0,
+    }
+
+
+def _transfer(ttfb: list[float], wire: int, body: int) -> dict:
+    # Time to first body byte, and bytes on the wire vs. decoded body size.
+    ordered = sorted(ttfb)
+    return {
+        "ttfb_p50_ms": round(_percentile(ordered, 50) * 1000, 3),
+        "ttfb_p95_ms": round(_percentile(ordered, 95) * 1000, 3),
+        "wire_bytes": wire,
+        "body_bytes": body,
+        "bytes_saved_pct": round((1 - wire / body) * 100, 1) if body else 0.0,
+    }
+
+
+# -------------------- VIRTUAL USER --------------------
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, manifest: dict, role: str, rng: random.Random, destructive: bool):
+        self.client = client
+        self.manifest = manifest
+        self.role = role
+        self.rng = rng
+        self.account = None
+        self.search_ids: list[int] = []     # learned from GET /tenant/searches
+        routes = {
+            "anon": ANON_ROUTES,
+            "tenant": TENANT_ROUTES,
+            "owner": OWNER_ROUTES,
+            "admin": ADMIN_ROUTES,
+        }[role]
+        routes = [(r, w) for r, w in routes if destructive or r not in DESTRUCTIVE]
+        self.routes = [r for r, _ in routes]
+        self.weights = [w for _, w in routes]
+
+    async def login(self, recorder: Recorder):
+        if self.role == "anon":
+            return
+        pool = {"tenant": "tenants", "owner": "owners", "admin": "admins"}[self.role]
+        entry = self.rng.choice(self.manifest[pool])
+        self.account = entry if isinstance(entry, dict) else {"email": entry}
+        started = time.perf_counter()
+        response = await self.client.post(
+            "/login",
+            data={"email": self.account["email"], "password": self.manifest["password"]},
+        )
+        ok = response.status_code < 400 and response.headers.get("location") == "/"
+        recorder.add("POST /login", time.perf_counter() - started, ok)
+
+    def _property_id(self) -> int:
+        if self.role == "owner" and self.account["properties"]:
+            return self.rng.choice(self.account["properties"])
+        return self.rng.choice(self.manifest["property_ids"])
+
+    def _pop(self, items: list) -> int | None:
+        return items.pop() if items else None
+
+    def build(self, route: str):
+        # Returns (method, url, form data) for a route template, or None when
+        # the route has nothing left to act on (e.g. no disposable ids).
+        method, template = route.split(" ", 1)
+        rng = self.rng
+
+        if template == "/?filters":
+            params = {"location": rng.choice(AREAS + CITIES)}
+            if rng.random() < 0.5:
+                low = rng.randrange(5_000, 80_000, 5_000)
+                params.update(min_rent=low, max_rent=low + rng.randrange(10_000, 60_000, 5_000))
+            if rng.random() < 0.3:
+                params["property_type"] = rng.choice(["apartment", "house"])
+            return method, "/?" + str(httpx.QueryParams(params)), None
+
+        if template == "/locations/suggest":
+            prefix = rng.choice(AREAS + CITIES)[: rng.randint(2, 5)]
+            return method, f"{template}?q={prefix}", None
+
+        if template == "/tenant/searches" and method == "POST":
+            low = rng.randrange(5_000, 80_000, 5_000)
+            return method, template, {
+                "location": rng.choice(AREAS),
+                "min_rent": str(low),
+                "max_rent": str(low + rng.randrange(10_000, 60_000, 5_000)),
+                "property_type": rng.choice(["", "apartment", "house"]),
+            }
+
+        if "{search_id}" in template:
+            search_id = self._pop(self.search_ids)
+            return None if search_id is None else (method, template.format(search_id=search_id), None)
+
+        if template == "/register":
+            email = f"loadgen-{time.time_ns()}-{rng.randrange(10**6)}@bench.local"
+            data = {"full_name": "Loadgen User", "email": email, "phone": "0100000000", "password": "benchpass"}
+            return method, template, data
+
+        if template == "/profile" and method == "POST":
+            return method, template, {"full_name": "Bench Tenant", "phone": "0100000000"}
+
+        if template == "/admin/dashboard":
+            query = rng.choice(["user_q=tenant12", "user_role=owner&user_q=owner1", "property_location=" + rng.choice(AREAS)])
+            return method, f"{template}?{query}", None
+
+        if template == "/owner/properties/new" and method == "POST":
+            area, city = rng.choice(AREAS), rng.choice(CITIES)
+            return method, template, _property_form(rng, area, city)
+
+        if "{user_id}" in template:
+            user_id = self._pop(self.manifest["disposable_users"])
+            return None if user_id is None else (method, template.format(user_id=user_id), None)
+
+        if "{property_id}" in template:
+            if template.endswith("/delete"):
+                prop_id = self._pop(self.account["disposable"])
+            elif template.endswith("/remove"):
+                prop_id = self._pop(self.manifest["disposable_properties"])
+            else:
+                prop_id = self._property_id()
+            if prop_id is None:
+                return None
+            url = template.format(property_id=prop_id)
+            data = None
+            if method == "POST" and template.endswith("/edit"):
+                data = _property_form(rng, rng.choice(AREAS), rng.choice(CITIES))
+                data["availability_status"] = rng.choice(["available", "rented"])
+            elif method == "POST" and template.endswith("/payments"):
+                tenant = rng.choice(self.manifest["tenants"])
+                month = date.today().replace(day=1)
+                data = {"tenant_id": tenant["id"], "month": month.isoformat(), "amount": "12000", "status": "paid"}
+            return method, url, data
+
+        return method, template, None
+
+    async def run(self, deadline: float, recorder: Recorder):
+        await self.login(recorder)
+        while time.perf_counter() < deadline:
+            route = self.rng.choices(self.routes, weights=self.weights)[0]
+            request = self.build(route)
+            if request is None:
+                # nothing to act on; yield so the other users keep running
+                await asyncio.sleep(0)
+                continue
+            method, url, data = request
+            started = time.perf_counter()
+            ttfb, wire, body = None, 0, 0
+            keep = route == "GET /tenant/searches"
+            chunks = []
+            try:
+                async with self.client.stream(method, url, data=data) as response:
+                    async for chunk in response.aiter_bytes():
+                        if ttfb is None:
+                            ttfb = time.perf_counter() - started
+                        body += len(chunk)
+                        if keep:
+                            chunks.append(chunk)
+                        if route in STREAMS:
+                            break
+                    wire = response.num_bytes_downloaded
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            recorder.add(route, time.perf_counter() - started, ok, ttfb, wire, body)
+            if keep:
+                self.search_ids = [int(i) for i in SEARCH_ID_RE.findall(b"".join(chunks))]
+
+            if route == "GET /logout":
+                await self.login(recorder)
+
+
+def _property_form(rng: random.Random, area: str, city: str) -> dict:
+    return {
+        "title": f"Loadgen flat in {area}",
+        "description": "generated by the load generator",
+        "location": f"{area}, {city}",
+        "rent_amount": str(rng.randrange(5_000, 150_000, 500)),
+        "property_type": rng.choice(["apartment", "house"]),
+    }
+
+
+# -------------------- RUNNER --------------------
+
+async def run_load(args, manifest: dict) -> dict:
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    roles = ["anon", "tenant", "owner", "admin"]
+    mix = [args.anon, args.tenants, args.owners, args.admins]
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    clients = []
+    users = []
+    for _ in range(args.concurrency):
+        role = rng.choices(roles, weights=mix)[0]
+        client = httpx.AsyncClient(
+            base_url=args.base_url,
+            limits=limits,
+            timeout=args.timeout,
+            headers={"Accept-Encoding": args.accept_encoding},
+        )
+        clients.append(client)
+        users.append(VirtualUser(client, manifest, role, random.Random(rng.random()), args.destructive))
+
+    started = time.perf_counter()
+    deadline = started + args.duration
+    try:
+        await asyncio.gather(*(user.run(deadline, recorder) for user in users))
+    finally:
+        await asyncio.gather(*(client.aclose() for client in clients))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "meta": {
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "duration_s": round(elapsed, 3),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "mix": dict(zip(roles, mix)),
+            "destructive": args.destructive,
+            "label": args.label,
+            "accept_encoding": args.accept_encoding,
+        },
+        **recorder.summary(elapsed),
+    }
+
+
+# -------------------- REPORTING --------------------
+
+def print_report(result: dict, baseline: dict | None = None):
+    header = (
+        f"{'route':<52} {'count':>7} {'err':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}"
+        f" {'ttfb50':>9} {'saved':>7}"
+    )
+    print(header)
+    print("-" * len(header))
+    rows = list(result["routes"].items()) + [("TOTAL", result["total"])]
+    for route, stats in rows:
+        line = (
+            f"{route:<52} {stats['count']:>7} {stats['errors']:>5} {stats['rps']:>8.1f} "
+            f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}"
+            f" {stats.get('ttfb_p50_ms', 0.0):>9.2f} {stats.get('bytes_saved_pct', 0.0):>6.1f}%"
+        )
+        if baseline:
+            old = baseline["total"] if route == "TOTAL" else baseline["routes"].get(route)
+            if old and old["p95_ms"]:
+                change = (stats["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+                line += f"   p95 {change:+.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive every route with authenticated virtual users.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--manifest", type=Path, default=RESULTS_DIR / "manifest.json")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--anon", type=int, default=50, help="relative weight of anonymous users")
+    parser.add_argument("--tenants", type=int, default=35)
+    parser.add_argument("--owners", type=int, default=12)
+    parser.add_argument("--admins", type=int, default=3)
+    parser.add_argument("--destructive", action="store_true", help="include delete/remove routes")
+    parser.add_argument("--accept-encoding", default="br, gzip",
+                        help='sent on every request; "identity" measures uncompressed')
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--label", default="")
+    parser.add_argument("--out", type=Path, default=None, help="JSON results file")
+    parser.add_argument("--compare", type=Path, default=None, help="earlier results file to diff against")
+    args = parser.parse_args()
+
+    manifest = json.loads(args.manifest.read_text())
+    result = asyncio.run(run_load(args, manifest))
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_report(result, baseline)
+
+    out = args.out or RESULTS_DIR / f"loadgen-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2))
+    print(f"Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
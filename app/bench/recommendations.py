@@ -0,0 +1,106 @@
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.bench.loadgen import _percentile
+from app.bench.seed import ADJECTIVES, AREAS, CITIES, RESULTS_DIR, WORDS
+from app.models.property import AvailabilityStatus, PropertyType
+from app.services.recommendations import PropertyIndex
+
+
+# -------------------- SYNTHETIC LISTINGS --------------------
+
+def synthetic_properties(count: int, rng: random.Random):
+    now = datetime.now(timezone.utc)
+    for prop_id in range(1, count + 1):
+        prop_type = PropertyType.APARTMENT if rng.random() < 0.75 else PropertyType.HOUSE
+        area = rng.choice(AREAS)
+        yield SimpleNamespace(
+            id=prop_id,
+            title=f"{rng.choice(ADJECTIVES)} {prop_type.value} in {area}",
+            description=" ".join(rng.choices(WORDS, k=rng.randint(12, 40))),
+            location=f"{area}, {rng.choice(CITIES)}",
+            rent_amount=rng.randrange(5_000, 150_000, 500),
+            property_type=prop_type,
+            availability_status=rng.choices(list(AvailabilityStatus), weights=[60, 35, 5])[0],
+            updated_at=now - timedelta(seconds=prop_id),
+        )
+
+
+def _timings(index: PropertyIndex, queries, k: int) -> dict:
+    samples = []
+    for prop in queries:
+        started = time.perf_counter()
+        index.similar(prop, k)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "queries": len(samples),
+        "p50_us": round(_percentile(samples, 50) * 1e6, 1),
+        "p95_us": round(_percentile(samples, 95) * 1e6, 1),
+        "p99_us": round(_percentile(samples, 99) * 1e6, 1),
+        "mean_us": round(sum(samples) / len(samples) * 1e6, 1),
+    }
+
+
+# -------------------- CLI --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the similar-properties index.")
+    parser.add_argument("--properties", type=int, default=500_000)
+    parser.add_argument("--queries", type=int, default=5_000)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, default=RESULTS_DIR / "recommendations.json")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index = PropertyIndex()
+    # keep the periodic DB refresh out of the measurement
+    index.refreshed_at = float("inf")
+
+    started = time.perf_counter()
+    index.load(synthetic_properties(args.properties, rng))
+    index.ready = True
+    build_s = time.perf_counter() - started
+
+    sample_ids = rng.sample(range(1, args.properties + 1), min(args.queries, args.properties))
+    row_of = index.row_of
+    queries = [
+        SimpleNamespace(id=i, location=index.locations[row_of[i]], rent_amount=None,
+                        property_type=None, title=None, description=None)
+        for i in sample_ids
+    ]
+    # unindexed listing with no known location token -> newest-listings fallback
+    fallback = [
+        SimpleNamespace(id=-1, location="Nowhere", rent_amount=20_000, property_type=PropertyType.HOUSE,
+                        title="house", description="garden")
+    ] * min(200, args.queries)
+
+    memory = index.matrix.nbytes + index.norms.nbytes + index.ids.nbytes + index.available.nbytes
+    memory += sum(p.rows.nbytes for p in index.postings.values())
+    result = {
+        "properties": args.properties,
+        "dim": index.dim,
+        "max_candidates": index.max_candidates,
+        "build_s": round(build_s, 2),
+        "memory_mb": round(memory / 2**20, 1),
+        "indexed_query": _timings(index, queries, args.k),
+        "no_location_match_query": _timings(index, fallback, args.k),
+        "numpy": np.__version__,
+    }
+    print(json.dumps(result, indent=2))
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(result, indent=2))
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
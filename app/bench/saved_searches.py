@@ -0,0 +1,119 @@
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.bench.loadgen import _percentile
+from app.bench.recommendations import synthetic_properties
+from app.bench.seed import AREAS, CITIES, RESULTS_DIR
+from app.models.property import PropertyType
+from app.services.autocomplete import normalize
+from app.services.search_index import SavedSearchIndex
+
+
+# -------------------- SYNTHETIC SAVED SEARCHES --------------------
+
+def synthetic_searches(count: int, rng: random.Random):
+    # Mostly narrow searches (an area, a budget band, often a type), with a
+    # tail of broad ones: city only, open-ended rent, or no location at all.
+    for search_id in range(1, count + 1):
+        shape = rng.random()
+        if shape < 0.6:
+            location = rng.choice(AREAS)
+        elif shape < 0.9:
+            location = rng.choice(CITIES)
+        elif shape < 0.97:
+            location = rng.choice(AREAS)[: rng.randint(3, 5)]
+        else:
+            location = None
+        low = rng.randrange(5_000, 120_000, 1_000)
+        yield SimpleNamespace(
+            id=search_id,
+            tenant_id=search_id,
+            location=location,
+            min_rent=low if rng.random() < 0.9 else None,
+            max_rent=low + rng.randrange(5_000, 40_000, 1_000) if rng.random() < 0.9 else None,
+            property_type=rng.choice([PropertyType.APARTMENT, PropertyType.HOUSE, None]),
+        )
+
+
+def brute_force(searches, prop) -> set[int]:
+    # the pages.home semantics, applied to every saved search
+    location = normalize(prop.location)
+    rent = float(prop.rent_amount)
+    return {
+        s.id for s in searches
+        if (s.location is None or normalize(s.location) in location)
+        and (s.min_rent is None or s.min_rent <= rent)
+        and (s.max_rent is None or rent <= s.max_rent)
+        and (s.property_type is None or s.property_type == prop.property_type)
+    }
+
+
+# -------------------- CLI --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark matching new listings against saved searches.")
+    parser.add_argument("--searches", type=int, default=1_000_000)
+    parser.add_argument("--listings", type=int, default=2_000)
+    parser.add_argument("--verify", type=int, default=20, help="listings checked against a full scan")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, default=RESULTS_DIR / "saved_searches.json")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    searches = list(synthetic_searches(args.searches, rng))
+
+    index = SavedSearchIndex()
+    started = time.perf_counter()
+    index.load(searches)
+    build_s = time.perf_counter() - started
+
+    listings = list(synthetic_properties(args.listings, rng))
+    samples, matches = [], []
+    for prop in listings:
+        started = time.perf_counter()
+        found = index.match(prop)
+        samples.append(time.perf_counter() - started)
+        matches.append(len(found))
+
+    mismatches = 0
+    scan_samples = []
+    for prop in listings[: args.verify]:
+        started = time.perf_counter()
+        expected = brute_force(searches, prop)
+        scan_samples.append(time.perf_counter() - started)
+        mismatches += expected != set(index.match(prop))
+
+    samples.sort()
+    memory = sum(b.starts.nbytes + b.ends.nbytes + b.ids.nbytes + b.block_max.nbytes for b in index.buckets.values())
+    result = {
+        "searches": args.searches,
+        "buckets": len(index.buckets),
+        "build_s": round(build_s, 2),
+        "memory_mb": round(memory / 2**20, 1),
+        "phrases": len(index.phrases),
+        "listings": len(samples),
+        "p50_ms": round(_percentile(samples, 50) * 1e3, 2),
+        "p95_ms": round(_percentile(samples, 95) * 1e3, 2),
+        "p99_ms": round(_percentile(samples, 99) * 1e3, 2),
+        "mean_matches": round(sum(matches) / len(matches), 1),
+        "full_scan_ms": round(sum(scan_samples) / max(len(scan_samples), 1) * 1e3, 1),
+        "verified": len(scan_samples),
+        "mismatches": mismatches,
+        "numpy": np.__version__,
+    }
+    print(json.dumps(result, indent=2))
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(result, indent=2))
+    print(f"Results written to {args.out}")
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+import argparse
+import json
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import insert
+
+from app.core.config import BASE_DIR
+from app.core.security import hash_password
+from app.db import partitions
+from app.db.init_db import init_db
+from app.db.session import SessionLocal
+from app.models.property import (
+    AvailabilityStatus,
+    PaymentStatus,
+    Property,
+    PropertyType,
+    RentPayment,
+)
+from app.models.user import User, UserRole
+
+
+# -------------------- DEFAULTS --------------------
+
+DEFAULT_USERS = 1_000_000
+DEFAULT_PROPERTIES = 500_000
+DEFAULT_PAYMENTS = 20_000_000
+
+BENCH_PASSWORD = "benchpass"
+RESULTS_DIR = BASE_DIR / "bench_results"
+
+CITIES = ["Dhaka", "Chattogram", "Khulna", "Rajshahi", "Sylhet", "Barishal", "Rangpur", "Cumilla"]
+AREAS = [
+    "Mirpur", "Gulshan", "Banani", "Dhanmondi", "Uttara", "Mohammadpur", "Bashundhara",
+    "Badda", "Rampura", "Motijheel", "Agrabad", "Nasirabad", "Halishahar", "Sonadanga",
+    "Zindabazar", "Shahjalal Upashahar", "Kazir Dewri", "Boalia", "Kandirpar", "Jahaj Company",
+]
+ADJECTIVES = ["Cozy", "Spacious", "Bright", "Modern", "Quiet", "Furnished", "Family", "Compact", "Lake view", "Corner"]
+WORDS = (
+    "balcony lift parking generator gas water security rooftop tiles kitchen "
+    "bedroom bathroom drawing dining south facing near school market mosque "
+    "hospital main road metro bus stand newly painted gated community"
+).split()
+
+
+# -------------------- HELPERS --------------------
+
+def _batches(total: int, size: int):
+    start = 0
+    while start < total:
+        yield start, min(size, total - start)
+        start += size
+
+
+def _progress(label: str, done: int, total: int, started: float):
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(f"  {label}: {done:,}/{total:,} ({done / elapsed:,.0f} rows/s)", flush=True)
+
+
+def _month_back(today: date, n: int) -> date:
+    index = today.year * 12 + today.month - 1 - n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+# -------------------- SEEDERS --------------------
+
+def seed_users(db, total: int, admins: int, owners: int, batch_size: int, rng: random.Random):
+    hashed = hash_password(BENCH_PASSWORD)  # bcrypt once, reused for every row
+    ids = {UserRole.ADMIN: [], UserRole.OWNER: [], UserRole.TENANT: []}
+    emails = {}
+    started = time.perf_counter()
+
+    for offset, count in _batches(total, batch_size):
+        rows = []
+        for i in range(offset, offset + count):
+            if i < admins:
+                role = UserRole.ADMIN
+            elif i < admins + owners:
+                role = UserRole.OWNER
+            else:
+                role = UserRole.TENANT
+            rows.append(
+                {
+                    "full_name": f"Bench {role.value.title()} {i}",
+                    "email": f"{role.value}{i}@bench.local",
+                    "phone": f"01{rng.randrange(10**9):09d}",
+                    "hashed_password": hashed,
+                    "role": role,
+                }
+            )
+        result = db.execute(insert(User).returning(User.id, User.role, User.email), rows)
+        for user_id, role, email in result:
+            ids[role].append(user_id)
+            emails[user_id] = email
+        db.commit()
+        _progress("users", offset + count, total, started)
+
+    return ids, emails
+
+
+def seed_properties(db, total: int, owner_ids: list[int], batch_size: int, rng: random.Random):
+    by_owner: dict[int, list[int]] = {}
+    now = datetime.now(timezone.utc)
+    started = time.perf_counter()
+
+    for offset, count in _batches(total, batch_size):
+        rows = []
+        for _ in range(count):
+            prop_type = PropertyType.APARTMENT if rng.random() < 0.75 else PropertyType.HOUSE
+            area, city = rng.choice(AREAS), rng.choice(CITIES)
+            created = now - timedelta(seconds=rng.randrange(3 * 365 * 24 * 3600))
+            rows.append(
+                {
+                    "owner_id": rng.choice(owner_ids),
+                    "title": f"{rng.choice(ADJECTIVES)} {prop_type.value} in {area}",
+                    "description": " ".join(rng.choices(WORDS, k=rng.randint(12, 40))),
+                    "location": f"{area}, {city}",
+                    "rent_amount": rng.randrange(5_000, 150_000, 500),
+                    "property_type": prop_type,
+                    "availability_status": rng.choices(
+                        list(AvailabilityStatus), weights=[60, 35, 5]
+                    )[0],
+                    "created_at": created,
+                    "updated_at": created,
+                }
+            )
+        result = db.execute(insert(Property).returning(Property.id, Property.owner_id), rows)
+        for prop_id, owner_id in result:
+            by_owner.setdefault(owner_id, []).append(prop_id)
+        db.commit()
+        _progress("properties", offset + count, total, started)
+
+    return by_owner
+
+
+def seed_payments(db, total: int, property_ids: list[int], tenant_ids: list[int], batch_size: int, rng: random.Random):
+    # Each property gets one tenant and a run of consecutive months, so the
+    # (property_id, tenant_id, month) key stays unique.
+    today = date.today()
+    per_property, remainder = divmod(total, len(property_ids))
+    # no catch-all partition on Postgres: every seeded year needs its own
+    oldest = _month_back(today, max(per_property + (1 if remainder else 0) - 1, 0))
+    for year in range(oldest.year, today.year + 1):
+        partitions.ensure_year(year, db.get_bind())
+
+    def rows():
+        for index, prop_id in enumerate(property_ids):
+            tenant_id = rng.choice(tenant_ids)
+            amount = rng.randrange(5_000, 150_000, 500)
+            months = per_property + (1 if index < remainder else 0)
+            for n in range(months):
+                month = _month_back(today, n)
+                paid = n > 0 or rng.random() < 0.5
+                yield {
+                    "tenant_id": tenant_id,
+                    "property_id": prop_id,
+                    "month": month,
+                    "amount": amount,
+                    "status": PaymentStatus.PAID if paid else PaymentStatus.PENDING,
+                    "paid_at": datetime(month.year, month.month, 5, tzinfo=timezone.utc) if paid else None,
+                }
+
+    started = time.perf_counter()
+    done = 0
+    batch = []
+    for row in rows():
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.execute(insert(RentPayment), batch)
+            db.commit()
+            done += len(batch)
+            batch = []
+            if done % (batch_size * 10) == 0:
+                _progress("payments", done, total, started)
+    if batch:
+        db.execute(insert(RentPayment), batch)
+        db.commit()
+        done += len(batch)
+    _progress("payments", done, total, started)
+
+
+# -------------------- MANIFEST --------------------
+
+def write_manifest(path: Path, users: dict, emails: dict, by_owner: dict, sample: int, rng: random.Random):
+    # Credentials and ids the load generator needs; "disposable" ids are only
+    # touched by the destructive routes (delete / remove).
+    owners = [o for o in users[UserRole.OWNER] if by_owner.get(o)][:sample]
+    owner_entries = []
+    for owner_id in owners:
+        props = by_owner[owner_id]
+        keep = max(1, len(props) - 1)
+        owner_entries.append(
+            {
+                "email": emails[owner_id],
+                "properties": props[:keep],
+                "disposable": props[keep:],
+            }
+        )
+
+    all_props = [p for props in by_owner.values() for p in props]
+    owned = {p for entry in owner_entries for p in entry["properties"] + entry["disposable"]}
+    tenants = users[UserRole.TENANT]
+    manifest = {
+        "password": BENCH_PASSWORD,
+        "admins": [emails[a] for a in users[UserRole.ADMIN][:sample]],
+        "owners": owner_entries,
+        "tenants": [
+            {"email": emails[t], "id": t}
+            for t in tenants[:sample]
+        ],
+        "property_ids": rng.sample(all_props, min(len(all_props), sample * 50)),
+        "disposable_properties": [p for p in reversed(all_props) if p not in owned][:sample],
+        "disposable_users": tenants[sample:][-sample:],
+    }
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(manifest, indent=2))
+    print(f"Manifest written to {path}")
+
+
+# -------------------- CLI --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load a synthetic benchmark dataset.")
+    parser.add_argument("--users", type=int, default=DEFAULT_USERS)
+    parser.add_argument("--properties", type=int, default=DEFAULT_PROPERTIES)
+    parser.add_argument("--payments", type=int, default=DEFAULT_PAYMENTS)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply all row counts, e.g. 0.01")
+    parser.add_argument("--admins", type=int, default=5)
+    parser.add_argument("--owner-ratio", type=float, default=0.1)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--sample", type=int, default=200, help="accounts per role saved to the manifest")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--manifest", type=Path, default=RESULTS_DIR / "manifest.json")
+    args = parser.parse_args()
+
+    users_total = max(int(args.users * args.scale), args.admins + 2)
+    props_total = max(int(args.properties * args.scale), 1)
+    payments_total = max(int(args.payments * args.scale), 0)
+    owners_total = max(int(users_total * args.owner_ratio), 1)
+
+    rng = random.Random(args.seed)
+    init_db()
+
+    print(f"Seeding {users_total:,} users, {props_total:,} properties, {payments_total:,} payments")
+    started = time.perf_counter()
+
+    db = SessionLocal()
+    try:
+        users, emails = seed_users(db, users_total, args.admins, owners_total, args.batch_size, rng)
+        by_owner = seed_properties(db, props_total, users[UserRole.OWNER], args.batch_size, rng)
+        property_ids = [p for props in by_owner.values() for p in props]
+        if payments_total:
+            seed_payments(db, payments_total, property_ids, users[UserRole.TENANT], args.batch_size, rng)
+    finally:
+        db.close()
+
+    write_manifest(args.manifest, users, emails, by_owner, args.sample, rng)
+    print(f"Done in {time.perf_counter() - started:,.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.core.security import hash_password
+from app.db.session import SessionLocal, engine
+from app.db.upsert import insert_user_if_absent, upsert_payment
+from app.models.property import PaymentStatus, Property, PropertyType, RentPayment
+from app.models.user import User, UserRole
+
+
+# Concurrent writers hammer the same keys; every round must end with exactly
+# one payment row, one user per email and one winning property update.
+
+
+def _together(workers: int, fn) -> list:
+    # run fn(i) on `workers` threads released at the same moment
+    barrier = threading.Barrier(workers)
+
+    def run(i):
+        barrier.wait()
+        return fn(i)
+
+    with ThreadPoolExecutor(workers) as pool:
+        return list(pool.map(run, range(workers)))
+
+
+def _fixtures(tag: str) -> tuple[int, int, int]:
+    with SessionLocal() as db:
+        owner = User(full_name="Stress Owner", email=f"{tag}-owner@stress.local", phone="0",
+                     hashed_password="x", role=UserRole.OWNER)
+        tenant = User(full_name="Stress Tenant", email=f"{tag}-tenant@stress.local", phone="0",
+                      hashed_password="x", role=UserRole.TENANT)
+        db.add_all([owner, tenant])
+        db.flush()
+        prop = Property(owner_id=owner.id, title="Stress flat", description="stress", location="Stress",
+                        rent_amount=1000, property_type=PropertyType.APARTMENT)
+        db.add(prop)
+        db.commit()
+        return owner.id, tenant.id, prop.id
+
+
+def _cleanup(tag: str, property_id: int):
+    with SessionLocal() as db:
+        db.execute(delete(RentPayment).where(RentPayment.property_id == property_id))
+        db.execute(delete(Property).where(Property.id == property_id))
+        db.execute(delete(User).where(User.email.like(f"{tag}-%")))
+        db.commit()
+
+
+# -------------------- SCENARIOS --------------------
+
+def payments_round(workers: int, property_id: int, tenant_id: int, month: date) -> dict:
+    def submit(i):
+        with SessionLocal() as db:
+            upsert_payment(db, property_id, tenant_id, month, 1000 + i, PaymentStatus.PAID)
+            db.commit()
+
+    _together(workers, submit)
+    with SessionLocal() as db:
+        rows = db.scalar(
+            select(func.count()).select_from(RentPayment).where(
+                RentPayment.property_id == property_id,
+                RentPayment.tenant_id == tenant_id,
+                RentPayment.month == month,
+            )
+        )
+    return {"rows": rows, "ok": rows == 1}
+
+
+def register_round(workers: int, email: str, hashed: str) -> dict:
+    def submit(i):
+        with SessionLocal() as db:
+            user_id = insert_user_if_absent(db, "Stress User", email, "0", hashed, UserRole.TENANT)
+            db.commit()
+            return user_id
+
+    created = [r for r in _together(workers, submit) if r is not None]
+    with SessionLocal() as db:
+        rows = db.scalar(select(func.count()).select_from(User).where(User.email == email))
+    return {"created": len(created), "rows": rows, "ok": len(created) == 1 and rows == 1}
+
+
+def version_round(workers: int, property_id: int, n: int) -> dict:
+    # every worker loads the same version, then races to save a distinct
+    # value (an unchanged row would not be written at all)
+    loaded = threading.Barrier(workers)
+
+    def submit(i):
+        with SessionLocal() as db:
+            prop = db.get(Property, property_id)
+            loaded.wait()
+            prop.rent_amount = 2000 + n * workers + i
+            try:
+                db.commit()
+                return True
+            except StaleDataError:
+                db.rollback()
+                return False
+
+    winners = sum(_together(workers, submit))
+    return {"winners": winners, "ok": winners == 1}
+
+
+# -------------------- CLI --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent stress test for the upsert paths.")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    tag = f"stress-{time.time_ns()}"
+    _, tenant_id, property_id = _fixtures(tag)
+    hashed = hash_password("stresspass")
+    failures = 0
+    started = time.perf_counter()
+    try:
+        for n in range(args.rounds):
+            month = date(2000 + n // 12, n % 12 + 1, 1)
+            result = {
+                "round": n,
+                "payments": payments_round(args.workers, property_id, tenant_id, month),
+                "register": register_round(args.workers, f"{tag}-user{n}@stress.local", hashed),
+                "version": version_round(args.workers, property_id, n),
+            }
+            failed = [name for name in ("payments", "register", "version") if not result[name]["ok"]]
+            failures += bool(failed)
+            if failed:
+                print(json.dumps(result))
+    finally:
+        _cleanup(tag, property_id)
+
+    print(json.dumps({
+        "dialect": engine.dialect.name,
+        "workers": args.workers,
+        "rounds": args.rounds,
+        "failed_rounds": failures,
+        "elapsed_s": round(time.perf_counter() - started, 2),
+    }))
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+
+# Content that is already compressed (or must not be buffered) goes out as-is.
+SKIP_PREFIXES = ("image/", "video/", "audio/", "font/woff")
+SKIP_TYPES = {
+    "application/gzip",
+    "application/x-gzip",
+    "application/zip",
+    "application/pdf",
+    "application/octet-stream",
+    "application/wasm",
+    "text/event-stream",
+}
+COMPRESSIBLE_IMAGES = {"image/svg+xml", "image/x-icon"}
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    offered = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip().lower()] = q
+    # highest q wins; on a tie br (smaller) beats gzip; "*" covers the unlisted
+    wildcard = offered.get("*", 0)
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    best = max(supported, key=lambda name: offered.get(name, wildcard))
+    return best if offered.get(best, wildcard) > 0 else None
+
+
+def compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type in COMPRESSIBLE_IMAGES:
+        return True
+    return media_type not in SKIP_TYPES and not media_type.startswith(SKIP_PREFIXES)
+
+
+# -------------------- COMPRESSORS --------------------
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        # sync flush: every streamed chunk is decodable on arrival
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, quality: int):
+        self._obj = brotli.Compressor(mode=brotli.MODE_TEXT, quality=quality)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.process(data) + self._obj.finish()
+
+
+# -------------------- MIDDLEWARE --------------------
+
+class CompressionMiddleware:
+    # gzip / brotli for responses of at least minimum_size bytes. Streamed
+    # responses are compressed chunk by chunk, so early flushes still arrive
+    # early.
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = settings.COMPRESSION_MIN_SIZE,
+        gzip_level: int = settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = settings.COMPRESSION_BROTLI_QUALITY,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _Responder(self, encoding, send).send)
+
+    def compressor(self, encoding: str):
+        return _Brotli(self.brotli_quality) if encoding == "br" else _Gzip(self.gzip_level)
+
+
+class _Responder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start = None
+        self.passthrough = False
+        self.compressor = None
+
+    async def send(self, message):
+        kind = message["type"]
+        if kind == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            if "content-encoding" in headers or not compressible(headers.get("content-type", "")):
+                self.passthrough = True
+                await self._send(message)
+            else:
+                self.start = message  # held until the first body shows the size
+            return
+
+        if kind != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+
+        if self.start is not None:
+            start, self.start = self.start, None
+            if not more and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            self.compressor = self.middleware.compressor(self.encoding)
+            if more:
+                del headers["Content-Length"]
+                await self._send(start)
+            else:
+                body = self.compressor.finish(body)
+                headers["Content-Length"] = str(len(body))
+                await self._send(start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+
+        body = self.compressor.chunk(body) if more else self.compressor.finish(body)
+        await self._send({"type": "http.response.body", "body": body, "more_body": more})
@@ -0,0 +1,85 @@
+import inspect
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from sqlalchemy import text
+
+from app.core.config import settings
+
+
+logger = logging.getLogger("app.lifespan")
+
+_startup_hooks = []
+_shutdown_hooks = []
+_optional_hooks = set()
+
+
+# -------------------- HOOK REGISTRATION --------------------
+
+def on_startup(fn=None, *, required: bool = True):
+    # A failing required hook aborts startup (the worker exits and the
+    # process manager restarts it); optional ones are logged and skipped.
+    def register(fn):
+        _startup_hooks.append(fn)
+        if not required:
+            _optional_hooks.add(fn)
+        return fn
+
+    return register(fn) if fn is not None else register
+
+
+def on_shutdown(fn):
+    _shutdown_hooks.append(fn)
+    return fn
+
+
+async def _run_hooks(hooks, phase: str):
+    for hook in hooks:
+        started = time.perf_counter()
+        try:
+            result = hook()
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            logger.exception("%s hook %s failed", phase, hook.__name__)
+            # shutdown keeps going so later hooks still release their resources
+            if phase == "startup" and hook not in _optional_hooks:
+                raise
+            continue
+        logger.info("%s %s in %.1f ms", phase, hook.__name__, (time.perf_counter() - started) * 1000)
+
+
+# -------------------- WARMUP --------------------
+
+def warm_templates(templates):
+    # Compile every template into the environment cache. Called pre-fork by
+    # the launcher so workers inherit compiled templates.
+    env = templates.env
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+def warm_db_pool(engine, connections: int = settings.WARMUP_DB_CONNECTIONS):
+    # Open (and immediately return) a few pooled connections so the first
+    # requests don't pay for TCP + auth.
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = engine.connect()
+            conn.execute(text("SELECT 1"))
+            opened.append(conn)
+    finally:
+        for conn in opened:
+            conn.close()
+
+
+# -------------------- LIFESPAN --------------------
+
+@asynccontextmanager
+async def lifespan(app):
+    await _run_hooks(_startup_hooks, "startup")
+    yield
+    await _run_hooks(_shutdown_hooks, "shutdown")
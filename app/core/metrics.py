@@ -0,0 +1,314 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from starlette.routing import Match
+
+from app.core.config import settings
+
+
+logger = logging.getLogger("app.metrics")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED = "<unmatched>"
+DEAD_FILE = "_dead.json"
+
+
+# -------------------- REQUEST METRICS --------------------
+
+class RequestMetrics:
+    # Plain dicts updated only from the event loop thread: the middleware
+    # and the /metrics handler both run there, so no locks are needed.
+
+    def __init__(self):
+        self.requests: dict[tuple[str, str, str], int] = {}       # (route, method, status)
+        self.latency: dict[tuple[str, str], list[float]] = {}     # bucket counts..., sum, count
+        self.in_flight: dict[str, int] = {}
+
+    def started(self, route: str):
+        self.in_flight[route] = self.in_flight.get(route, 0) + 1
+
+    def finished(self, route: str, method: str, status: int, seconds: float):
+        self.in_flight[route] -= 1
+        key = (route, method, str(status))
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+        hist = self.latency.get((route, method))
+        if hist is None:
+            hist = self.latency[(route, method)] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0]
+        hist[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        hist[-2] += seconds
+        hist[-1] += 1
+
+    def dump(self) -> dict:
+        return {
+            "requests": [[*key, value] for key, value in self.requests.items()],
+            "latency": [[*key, hist] for key, hist in self.latency.items()],
+            "in_flight": self.in_flight,
+            "gauges": collect_gauges(),
+        }
+
+
+request_metrics = RequestMetrics()
+
+
+def route_template(router, scope) -> str:
+    # Label by route template, never the raw path, to keep series bounded.
+    partial = None
+    for route in router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED)
+        if match == Match.PARTIAL and partial is None:
+            partial = getattr(route, "path", UNMATCHED)
+    return partial or UNMATCHED
+
+
+class MetricsMiddleware:
+    # Outermost middleware, so latency covers compression and sessions too.
+
+    def __init__(self, app, router):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = route_template(self.router, scope)
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+        request_metrics.started(route)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_metrics.finished(route, method, status, time.perf_counter() - started)
+
+
+# -------------------- GAUGES --------------------
+
+def _pool_gauges(engine, pool: str) -> list[tuple[str, dict, float]]:
+    p = engine.pool
+    if not hasattr(p, "checkedout"):
+        return []   # NullPool / StaticPool
+    labels = {"pool": pool}
+    return [
+        ("db_pool_size", labels, p.size()),
+        ("db_pool_checked_out", labels, p.checkedout()),
+        ("db_pool_checked_in", labels, p.checkedin()),
+        ("db_pool_overflow", labels, max(p.overflow(), 0)),
+    ]
+
+
+def collect_gauges() -> list[tuple[str, dict, float]]:
+    # Read at scrape/flush time from the objects that own them.
+    from app.core.sessions import session_store
+    from app.db.replicas import replicas
+    from app.db.session import engine
+    from app.services.autocomplete import locations
+    from app.services.listing_snapshot import listing_snapshot
+    from app.services.pubsub import broker
+    from app.services.recommendations import recommender
+
+    gauges = _pool_gauges(engine, "primary")
+    for n, replica in enumerate(replicas):
+        gauges += _pool_gauges(replica.engine, f"replica{n}")
+    gauges += [
+        ("recommender_index_rows", {}, recommender.size),
+        ("location_index_terms", {}, len(locations)),
+        ("location_suggest_cache_entries", {}, locations.cache_size()),
+        ("sse_subscribers", {}, broker.subscriber_count()),
+    ]
+    if listing_snapshot.current is not None:
+        gauges.append(("listing_snapshot_rows", {}, len(listing_snapshot.current)))
+    if session_store is not None:
+        gauges.append(("session_store_entries", {"backend": type(session_store).__name__}, len(session_store)))
+    return gauges
+
+
+# -------------------- MULTIPROCESS --------------------
+# With METRICS_MULTIPROC_DIR set, each worker writes its state to
+# <dir>/<pid>.json every METRICS_FLUSH_SECONDS and /metrics sums every file.
+# Counters of exited workers are folded into _dead.json so totals never go
+# backwards. Gauges carry a pid label (each worker has its own pool and
+# caches) and are dropped when the worker exits.
+
+def _multiproc_dir() -> Path | None:
+    return Path(settings.METRICS_MULTIPROC_DIR) if settings.METRICS_MULTIPROC_DIR else None
+
+
+def _write_json(path: Path, data: dict):
+    tmp = path.with_suffix(f".tmp{os.getpid()}")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+def flush():
+    directory = _multiproc_dir()
+    if directory is not None:
+        directory.mkdir(parents=True, exist_ok=True)
+        data = request_metrics.dump()
+        pid = str(os.getpid())
+        data["gauges"] = [(name, {**labels, "pid": pid}, value) for name, labels, value in data["gauges"]]
+        _write_json(directory / f"{pid}.json", data)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def mark_process_dead(pid: int):
+    # Called by the gunicorn master when a worker exits (and at scrape time
+    # for files whose process is gone).
+    directory = _multiproc_dir()
+    if directory is None:
+        return
+    source = directory / f"{pid}.json"
+    with open(directory / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not source.exists():
+            return
+        dead = directory / DEAD_FILE
+        merged = _merge([_read(dead), _read(source)]) if dead.exists() else _read(source)
+        merged["in_flight"], merged["gauges"] = {}, []
+        _write_json(dead, merged)
+        source.unlink()
+
+
+def reset_multiproc_dir():
+    # Fresh counters for a fresh server (gunicorn on_starting).
+    directory = _multiproc_dir()
+    if directory is None:
+        return
+    directory.mkdir(parents=True, exist_ok=True)
+    for path in directory.glob("*.json"):
+        path.unlink()
+
+
+def _read(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {"requests": [], "latency": [], "in_flight": {}, "gauges": []}
+
+
+def _merge(snapshots: list[dict]) -> dict:
+    requests, latency, in_flight, gauges = {}, {}, {}, {}
+    for snap in snapshots:
+        for route, method, status, value in snap["requests"]:
+            key = (route, method, status)
+            requests[key] = requests.get(key, 0) + value
+        for route, method, hist in snap["latency"]:
+            current = latency.get((route, method))
+            latency[(route, method)] = hist if current is None else [a + b for a, b in zip(current, hist)]
+        for route, value in snap["in_flight"].items():
+            in_flight[route] = in_flight.get(route, 0) + value
+        for name, labels, value in snap["gauges"]:
+            key = (name, tuple(sorted(labels.items())))
+            gauges[key] = gauges.get(key, 0) + value
+    return {
+        "requests": [[*key, value] for key, value in requests.items()],
+        "latency": [[*key, hist] for key, hist in latency.items()],
+        "in_flight": in_flight,
+        "gauges": [[name, dict(labels), value] for (name, labels), value in gauges.items()],
+    }
+
+
+def collect() -> dict:
+    directory = _multiproc_dir()
+    if directory is None:
+        return request_metrics.dump()
+
+    flush()
+    snapshots = []
+    for path in directory.glob("*.json"):
+        if path.name != DEAD_FILE and path.stem.isdigit() and not _pid_alive(int(path.stem)):
+            mark_process_dead(int(path.stem))
+            continue
+        snapshots.append(_read(path))
+    return _merge(snapshots)
+
+
+async def flush_periodically():
+    # a file left by an earlier process with this pid belongs to the dead
+    mark_process_dead(os.getpid())
+    while True:
+        await asyncio.sleep(settings.METRICS_FLUSH_SECONDS)
+        try:
+            flush()
+        except OSError:
+            logger.exception("metrics flush failed")
+
+
+# -------------------- EXPOSITION --------------------
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items())) + "}"
+
+
+def _le(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def render(data: dict) -> str:
+    # Prometheus text exposition format 0.0.4
+    lines = [
+        "# HELP http_requests_total Requests by route template, method and status.",
+        "# TYPE http_requests_total counter",
+    ]
+    for route, method, status, value in sorted(data["requests"]):
+        lines.append(f"http_requests_total{_labels({'route': route, 'method': method, 'status': status})} {value}")
+
+    lines += [
+        "# HELP http_request_duration_seconds Time from request start to last response byte.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for route, method, hist in sorted(data["latency"]):
+        base = {"route": route, "method": method}
+        cumulative = 0
+        for bound, count in zip((*LATENCY_BUCKETS, float("inf")), hist[:-2]):
+            cumulative += count
+            lines.append(f"http_request_duration_seconds_bucket{_labels({**base, 'le': _le(bound)})} {cumulative}")
+        lines.append(f"http_request_duration_seconds_sum{_labels(base)} {hist[-2]}")
+        lines.append(f"http_request_duration_seconds_count{_labels(base)} {hist[-1]}")
+
+    lines += [
+        "# HELP http_requests_in_flight Requests currently being served.",
+        "# TYPE http_requests_in_flight gauge",
+    ]
+    for route, value in sorted(data["in_flight"].items()):
+        lines.append(f"http_requests_in_flight{_labels({'route': route})} {value}")
+
+    seen = set()
+    for name, labels, value in sorted(data["gauges"], key=lambda g: (g[0], sorted(g[1].items()))):
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name}{_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,343 @@
+import logging
+import os
+import re
+import site
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+
+from app.core.config import BASE_DIR, settings
+
+
+logger = logging.getLogger("app.profiling")
+
+# Where the time goes, judged by the innermost matching frame: a lazy load
+# fired from a template counts as sqlalchemy, not jinja2.
+CATEGORIES = (
+    ("sqlalchemy", ("sqlalchemy/", "psycopg/", "psycopg_pool/", "sqlite3/")),
+    ("bcrypt", ("bcrypt/", "passlib/")),
+    ("jinja2", ("jinja2/", "markupsafe/", "templates/")),
+)
+WORKER_THREAD = "AnyIO worker thread"
+SAFE_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+# -------------------- STACKS --------------------
+
+def _source_roots() -> list[str]:
+    roots = [*site.getsitepackages(), site.getusersitepackages(), sysconfig.get_paths()["stdlib"], str(BASE_DIR)]
+    return sorted({os.path.join(r, "") for r in roots if r}, key=len, reverse=True)
+
+
+_ROOTS = _source_roots()
+
+
+@lru_cache(maxsize=16384)
+def _label(code) -> str:
+    filename = code.co_filename
+    for root in _ROOTS:
+        if filename.startswith(root):
+            filename = filename[len(root):]
+            break
+    # collapsed stacks are "frame;frame count", so no spaces inside a frame
+    return f"{filename}:{code.co_name}".replace(" ", "_")
+
+
+def frame_labels(frame) -> list[str]:
+    # root-first labels for one thread's stack
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def categorize(labels: list[str]) -> str:
+    for label in reversed(labels):
+        for name, prefixes in CATEGORIES:
+            if label.startswith(prefixes):
+                return name
+    return "other"
+
+
+IDLE_LEAVES = (
+    "selectors.py:",                    # asyncio loop waiting in select()
+    "asyncio/runners.py:run",           # uvloop: the wait happens in C below this frame
+    "asyncio/base_events.py:run_",
+    "threading.py:wait",                # pool thread waiting for work
+    "queue.py:get",
+    "concurrent/futures/thread.py:_worker",
+)
+
+
+def is_idle(labels: list[str]) -> bool:
+    return not labels or labels[-1].startswith(IDLE_LEAVES)
+
+
+def request_threads(loop_thread: int) -> dict[int, object]:
+    # The event loop thread plus busy threadpool workers: where an async
+    # handler, its sync calls and a streamed template render actually run.
+    names = {t.ident: t.name for t in threading.enumerate()}
+    frames = sys._current_frames()
+    return {
+        tid: frame for tid, frame in frames.items()
+        if tid == loop_thread or names.get(tid, "").startswith(WORKER_THREAD)
+    }
+
+
+# -------------------- ON-DEMAND PROFILE --------------------
+
+class RequestProfile:
+    # Samples the request's threads every `interval` seconds until stopped.
+    # Other requests running on the same worker at the same time show up
+    # too; profile on a quiet worker for a clean picture.
+
+    def __init__(self, interval: float = settings.PROFILE_INTERVAL):
+        self.interval = interval
+        self.loop_thread = threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.categories: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="profiler")
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join()
+        self.wall = time.perf_counter() - self.started
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for tid, frame in request_threads(self.loop_thread).items():
+                labels = frame_labels(frame)
+                if is_idle(labels):
+                    # a parked loop is time spent awaiting; parked pool threads are not ours
+                    if tid == self.loop_thread:
+                        self.categories["idle"] += 1
+                    continue
+                self.categories[categorize(labels)] += 1
+                self.stacks[";".join(labels)] += 1
+
+    def summary(self) -> str:
+        total = sum(self.categories.values()) or 1
+        return "; ".join(
+            f"{name}={self.categories[name] / total * 100:.1f}%"
+            for name in ("sqlalchemy", "jinja2", "bcrypt", "other", "idle")
+        )
+
+    def save(self, directory: str, method: str, path: str) -> Path:
+        # Collapsed-stack format: feed to flamegraph.pl, speedscope or inferno.
+        out_dir = Path(directory)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        name = SAFE_NAME_RE.sub("_", f"{method}{path}").strip("_")[:80]
+        target = out_dir / f"{datetime.now():%Y%m%d-%H%M%S-%f}-{name}.folded"
+        target.write_text("".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common()))
+        return target
+
+
+class ProfilingMiddleware:
+    # Admin-only, per-request opt-in: send the X-Profile header or add
+    # ?_profile=1. The response is buffered so the summary headers can
+    # cover a streamed template render too. Must sit inside the session
+    # middleware.
+
+    def __init__(self, app, directory: str = settings.PROFILE_DIR):
+        self.app = app
+        self.directory = directory
+        self.header = settings.PROFILE_HEADER.lower()
+        self.query_param = settings.PROFILE_QUERY_PARAM
+
+    def requested(self, scope) -> bool:
+        if Headers(scope=scope).get(self.header) not in (None, "", "0"):
+            return True
+        query = scope.get("query_string", b"").decode("latin-1")
+        return any(part.split("=", 1)[0] == self.query_param for part in query.split("&"))
+
+    def is_admin(self, scope) -> bool:
+        # the role in the session is only a hint; check the user row the way
+        # the admin routes do
+        from app.db.session import SessionLocal
+        from app.routers.admin import require_admin
+
+        with SessionLocal() as db:
+            return require_admin(Request(scope), db) is not None
+
+    def finish(self, profile: "RequestProfile", scope) -> Path:
+        profile.stop()
+        return profile.save(self.directory, scope["method"], scope["path"])
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not self.requested(scope)
+            or scope.get("session", {}).get("role") != "admin"
+            or not await run_in_threadpool(self.is_admin, scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        start, body = None, []
+
+        async def buffered_send(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            body.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            # joining the sampler and writing the file both block
+            saved = await run_in_threadpool(self.finish, profile, scope)
+            payload = b"".join(body)
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Length"] = str(len(payload))
+            headers["X-Profile-Wall-Ms"] = f"{profile.wall * 1000:.1f}"
+            headers["X-Profile-Samples"] = str(profile.samples)
+            headers["X-Profile-Breakdown"] = profile.summary()
+            headers["X-Profile-File"] = saved.name
+            logger.info("profiled %s %s -> %s (%s)", scope["method"], scope["path"], saved, profile.summary())
+            await send(start)
+            await send({"type": "http.response.body", "body": payload})
+
+        profile.start()
+        try:
+            await self.app(scope, receive, buffered_send)
+        finally:
+            await run_in_threadpool(profile.stop)
+
+
+# -------------------- CONTINUOUS SAMPLING --------------------
+
+def route_key(labels: list[str]) -> tuple[str | None, int | None]:
+    # "owners.view_payments" for the outermost frame in app/routers/, or the
+    # template being streamed once the handler has returned.
+    for i, label in enumerate(labels):
+        if label.startswith("app/routers/"):
+            module = label[len("app/routers/"):].split(".py:", 1)[0]
+            return f"{module}.{label.rsplit(':', 1)[1]}", i
+    for i, label in enumerate(labels):
+        if label.startswith("templates/"):
+            return f"render {label.split(':', 1)[0][len('templates/'):]}", i
+    return None, None
+
+
+class RouteSampler:
+    # Low-rate background sampler aggregating hot stacks per route, cheap
+    # enough to leave on (PROFILE_CONTINUOUS_HZ). Counts are per worker
+    # process: the admin page shows whichever worker served it.
+
+    def __init__(self, hz: float = settings.PROFILE_CONTINUOUS_HZ,
+                 max_stacks: int = settings.PROFILE_MAX_STACKS):
+        self.hz = hz
+        self.max_stacks = max_stacks
+        self.routes: dict[str, dict] = {}
+        self.started_at: float | None = None
+        self.pid: int | None = None
+        self.loop_thread: int | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if self.hz <= 0 or self._thread is not None:
+            return
+        self.loop_thread = threading.get_ident()
+        self.pid = os.getpid()
+        self.started_at = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="route-sampler")
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        interval = 1.0 / self.hz
+        while not self._stop.wait(interval):
+            try:
+                self.sample()
+            except Exception:
+                logger.exception("route sampling failed")
+
+    def sample(self):
+        for frame in request_threads(self.loop_thread).values():
+            labels = frame_labels(frame)
+            key, at = route_key(labels)
+            if key is None:
+                continue
+            self.record(key, labels[at:])
+
+    def record(self, key: str, labels: list[str]):
+        with self._lock:
+            route = self.routes.setdefault(key, {"samples": 0, "categories": Counter(), "stacks": Counter()})
+            route["samples"] += 1
+            route["categories"][categorize(labels)] += 1
+            route["stacks"][";".join(labels)] += 1
+            if len(route["stacks"]) > self.max_stacks:
+                route["stacks"] = Counter(dict(route["stacks"].most_common(self.max_stacks // 2)))
+
+    def reset(self):
+        with self._lock:
+            self.routes = {}
+            self.started_at = time.time() if self._thread is not None else None
+
+    def report(self, top: int = 5) -> list[dict]:
+        with self._lock:
+            rows = []
+            for key, route in self.routes.items():
+                total = route["samples"]
+                rows.append({
+                    "route": key,
+                    "samples": total,
+                    "categories": {name: round(count / total * 100, 1) for name, count in route["categories"].most_common()},
+                    "stacks": [(stack.split(";"), count) for stack, count in route["stacks"].most_common(top)],
+                })
+        return sorted(rows, key=lambda r: r["samples"], reverse=True)
+
+    def folded(self) -> str:
+        # every route's stacks under a root frame named after the route
+        with self._lock:
+            return "".join(
+                f"{key};{stack} {count}\n"
+                for key, route in self.routes.items()
+                for stack, count in route["stacks"].items()
+            )
+
+
+route_sampler = RouteSampler()
+
+
+def saved_profiles(directory: str = settings.PROFILE_DIR, limit: int = 50) -> list[dict]:
+    path = Path(directory)
+    if not path.is_dir():
+        return []
+    files = sorted(path.glob("*.folded"), key=lambda p: p.stat().st_mtime, reverse=True)[:limit]
+    return [
+        {"name": p.name, "size": p.stat().st_size, "modified": datetime.fromtimestamp(p.stat().st_mtime)}
+        for p in files
+    ]
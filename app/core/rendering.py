@@ -0,0 +1,48 @@
+import logging
+
+from fastapi.responses import StreamingResponse
+
+
+logger = logging.getLogger("app.rendering")
+
+# Chunk targets in bytes: the first is small so <head> (and the stylesheet
+# link) reach the browser before the page body is rendered.
+CHUNK_SIZES = (2048, 8192, 32768)
+
+
+# -------------------- STREAMED TEMPLATES --------------------
+
+def _chunks(template, context: dict, charset: str):
+    # Jinja's generate() yields one string per template node; coalesce them
+    # so each flush is worth a network write.
+    sizes = iter(CHUNK_SIZES)
+    target = next(sizes)
+    buffer, buffered = [], 0
+    try:
+        for piece in template.generate(context):
+            buffer.append(piece)
+            buffered += len(piece)
+            if buffered >= target:
+                yield "".join(buffer).encode(charset)
+                buffer, buffered = [], 0
+                target = next(sizes, target)
+    except Exception:
+        # headers are already sent, so the status cannot change any more
+        logger.exception("error while streaming %s", template.name)
+        raise
+    if buffer:
+        yield "".join(buffer).encode(charset)
+
+
+def stream_template(templates, name: str, context: dict, status_code: int = 200,
+                    headers: dict | None = None) -> StreamingResponse:
+    # Drop-in for templates.TemplateResponse on large pages. Rendering runs
+    # after the handler returns and its DB session is closed, so everything
+    # the template touches must be loaded up front (eager-load relationships).
+    template = templates.get_template(name)
+    return StreamingResponse(
+        _chunks(template, context, "utf-8"),
+        status_code=status_code,
+        headers=headers,
+        media_type="text/html; charset=utf-8",
+    )
@@ -0,0 +1,395 @@
+import importlib
+import json
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import itsdangerous
+from itsdangerous.exc import BadSignature
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+
+from app.core.config import settings
+
+
+# -------------------- SESSION DICT --------------------
+
+class Session(dict):
+    # dict that remembers whether it was changed. Reads, and pops of keys
+    # that are not there (``session.pop("flash", None)``), leave it clean.
+    # Nested values must be reassigned to count as a change.
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.modified = False
+
+    def __setitem__(self, key, value):
+        if key not in self or self[key] != value:
+            self.modified = True
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.modified = True
+
+    def pop(self, key, *default):
+        if key in self:
+            self.modified = True
+        return super().pop(key, *default)
+
+    def popitem(self):
+        item = super().popitem()
+        self.modified = True
+        return item
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self.modified = True
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        if self:
+            self.modified = True
+        super().clear()
+
+
+# -------------------- STORES --------------------
+
+class SessionStore(ABC):
+    # Server-side backend: maps a session id to (data, expires_at). The
+    # middleware calls ``blocking`` stores from the threadpool; only stores
+    # that never do I/O should clear it.
+
+    blocking = True
+
+    @abstractmethod
+    def get(self, sid: str) -> tuple[dict, float] | None: ...
+
+    @abstractmethod
+    def set(self, sid: str, data: dict, user_id: int | None, max_age: int) -> float: ...
+
+    @abstractmethod
+    def delete(self, sid: str): ...
+
+    @abstractmethod
+    def revoke_user(self, user_id: int) -> int: ...
+
+    def purge_expired(self) -> int:
+        return 0
+
+    def __len__(self) -> int:
+        return 0
+
+
+class MemorySessionStore(SessionStore):
+    # Per-process LRU. On its own it only suits a single worker; as the local
+    # tier of TieredSessionStore it saves a shared-store round trip.
+
+    blocking = False
+
+    def __init__(self, maxsize: int = 10_000, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[dict, float, int | None, float]] = OrderedDict()
+        self._by_user: dict[int, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None:
+                return None
+            data, expires_at, user_id, cached_at = entry
+            if expires_at <= now or (self.ttl is not None and now - cached_at > self.ttl):
+                self._drop(sid)
+                return None
+            self._entries.move_to_end(sid)
+            return data, expires_at
+
+    def put(self, sid, data, user_id, expires_at):
+        with self._lock:
+            self._drop(sid)
+            self._entries[sid] = (data, expires_at, user_id, time.time())
+            if user_id is not None:
+                self._by_user.setdefault(user_id, set()).add(sid)
+            while len(self._entries) > self.maxsize:
+                self._drop(next(iter(self._entries)))
+
+    def set(self, sid, data, user_id, max_age):
+        expires_at = time.time() + max_age
+        self.put(sid, data, user_id, expires_at)
+        return expires_at
+
+    def delete(self, sid):
+        with self._lock:
+            self._drop(sid)
+
+    def revoke_user(self, user_id):
+        with self._lock:
+            sids = list(self._by_user.get(user_id, ()))
+            for sid in sids:
+                self._drop(sid)
+        return len(sids)
+
+    def _drop(self, sid):
+        entry = self._entries.pop(sid, None)
+        if entry and entry[2] is not None:
+            sids = self._by_user.get(entry[2])
+            if sids:
+                sids.discard(sid)
+                if not sids:
+                    del self._by_user[entry[2]]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DatabaseSessionStore(SessionStore):
+    # Shared store in the user_sessions table, visible to every worker.
+
+    def get(self, sid):
+        from app.db.session import SessionLocal
+        from app.models.session import UserSession
+
+        with SessionLocal() as db:
+            row = db.get(UserSession, sid)
+            if row is None:
+                return None
+            expires_at = row.expires_at.replace(tzinfo=row.expires_at.tzinfo or timezone.utc).timestamp()
+            if expires_at <= time.time():
+                return None
+            return json.loads(row.data), expires_at
+
+    def set(self, sid, data, user_id, max_age):
+        from app.db.session import SessionLocal
+        from app.models.session import UserSession
+
+        expires = datetime.now(timezone.utc) + timedelta(seconds=max_age)
+        with SessionLocal() as db:
+            db.merge(UserSession(id=sid, user_id=user_id, data=json.dumps(data), expires_at=expires))
+            db.commit()
+        return expires.timestamp()
+
+    def delete(self, sid):
+        from app.db.session import SessionLocal
+        from app.models.session import UserSession
+
+        with SessionLocal() as db:
+            db.query(UserSession).filter(UserSession.id == sid).delete()
+            db.commit()
+
+    def revoke_user(self, user_id):
+        from app.db.session import SessionLocal
+        from app.models.session import UserSession
+
+        with SessionLocal() as db:
+            count = db.query(UserSession).filter(UserSession.user_id == user_id).delete()
+            db.commit()
+        return count
+
+    def purge_expired(self) -> int:
+        from app.db.session import SessionLocal
+        from app.models.session import UserSession
+
+        with SessionLocal() as db:
+            count = (
+                db.query(UserSession)
+                .filter(UserSession.expires_at <= datetime.now(timezone.utc))
+                .delete()
+            )
+            db.commit()
+        return count
+
+
+class TieredSessionStore(SessionStore):
+    # Local LRU in front of a shared backend. Local entries live for at most
+    # ``local_ttl`` seconds, so a revoke in one worker reaches the others
+    # within that window.
+
+    def __init__(self, shared: SessionStore, maxsize: int, local_ttl: float):
+        self.shared = shared
+        self.local = MemorySessionStore(maxsize=maxsize, ttl=local_ttl)
+        self.blocking = shared.blocking
+
+    def get(self, sid):
+        hit = self.local.get(sid)
+        if hit is not None:
+            return hit
+        hit = self.shared.get(sid)
+        if hit is not None:
+            data, expires_at = hit
+            self.local.put(sid, data, data.get("user_id"), expires_at)
+        return hit
+
+    def set(self, sid, data, user_id, max_age):
+        expires_at = self.shared.set(sid, data, user_id, max_age)
+        self.local.put(sid, data, user_id, expires_at)
+        return expires_at
+
+    def delete(self, sid):
+        self.local.delete(sid)
+        self.shared.delete(sid)
+
+    def revoke_user(self, user_id):
+        self.local.revoke_user(user_id)
+        return self.shared.revoke_user(user_id)
+
+    def purge_expired(self):
+        return self.shared.purge_expired()
+
+    def __len__(self):
+        return len(self.local)
+
+
+def build_session_store(backend: str = settings.SESSION_BACKEND) -> SessionStore | None:
+    # "cookie" keeps everything in the signed cookie (no store). "memory" is a
+    # process-local LRU. "database" or "package.module:Class" put a shared
+    # store behind the LRU.
+    if backend == "cookie":
+        return None
+    if backend == "memory":
+        return MemorySessionStore(maxsize=settings.SESSION_LRU_SIZE)
+    if backend == "database":
+        shared = DatabaseSessionStore()
+    else:
+        module_name, _, class_name = backend.partition(":")
+        shared = getattr(importlib.import_module(module_name), class_name)()
+    return TieredSessionStore(shared, settings.SESSION_LRU_SIZE, settings.SESSION_LOCAL_TTL)
+
+
+session_store = build_session_store()
+
+
+def revoke_user_sessions(user_id: int) -> int:
+    # Signed-cookie sessions cannot be recalled; they stop resolving to a user
+    # once the row is gone because get_current_user looks the id up.
+    if session_store is None:
+        return 0
+    return session_store.revoke_user(user_id)
+
+
+# -------------------- MIDDLEWARE --------------------
+
+class LeanSessionMiddleware:
+    # Drop-in for starlette's SessionMiddleware that only sends Set-Cookie when
+    # the session changed (or is due for a sliding-expiry refresh). Cookie
+    # mode uses the same signed format, so existing sessions stay valid.
+
+    def __init__(
+        self,
+        app,
+        secret_key: str,
+        session_cookie: str = "session",
+        max_age: int = 14 * 24 * 60 * 60,
+        path: str = "/",
+        same_site: str = "lax",
+        https_only: bool = False,
+        store: SessionStore | None = None,
+    ):
+        self.app = app
+        self.signer = itsdangerous.TimestampSigner(str(secret_key))
+        self.session_cookie = session_cookie
+        self.max_age = max_age
+        self.path = path
+        self.store = store
+        self.security_flags = "httponly; samesite=" + same_site
+        if https_only:
+            self.security_flags += "; secure"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        raw = HTTPConnection(scope).cookies.get(self.session_cookie)
+        if self.store is None:
+            data, state = self._load_cookie(raw)
+        else:
+            data, state = await self._call_store(self._load_stored, raw)
+        scope["session"] = Session(data)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                if self.store is None:
+                    header = self._commit_cookie(scope["session"], state)
+                else:
+                    header = await self._call_store(self._commit_stored, scope["session"], state)
+                if header:
+                    MutableHeaders(scope=message).append("Set-Cookie", header)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    # ---- cookie mode ----
+
+    def _load_cookie(self, raw):
+        if not raw:
+            return {}, {"valid": False}
+        try:
+            payload, signed_at = self.signer.unsign(raw.encode("utf-8"), max_age=self.max_age, return_timestamp=True)
+            return json.loads(b64decode(payload)), {"valid": True, "issued_at": signed_at.timestamp()}
+        except (BadSignature, ValueError):
+            return {}, {"valid": False}
+
+    def _commit_cookie(self, session, state):
+        changed = not isinstance(session, Session) or session.modified
+        if session:
+            stale = state["valid"] and time.time() - state["issued_at"] > self.max_age / 2
+            if not (changed or stale or not state["valid"]):
+                return None
+            value = self.signer.sign(b64encode(json.dumps(session).encode("utf-8"))).decode("utf-8")
+            return self._cookie(value, self.max_age)
+        if state["valid"]:
+            return self._cookie("null", 0)
+        return None
+
+    # ---- server-side mode ----
+
+    async def _call_store(self, fn, *args):
+        # a database-backed store would otherwise stall every request on
+        # this worker's event loop while it waits on the round trip
+        if self.store.blocking:
+            return await run_in_threadpool(fn, *args)
+        return fn(*args)
+
+    def _load_stored(self, raw):
+        hit = self.store.get(raw) if raw else None
+        if hit is None:
+            return {}, {"sid": None, "had_cookie": bool(raw), "user_id": None, "expires_at": 0.0}
+        data, expires_at = hit
+        return dict(data), {"sid": raw, "had_cookie": True, "user_id": data.get("user_id"), "expires_at": expires_at}
+
+    def _commit_stored(self, session, state):
+        sid = state["sid"]
+        if not session:
+            if sid:
+                self.store.delete(sid)
+            return self._cookie("null", 0) if state["had_cookie"] else None
+
+        changed = not isinstance(session, Session) or session.modified
+        # New id on login/logout so a pre-login id can't be fixed on a victim.
+        rotate = sid is None or session.get("user_id") != state["user_id"]
+        stale = state["expires_at"] - time.time() < self.max_age / 2
+
+        if rotate:
+            if sid:
+                self.store.delete(sid)
+            sid = secrets.token_urlsafe(16)
+        if changed or rotate or stale:
+            self.store.set(sid, dict(session), session.get("user_id"), self.max_age)
+        if rotate or stale:
+            return self._cookie(sid, self.max_age)
+        return None
+
+    def _cookie(self, value: str, max_age: int) -> str:
+        return f"{self.session_cookie}={value}; path={self.path}; Max-Age={max_age}; {self.security_flags}"
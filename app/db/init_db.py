@@ -1,12 +1,58 @@
+from sqlalchemy import inspect, text
+
+from app.db import partitions
 from app.db.session import engine, Base
 
 # 👇 Import ALL models
 from app.models.user import User
 from app.models.property import Property, RentPayment
+from app.models.session import UserSession
+from app.models.job import Job
+from app.models.search import SavedSearch, SearchAlert
+
+
+PAYMENT_KEY = "uq_rent_payments_property_tenant_month"
+UPDATED_INDEX = "ix_properties_updated_at"
+
+
+def upgrade_schema():
+    # create_all() never alters existing tables; bring older databases up to
+    # the current models.
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        if "properties" in tables and "version" not in {c["name"] for c in inspector.get_columns("properties")}:
+            print("Adding properties.version...")
+            conn.execute(text("ALTER TABLE properties ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+
+        if "properties" in tables and UPDATED_INDEX not in {i["name"] for i in inspector.get_indexes("properties")}:
+            print("Indexing properties.updated_at...")
+            conn.execute(text(f"CREATE INDEX {UPDATED_INDEX} ON properties (updated_at)"))
+
+        if "rent_payments" in tables:
+            existing = {u["name"] for u in inspector.get_unique_constraints("rent_payments")}
+            existing |= {i["name"] for i in inspector.get_indexes("rent_payments")}
+            if PAYMENT_KEY not in existing:
+                print("Removing duplicate rent payments and adding the unique key...")
+                conn.execute(text(
+                    "DELETE FROM rent_payments WHERE id NOT IN ("
+                    "SELECT MAX(id) FROM rent_payments GROUP BY property_id, tenant_id, month)"
+                ))
+                conn.execute(text(
+                    f"CREATE UNIQUE INDEX {PAYMENT_KEY} ON rent_payments (property_id, tenant_id, month)"
+                ))
 
 
 def init_db():
     print("Creating database tables...")
+    upgrade_schema()
+    if partitions.partitioned(engine):
+        # rent_payments is created by hand as a partitioned table, after the
+        # tables it references
+        others = [t for t in Base.metadata.sorted_tables if t.name != partitions.PARENT]
+        Base.metadata.create_all(bind=engine, tables=others)
+        partitions.create_parent(engine)
+        partitions.ensure_partitions(engine)
     Base.metadata.create_all(bind=engine)
     print("Database tables created successfully.")
 
@@ -0,0 +1,393 @@
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import UniqueConstraint, text
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+from app.core.config import settings
+from app.db.session import engine
+from app.models.property import RentPayment
+
+
+logger = logging.getLogger("app.partitions")
+
+# Postgres only: rent_payments is range-partitioned by year on `month`. The
+# primary key becomes (id, month) because a partitioned table's unique keys
+# must include the partition column; the ORM still identifies rows by id
+# alone (ids come from one sequence). SQLite keeps the plain table.
+#
+# There is no DEFAULT partition, since one rules out DETACH ... CONCURRENTLY.
+# ensure_partitions() keeps this year and the next ones in place, and
+# ensure_year() creates any other year before a payment for it is written.
+
+PARENT = RentPayment.__tablename__
+LEGACY = f"{PARENT}_legacy"
+YEAR_RE = re.compile(rf"^{PARENT}_y(\d{{4}})$")
+
+_known_years: set[int] = set()
+
+
+def partitioned(bind=engine) -> bool:
+    return bind.dialect.name == "postgresql"
+
+
+def partition_name(year: int) -> str:
+    return f"{PARENT}_y{year}"
+
+
+def _bounds(year: int) -> tuple[date, date]:
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def _exists(conn, name: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None
+
+
+def _columns() -> str:
+    return ", ".join(c.name for c in RentPayment.__table__.columns)
+
+
+# -------------------- PARENT TABLE --------------------
+
+def _parent_ddl(conn) -> list[str]:
+    # Built from the model so the columns never drift from RentPayment.
+    table = RentPayment.__table__
+    dialect = conn.dialect
+    lines = [str(CreateColumn(column).compile(dialect=dialect)) for column in table.columns]
+    lines.append("PRIMARY KEY (id, month)")
+    for fk in table.foreign_keys:
+        target_table, target_column = fk.target_fullname.split(".")
+        lines.append(
+            f"FOREIGN KEY ({fk.parent.name}) REFERENCES {target_table} ({target_column})"
+            + (f" ON DELETE {fk.ondelete}" if fk.ondelete else "")
+        )
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            columns = ", ".join(c.name for c in constraint.columns)
+            lines.append(f"CONSTRAINT {constraint.name} UNIQUE ({columns})")
+
+    statements = [f"CREATE TABLE {PARENT} (\n    " + ",\n    ".join(lines) + "\n) PARTITION BY RANGE (month)"]
+    statements += [str(CreateIndex(index).compile(dialect=dialect)) for index in table.indexes]
+    return statements
+
+
+def create_parent(bind=engine):
+    # Creates the partitioned table, converting a plain rent_payments table
+    # left by earlier versions. Runs before create_all(), which then skips it.
+    if not partitioned(bind):
+        return
+    with bind.begin() as conn:
+        if _exists(conn, PARENT):
+            is_partitioned = conn.execute(text(
+                "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:name)"
+            ), {"name": PARENT}).scalar()
+            if is_partitioned:
+                return
+            logger.warning("converting %s to a partitioned table", PARENT)
+            print(f"Converting {PARENT} to a partitioned table...")
+            conn.execute(text(f"ALTER TABLE {PARENT} RENAME TO {LEGACY}"))
+            for (index,) in conn.execute(text("SELECT indexname FROM pg_indexes WHERE tablename = :t"), {"t": LEGACY}):
+                conn.execute(text(f'ALTER INDEX "{index}" RENAME TO "{index}_legacy"'))
+            conn.execute(text(f"ALTER SEQUENCE IF EXISTS {PARENT}_id_seq RENAME TO {LEGACY}_id_seq"))
+            legacy = True
+        else:
+            legacy = False
+
+        RentPayment.__table__.c.status.type.create(conn, checkfirst=True)
+        for statement in _parent_ddl(conn):
+            conn.execute(text(statement))
+
+        if legacy:
+            years = conn.execute(text(
+                f"SELECT DISTINCT EXTRACT(YEAR FROM month)::int FROM {LEGACY}"
+            )).scalars().all()
+            for year in years:
+                _create_year(conn, year)
+            columns = _columns()
+            conn.execute(text(f"INSERT INTO {PARENT} ({columns}) SELECT {columns} FROM {LEGACY}"))
+            conn.execute(text(
+                f"SELECT setval('{PARENT}_id_seq', COALESCE((SELECT MAX(id) FROM {PARENT}), 0) + 1, false)"
+            ))
+            conn.execute(text(f"DROP TABLE {LEGACY}"))
+
+
+# -------------------- PARTITIONS --------------------
+
+def _create_year(conn, year: int) -> bool:
+    # False if the year's partition is already there. Built beside the
+    # parent and then attached: CREATE TABLE ... PARTITION OF would take an
+    # ACCESS EXCLUSIVE lock on rent_payments and wait for (and block) every
+    # open transaction using it, ATTACH only needs SHARE UPDATE EXCLUSIVE.
+    # The advisory lock serialises processes creating the same year.
+    name = partition_name(year)
+    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": name})
+    if _exists(conn, name):
+        return False
+    low, high = _bounds(year)
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM ('{low}') TO ('{high}')"))
+    return True
+
+
+def ensure_year(year: int, bind=engine):
+    # Called before a payment for `year` is written; after the first call in
+    # a process it is a set lookup. The partition is attached in its own
+    # transaction, which a transaction that has already used rent_payments
+    # will not see: call it before such a transaction starts (the seeder),
+    # or write each payment in its own transaction (the routes).
+    if year in _known_years or not partitioned(bind):
+        return
+    with bind.begin() as conn:
+        # fail the write rather than queue behind a long-running DDL
+        conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+        if _create_year(conn, year):
+            logger.info("created partition %s", partition_name(year))
+    _known_years.add(year)
+
+
+def forget_missing(exc: Exception, year: int) -> bool:
+    # True when a write failed because `year` has no partition (archived by
+    # another process since this one created it); ensure_year() will then
+    # create it again.
+    orig = getattr(exc, "orig", None)
+    if getattr(orig, "sqlstate", None) != "23514" or "no partition" not in str(orig):
+        return False
+    _known_years.discard(year)
+    return True
+
+
+def ensure_partitions(bind=engine, ahead: int = settings.PAYMENT_PARTITIONS_AHEAD) -> list[str]:
+    # This year and the next `ahead` years. Idempotent; the job worker calls
+    # it hourly.
+    if not partitioned(bind):
+        return []
+    with bind.begin() as conn:
+        if not _exists(conn, PARENT):
+            return []
+        created = []
+        this_year = date.today().year
+        for year in range(this_year, this_year + ahead + 1):
+            if _create_year(conn, year):
+                created.append(partition_name(year))
+    for name in created:
+        logger.info("created partition %s", name)
+    return created
+
+
+def list_partitions(bind=engine) -> list[dict]:
+    if not partitioned(bind):
+        return []
+    with bind.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:parent) ORDER BY c.relname"
+        ), {"parent": PARENT}).all()
+    return [{"name": name, "bound": bound, "approx_rows": max(rows_, 0)} for name, bound, rows_ in rows]
+
+
+# -------------------- ARCHIVE / RESTORE --------------------
+# An archived year is <dir>/rent_payments_yYYYY.csv.gz plus a .json manifest
+# written only after the data is gone from the database. The partition is
+# detached first (CONCURRENTLY on Postgres 14+, so payment pages keep
+# running) and renamed to <name>_archiving; the COPY, the row count checks
+# and the DROP then share one transaction. If any of that fails the table
+# is attached again.
+
+def _paths(directory: Path, name: str) -> tuple[Path, Path]:
+    return directory / f"{name}.csv.gz", directory / f"{name}.json"
+
+
+def _detach(conn, name: str):
+    # `conn` is in autocommit: DETACH ... CONCURRENTLY cannot run inside a
+    # transaction. A concurrent detach interrupted half way stays pending
+    # and has to be finalized.
+    concurrent = conn.dialect.server_version_info >= (14,)
+    state = conn.execute(text(
+        f"SELECT {'inhdetachpending' if concurrent else 'false'} FROM pg_inherits "
+        "WHERE inhrelid = to_regclass(:name)"
+    ), {"name": name}).first()
+    if state is None:
+        return
+    if state[0]:
+        conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name} FINALIZE"))
+    elif concurrent:
+        conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name} CONCURRENTLY"))
+    else:
+        conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+
+
+def _reattach(bind, year: int):
+    # Puts a detached <name>_archiving table back. If the year's partition
+    # was recreated meanwhile (a back-dated payment), the rows are copied in.
+    name = partition_name(year)
+    staged = f"{name}_archiving"
+    low, high = _bounds(year)
+    with bind.begin() as conn:
+        if not _exists(conn, staged):
+            return
+        if _exists(conn, name):
+            columns = _columns()
+            conn.execute(text(
+                f"INSERT INTO {PARENT} ({columns}) SELECT {columns} FROM {staged} ON CONFLICT DO NOTHING"
+            ))
+            conn.execute(text(f"DROP TABLE {staged}"))
+        else:
+            conn.execute(text(f"ALTER TABLE {staged} RENAME TO {name}"))
+            conn.execute(text(
+                f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM ('{low}') TO ('{high}')"
+            ))
+    logger.warning("re-attached %s", name)
+
+
+def _count_records(path: Path) -> int:
+    # data rows in a gzip CSV with a header; quoted newlines stay in one record
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as source:
+        return sum(1 for _ in csv.reader(source)) - 1
+
+
+def archive_year(year: int, directory: Path, bind=engine) -> dict:
+    if year >= date.today().year:
+        raise ValueError("only past years can be archived")
+    name = partition_name(year)
+    staged = f"{name}_archiving"
+    data_path, manifest_path = _paths(directory, name)
+    if manifest_path.exists():
+        raise FileExistsError(f"{manifest_path} exists; restore that year before archiving it again")
+    directory.mkdir(parents=True, exist_ok=True)
+    columns = [c.name for c in RentPayment.__table__.columns]
+    tmp = data_path.with_suffix(".tmp")
+
+    # a table left by an interrupted run goes back first
+    _reattach(bind, year)
+    _known_years.discard(year)
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if not _exists(conn, name):
+            raise LookupError(f"{name} does not exist")
+        _detach(conn, name)
+        conn.execute(text(f"ALTER TABLE {name} RENAME TO {staged}"))
+
+    try:
+        with bind.begin() as conn:
+            cur = conn.connection.driver_connection.cursor()
+            cur.execute(f"LOCK TABLE {staged} IN ACCESS EXCLUSIVE MODE")
+            expected = cur.execute(f"SELECT count(*) FROM {staged}").fetchone()[0]
+            digest = hashlib.sha256()
+            with open(tmp, "wb") as raw_file:
+                with gzip.open(raw_file, "wb") as out:
+                    with cur.copy(f"COPY {staged} ({', '.join(columns)}) TO STDOUT WITH (FORMAT csv, HEADER)") as copy:
+                        for block in copy:
+                            out.write(block)
+                            digest.update(block)
+                raw_file.flush()
+                os.fsync(raw_file.fileno())
+            rows = _count_records(tmp)
+            if rows != expected:
+                raise RuntimeError(f"{name}: table has {expected} rows, the archive has {rows}")
+            os.replace(tmp, data_path)
+            cur.execute(f"DROP TABLE {staged}")
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        try:
+            _reattach(bind, year)
+        except Exception:
+            logger.exception("could not re-attach %s; run archive again to retry", staged)
+        raise
+
+    low, high = _bounds(year)
+    manifest = {
+        "table": name,
+        "parent": PARENT,
+        "from": low.isoformat(),
+        "to": high.isoformat(),
+        "columns": columns,
+        "rows": rows,
+        "sha256": digest.hexdigest(),
+        "archived_at": datetime.now(timezone.utc).isoformat(),
+    }
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def restore_year(year: int, directory: Path, bind=engine) -> dict:
+    # Loads the file into a temporary table, checks it against the manifest,
+    # then inserts through the parent. Rows written for that year since it
+    # was archived win over their archived copies.
+    name = partition_name(year)
+    staged = f"{name}_restoring"
+    data_path, manifest_path = _paths(directory, name)
+    manifest = json.loads(manifest_path.read_text())
+    columns = ", ".join(manifest["columns"])
+
+    with bind.begin() as conn:
+        cur = conn.connection.driver_connection.cursor()
+        cur.execute(f"CREATE TEMPORARY TABLE {staged} (LIKE {PARENT} INCLUDING DEFAULTS) ON COMMIT DROP")
+        digest = hashlib.sha256()
+        with gzip.open(data_path, "rb") as source:
+            with cur.copy(f"COPY {staged} ({columns}) FROM STDIN WITH (FORMAT csv, HEADER)") as copy:
+                while block := source.read(1 << 20):
+                    copy.write(block)
+                    digest.update(block)
+        if digest.hexdigest() != manifest["sha256"]:
+            raise RuntimeError(f"{data_path} does not match its manifest")
+        loaded = cur.execute(f"SELECT count(*) FROM {staged}").fetchone()[0]
+        if loaded != manifest["rows"]:
+            raise RuntimeError(f"{data_path}: loaded {loaded} rows, the manifest says {manifest['rows']}")
+        _create_year(conn, year)
+        inserted = conn.execute(text(
+            f"INSERT INTO {PARENT} ({columns}) SELECT {columns} FROM {staged} ON CONFLICT DO NOTHING"
+        )).rowcount
+        conn.execute(text(
+            f"SELECT setval('{PARENT}_id_seq', GREATEST((SELECT MAX(id) FROM {PARENT}), "
+            f"(SELECT last_value FROM {PARENT}_id_seq)))"
+        ))
+    manifest_path.rename(manifest_path.with_name(f"{manifest_path.name}.restored"))
+    return {"table": name, "rows": inserted, "archived_rows": manifest["rows"]}
+
+
+# -------------------- CLI --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the yearly rent_payments partitions (Postgres).")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="show partitions and approximate row counts")
+    ensure = sub.add_parser("ensure", help="create this year's and upcoming partitions")
+    ensure.add_argument("--ahead", type=int, default=settings.PAYMENT_PARTITIONS_AHEAD)
+    archive = sub.add_parser("archive", help="move whole years before YEAR into compressed files")
+    archive.add_argument("--before", type=int, required=True)
+    archive.add_argument("--dir", type=Path, default=Path(settings.PAYMENT_ARCHIVE_DIR))
+    restore = sub.add_parser("restore", help="load an archived year back")
+    restore.add_argument("year", type=int)
+    restore.add_argument("--dir", type=Path, default=Path(settings.PAYMENT_ARCHIVE_DIR))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if not partitioned():
+        raise SystemExit(f"{engine.dialect.name}: rent_payments is only partitioned on Postgres")
+
+    if args.command == "list":
+        for partition in list_partitions():
+            print(json.dumps(partition))
+    elif args.command == "ensure":
+        print(json.dumps({"created": ensure_partitions(ahead=args.ahead)}))
+    elif args.command == "archive":
+        years = sorted(
+            int(m.group(1)) for p in list_partitions()
+            if (m := YEAR_RE.match(p["name"])) and int(m.group(1)) < args.before
+        )
+        for year in years:
+            print(json.dumps(archive_year(year, args.dir)))
+    elif args.command == "restore":
+        print(json.dumps(restore_year(args.year, args.dir)))
+
+
+if __name__ == "__main__":
+    main()
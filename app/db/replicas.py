@@ -0,0 +1,156 @@
+import itertools
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.session import SessionLocal, _engine_options
+
+
+logger = logging.getLogger("app.db.replicas")
+
+PIN_KEY = "primary_until"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Postgres standby lag: zero when everything received has been replayed,
+# otherwise the age of the last replayed transaction. Non-standbys report 0.
+LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+# -------------------- REPLICA POOL --------------------
+
+class Replica:
+    def __init__(self, url: str):
+        self.engine = create_engine(url, **_engine_options(url))
+        self.SessionLocal = sessionmaker(bind=self.engine, autoflush=False, autocommit=False)
+        self.lag = 0.0
+        self.healthy = True
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def usable(self) -> bool:
+        # Re-measure at most every REPLICA_LAG_CHECK_INTERVAL seconds; one
+        # request pays for the probe, the rest read the cached result.
+        now = time.monotonic()
+        if now - self.checked_at >= settings.REPLICA_LAG_CHECK_INTERVAL and self._lock.acquire(blocking=False):
+            try:
+                self.checked_at = now
+                self.lag = self._measure_lag()
+                self.healthy = True
+            except Exception:
+                self.healthy = False
+                logger.warning("replica %s unreachable", self.engine.url.render_as_string(hide_password=True))
+            finally:
+                self._lock.release()
+        return self.healthy and self.lag <= settings.REPLICA_MAX_LAG_SECONDS
+
+    def _measure_lag(self) -> float:
+        if self.engine.dialect.name != "postgresql":
+            return 0.0
+        with self.engine.connect() as conn:
+            return float(conn.execute(LAG_SQL).scalar() or 0.0)
+
+
+replicas = [Replica(url) for url in settings.replica_urls]
+_next_replica = itertools.count()
+
+
+def pinned_to_primary(request: Request) -> bool:
+    # this user wrote within READ_YOUR_WRITES_SECONDS
+    return request.session.get(PIN_KEY, 0) > time.time()
+
+
+def pick_sessionmaker(request: Request):
+    if not replicas:
+        return SessionLocal
+    if pinned_to_primary(request):
+        return SessionLocal  # read-your-writes
+    start = next(_next_replica)
+    for offset in range(len(replicas)):
+        replica = replicas[(start + offset) % len(replicas)]
+        if replica.usable():
+            return replica.SessionLocal
+    return SessionLocal
+
+
+def get_read_db(request: Request):
+    # Session for read-only GET handlers: a healthy replica unless this user
+    # wrote recently or every replica is lagging, then the primary.
+    db = pick_sessionmaker(request)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# -------------------- READ-YOUR-WRITES --------------------
+# A request that commits a write on the primary pins the user's session to
+# the primary for READ_YOUR_WRITES_SECONDS, so the redirect that follows sees
+# the change. Unsafe requests that write nothing (a failed login, a form that
+# fails validation) leave the session alone.
+
+_wrote: ContextVar[list | None] = ContextVar("wrote_to_primary", default=None)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _flushed(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _executed(state):
+    # bulk UPDATE / DELETE / INSERT ... ON CONFLICT skip the flush
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _committed(session):
+    flag = _wrote.get()
+    if session.info.pop("wrote", False) and flag is not None:
+        flag[0] = True
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _rolled_back(session):
+    session.info.pop("wrote", None)
+
+
+class ReadYourWritesMiddleware:
+    # Must sit inside the session middleware: the pin is added when the
+    # response starts, before the session is saved.
+
+    def __init__(self, app, window: float = settings.READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        wrote = [False]
+        token = _wrote.set(wrote)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and wrote[0]:
+                scope["session"][PIN_KEY] = time.time() + self.window
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _wrote.reset(token)
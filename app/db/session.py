@@ -8,11 +8,18 @@ class Base(DeclarativeBase):
     pass
 
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=True,      # set False in production
-    future=True
-)
+def _engine_options(url: str) -> dict:
+    options = {"echo": settings.DB_ECHO, "future": True, "pool_pre_ping": True}
+    if not url.startswith("sqlite"):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    return options
+
+
+engine = create_engine(settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL))
 
 SessionLocal = sessionmaker(
     bind=engine,
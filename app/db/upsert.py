@@ -0,0 +1,176 @@
+from datetime import date
+
+from sqlalchemy import literal, literal_column, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.db import partitions
+from app.models.property import PaymentStatus, Property, RentPayment
+from app.models.search import SavedSearch, SearchAlert
+from app.models.user import User, UserRole
+
+
+# -------------------- DIALECT INSERT --------------------
+# INSERT ... ON CONFLICT is spelled the same on Postgres and SQLite (3.24+,
+# RETURNING needs 3.35+); each dialect has its own insert() construct. Other
+# backends get None and the helpers below fall back to select-then-insert.
+
+ON_CONFLICT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def dialect_insert(db: Session, model):
+    insert = ON_CONFLICT_INSERTS.get(db.get_bind().dialect.name)
+    return insert(model) if insert is not None else None
+
+
+def _find_or_insert(db: Session, find, create):
+    # Select-then-insert for backends without ON CONFLICT. The insert runs in
+    # a savepoint: when a concurrent request wins the unique key, the row it
+    # wrote is read back instead. Returns (row, created).
+    row = find()
+    if row is not None:
+        return row, False
+    try:
+        with db.begin_nested():
+            row = create()
+            db.add(row)
+    except IntegrityError:
+        row = find()
+        if row is None:
+            raise   # not a duplicate (e.g. a foreign key)
+        return row, False
+    return row, True
+
+
+# -------------------- PAYMENTS --------------------
+
+def _payment_names():
+    # tenant name and property title for the live payment event, read back
+    # by the write itself instead of a second SELECT. Spelled out because
+    # SQLAlchemy does not correlate subqueries inside RETURNING.
+    payments, users, properties = RentPayment.__tablename__, User.__tablename__, Property.__tablename__
+    return (
+        literal_column(
+            f"(SELECT {users}.full_name FROM {users} WHERE {users}.id = {payments}.tenant_id)"
+        ).label("tenant_name"),
+        literal_column(
+            f"(SELECT {properties}.title FROM {properties} WHERE {properties}.id = {payments}.property_id)"
+        ).label("property_title"),
+    )
+
+
+def upsert_payment(db: Session, property_id: int, tenant_id: int, month: date,
+                   amount, status: PaymentStatus):
+    # One statement whether the row exists or not; concurrent submissions
+    # for the same month converge on a single row (last write wins).
+    # Returns a row of (id, tenant_name, property_title).
+    partitions.ensure_year(month.year, db.get_bind())
+    stmt = dialect_insert(db, RentPayment)
+    if stmt is None:
+        return _upsert_payment_fallback(db, property_id, tenant_id, month, amount, status)
+
+    stmt = stmt.values(
+        property_id=property_id,
+        tenant_id=tenant_id,
+        month=month,
+        amount=amount,
+        status=status,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["property_id", "tenant_id", "month"],
+        set_={
+            "amount": stmt.excluded.amount,
+            "status": stmt.excluded.status,
+            "updated_at": func.now(),
+        },
+    ).returning(RentPayment.id, *_payment_names())
+    return db.execute(stmt).one()
+
+
+def _upsert_payment_fallback(db, property_id, tenant_id, month, amount, status):
+    payment, created = _find_or_insert(
+        db,
+        lambda: db.query(RentPayment).filter(
+            RentPayment.property_id == property_id,
+            RentPayment.tenant_id == tenant_id,
+            RentPayment.month == month,
+        ).first(),
+        lambda: RentPayment(
+            property_id=property_id, tenant_id=tenant_id, month=month, amount=amount, status=status
+        ),
+    )
+    if not created:
+        payment.amount = amount
+        payment.status = status
+    db.flush()
+    return db.execute(
+        select(RentPayment.id, *_payment_names()).where(RentPayment.id == payment.id)
+    ).one()
+
+
+# -------------------- USERS --------------------
+
+def insert_user_if_absent(db: Session, full_name: str, email: str, phone: str,
+                          hashed_password: str, role: UserRole) -> int | None:
+    # Returns the new id, or None when the email is already registered.
+    stmt = dialect_insert(db, User)
+    if stmt is None:
+        user, created = _find_or_insert(
+            db,
+            lambda: db.query(User).filter(User.email == email).first(),
+            lambda: User(
+                full_name=full_name, email=email, phone=phone, hashed_password=hashed_password, role=role
+            ),
+        )
+        return user.id if created else None
+
+    stmt = (
+        stmt.values(
+            full_name=full_name,
+            email=email,
+            phone=phone,
+            hashed_password=hashed_password,
+            role=role,
+        )
+        .on_conflict_do_nothing(index_elements=["email"])
+        .returning(User.id)
+    )
+    return db.execute(stmt).scalar_one_or_none()
+
+
+# -------------------- SEARCH ALERTS --------------------
+
+def insert_alerts(db: Session, property_id: int, search_ids: list[int]) -> set[int]:
+    # One alert per (saved search, listing); searches deleted in the meantime
+    # are skipped. Returns the tenant ids that got a new alert.
+    stmt = dialect_insert(db, SearchAlert)
+    if stmt is None:
+        tenants = set()
+        for search_id, tenant_id in db.execute(
+            select(SavedSearch.id, SavedSearch.tenant_id).where(SavedSearch.id.in_(search_ids))
+        ):
+            _, created = _find_or_insert(
+                db,
+                lambda: db.query(SearchAlert).filter(
+                    SearchAlert.saved_search_id == search_id, SearchAlert.property_id == property_id
+                ).first(),
+                lambda: SearchAlert(saved_search_id=search_id, tenant_id=tenant_id, property_id=property_id),
+            )
+            if created:
+                tenants.add(tenant_id)
+        return tenants
+
+    stmt = (
+        stmt.from_select(
+            ["saved_search_id", "tenant_id", "property_id"],
+            select(SavedSearch.id, SavedSearch.tenant_id, literal(property_id)).where(SavedSearch.id.in_(search_ids)),
+        )
+        .on_conflict_do_nothing(index_elements=["saved_search_id", "property_id"])
+        .returning(SearchAlert.tenant_id)
+    )
+    return set(db.scalars(stmt))
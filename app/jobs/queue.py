@@ -0,0 +1,240 @@
+import random
+from dataclasses import dataclass
+from datetime import timedelta
+
+from sqlalchemy import event, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.job import Job, JobStatus, utcnow
+
+
+# -------------------- CLAIMED JOB --------------------
+
+@dataclass
+class ClaimedJob:
+    id: int
+    task: str
+    payload: dict
+    attempts: int
+    max_attempts: int
+    lag: float  # seconds between run_at and the claim
+    worker_id: str
+
+
+# -------------------- ENQUEUE --------------------
+
+def enqueue(
+    db: Session,
+    task: str,
+    payload: dict | None = None,
+    queue: str = "default",
+    delay: float = 0,
+    max_attempts: int | None = None,
+):
+    # Adds the job to the caller's transaction; it becomes visible to workers
+    # when the caller commits, together with the change that caused it.
+    payload = payload or {}
+
+    if settings.JOBS_EAGER:
+        _defer(db, task, payload)
+        return None
+
+    job = Job(
+        queue=queue,
+        task=task,
+        payload=payload,
+        run_at=utcnow() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+    db.add(job)
+    return job
+
+
+# JOBS_EAGER still waits for the caller's commit, so a job never sees (or
+# outlives) a write that rolls back. The tasks run in their own session: the
+# caller's has just finished its transaction.
+
+def _defer(db: Session, task: str, payload: dict):
+    pending = db.info.get("eager_jobs")
+    if pending is None:
+        pending = db.info["eager_jobs"] = []
+        event.listen(db, "after_commit", _run_deferred)
+        event.listen(db, "after_soft_rollback", _drop_deferred)
+    if not db.in_transaction():
+        db.begin()   # so a rollback() before any SQL still drops the job
+    pending.append((task, payload))
+
+
+def _run_deferred(db: Session):
+    from app.db.session import SessionLocal
+    from app.jobs.tasks import run_task
+
+    pending, db.info["eager_jobs"] = db.info["eager_jobs"], []
+    for task, payload in pending:
+        with SessionLocal() as job_db:
+            run_task(job_db, task, payload)
+
+
+def _drop_deferred(db: Session, previous_transaction):
+    db.info["eager_jobs"].clear()
+
+
+# -------------------- CLAIM --------------------
+
+def claim_batch(db: Session, worker_id: str, queue: str = "default", limit: int = 10) -> list[ClaimedJob]:
+    # Postgres: FOR UPDATE SKIP LOCKED lets concurrent workers take disjoint
+    # batches without blocking each other. SQLite ignores the locking clause
+    # and serialises writers; the status guard on the UPDATE keeps a job from
+    # being claimed twice either way.
+    now = utcnow()
+    candidates = db.scalars(
+        select(Job.id)
+        .where(Job.queue == queue, Job.status == JobStatus.QUEUED, Job.run_at <= now)
+        .order_by(Job.run_at, Job.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not candidates:
+        db.rollback()
+        return []
+
+    rows = db.execute(
+        update(Job)
+        .where(Job.id.in_(candidates), Job.status == JobStatus.QUEUED)
+        .values(
+            status=JobStatus.RUNNING,
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=Job.attempts + 1,
+        )
+        .returning(Job.id, Job.task, Job.payload, Job.attempts, Job.max_attempts, Job.run_at)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+
+    claimed = []
+    for job_id, task, payload, attempts, max_attempts, run_at in rows:
+        if run_at.tzinfo is None:
+            run_at = run_at.replace(tzinfo=now.tzinfo)
+        claimed.append(
+            ClaimedJob(
+                job_id, task, payload or {}, attempts, max_attempts,
+                max((now - run_at).total_seconds(), 0.0), worker_id,
+            )
+        )
+    return claimed
+
+
+# -------------------- OUTCOMES --------------------
+# Outcomes only apply while the job is still ours: a worker that stalled past
+# the visibility timeout may find its job requeued and claimed by another
+# worker, and must not overwrite that claim. Both return None in that case.
+
+def _still_claimed(job: ClaimedJob):
+    return (Job.id == job.id, Job.status == JobStatus.RUNNING, Job.locked_by == job.worker_id)
+
+
+def complete(db: Session, job: ClaimedJob) -> JobStatus | None:
+    result = db.execute(
+        update(Job)
+        .where(*_still_claimed(job))
+        .values(status=JobStatus.DONE, finished_at=utcnow(), locked_by=None, last_error=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return JobStatus.DONE if result.rowcount else None
+
+
+def backoff_seconds(attempts: int) -> float:
+    delay = min(settings.JOBS_BACKOFF_BASE * 2 ** max(attempts - 1, 0), settings.JOBS_BACKOFF_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def fail(db: Session, job: ClaimedJob, error: str) -> JobStatus | None:
+    # Retry with exponential back-off, or park in the dead-letter state once
+    # max_attempts is used up.
+    if job.attempts >= job.max_attempts:
+        values = {"status": JobStatus.DEAD, "finished_at": utcnow()}
+    else:
+        values = {
+            "status": JobStatus.QUEUED,
+            "run_at": utcnow() + timedelta(seconds=backoff_seconds(job.attempts)),
+        }
+    result = db.execute(
+        update(Job)
+        .where(*_still_claimed(job))
+        .values(locked_by=None, last_error=error[:4000], **values)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return values["status"] if result.rowcount else None
+
+
+STALE_ERROR = "worker lost: no outcome within the visibility timeout"
+
+
+def requeue_stale(db: Session, timeout: int = settings.JOBS_VISIBILITY_TIMEOUT) -> tuple[int, int]:
+    # Jobs left RUNNING by a worker that died. The claim already counted the
+    # attempt, so a job that keeps killing its worker is dead-lettered once
+    # max_attempts is used up instead of cycling forever. Returns
+    # (requeued, dead).
+    now = utcnow()
+    stale = (Job.status == JobStatus.RUNNING, Job.locked_at < now - timedelta(seconds=timeout))
+    dead = db.execute(
+        update(Job)
+        .where(*stale, Job.attempts >= Job.max_attempts)
+        .values(status=JobStatus.DEAD, finished_at=now, locked_by=None, last_error=STALE_ERROR)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    requeued = db.execute(
+        update(Job)
+        .where(*stale)
+        .values(status=JobStatus.QUEUED, run_at=now, locked_by=None, last_error=STALE_ERROR)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return requeued, dead
+
+
+def retry_dead(db: Session, queue: str = "default") -> int:
+    result = db.execute(
+        update(Job)
+        .where(Job.queue == queue, Job.status == JobStatus.DEAD)
+        .values(status=JobStatus.QUEUED, attempts=0, run_at=utcnow(), finished_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def purge_done(db: Session, older_than: timedelta = timedelta(days=1)) -> int:
+    result = db.execute(
+        Job.__table__.delete().where(Job.status == JobStatus.DONE, Job.finished_at < utcnow() - older_than)
+    )
+    db.commit()
+    return result.rowcount
+
+
+# -------------------- METRICS --------------------
+
+def queue_stats(db: Session, queue: str = "default") -> dict:
+    counts = dict(
+        db.execute(
+            select(Job.status, func.count()).where(Job.queue == queue).group_by(Job.status)
+        ).all()
+    )
+    oldest = db.scalar(
+        select(func.min(Job.run_at)).where(
+            Job.queue == queue, Job.status == JobStatus.QUEUED, Job.run_at <= utcnow()
+        )
+    )
+    lag = 0.0
+    if oldest is not None:
+        now = utcnow()
+        lag = max((now - (oldest if oldest.tzinfo else oldest.replace(tzinfo=now.tzinfo))).total_seconds(), 0.0)
+    return {
+        "queue": queue,
+        **{status.value: counts.get(status, 0) for status in JobStatus},
+        "lag_seconds": round(lag, 3),
+    }
@@ -0,0 +1,107 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.upsert import insert_alerts
+from app.models.property import AvailabilityStatus, Property, RentPayment
+from app.models.search import SavedSearch, SearchAlert
+from app.models.user import User
+from app.services import static_pages
+from app.services.pubsub import publish_alert
+from app.services.recommendations import recommender
+from app.services.search_index import search_index
+
+
+TASKS = {}
+
+
+# -------------------- REGISTRY --------------------
+
+def task(name: str):
+    def register(fn):
+        TASKS[name] = fn
+        return fn
+    return register
+
+
+def run_task(db: Session, name: str, payload: dict):
+    try:
+        fn = TASKS[name]
+    except KeyError:
+        raise LookupError(f"Unknown job task: {name}") from None
+    fn(db, **payload)
+
+
+# -------------------- TASKS --------------------
+
+# The cascades are done as bulk DELETEs instead of letting the ORM load every
+# child row first. The admin routes run them inside the request and commit.
+
+def delete_property_rows(db: Session, property_id: int):
+    db.query(SearchAlert).filter(SearchAlert.property_id == property_id).delete(synchronize_session=False)
+    db.query(RentPayment).filter(RentPayment.property_id == property_id).delete(synchronize_session=False)
+    db.query(Property).filter(Property.id == property_id).delete(synchronize_session=False)
+
+
+def delete_user_rows(db: Session, user_id: int):
+    owned = select(Property.id).where(Property.owner_id == user_id)
+    db.query(SearchAlert).filter(
+        (SearchAlert.property_id.in_(owned)) | (SearchAlert.tenant_id == user_id)
+    ).delete(synchronize_session=False)
+    db.query(SavedSearch).filter(SavedSearch.tenant_id == user_id).delete(synchronize_session=False)
+    db.query(RentPayment).filter(
+        (RentPayment.property_id.in_(owned)) | (RentPayment.tenant_id == user_id)
+    ).delete(synchronize_session=False)
+    db.query(Property).filter(Property.owner_id == user_id).delete(synchronize_session=False)
+    db.query(User).filter(User.id == user_id).delete(synchronize_session=False)
+
+
+# Enqueued when a listing is created available or becomes available again.
+# The reverse index narrows millions of saved searches down to the ones the
+# listing satisfies; the INSERT ... SELECT drops searches deleted since the
+# index was built, and the unique key keeps each alert to one row.
+
+ALERT_CHUNK = 500
+
+
+@task("match_saved_searches")
+def match_saved_searches(db: Session, property_id: int):
+    prop = db.get(Property, property_id)
+    if not prop or prop.availability_status != AvailabilityStatus.AVAILABLE:
+        return
+
+    search_index.refresh(db)
+    matched = search_index.match(prop)
+
+    tenants = set()
+    for start in range(0, len(matched), ALERT_CHUNK):
+        tenants.update(insert_alerts(db, prop.id, matched[start:start + ALERT_CHUNK]))
+    db.commit()
+
+    alert = {
+        "property_id": prop.id,
+        "title": prop.title,
+        "location": prop.location,
+        "rent_amount": prop.rent_amount,
+    }
+    for tenant_id in tenants:
+        publish_alert(tenant_id, alert)
+
+
+# Enqueued with every listing write while STATIC_PAGES_ENABLED is on, so the
+# owner's request never waits for the render. The worker keeps its own
+# recommender index: built on the first render, then refreshed in the
+# background like the web workers'.
+
+@task("render_property_page")
+def render_property_page(db: Session, property_id: int):
+    prop = db.get(Property, property_id)
+    if not prop:
+        static_pages.remove(property_id)
+        return
+
+    if recommender.ready:
+        recommender.maybe_refresh()
+    else:
+        recommender.rebuild()
+    recommender.upsert(prop)
+    static_pages.publish(db, prop)
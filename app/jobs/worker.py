@@ -0,0 +1,199 @@
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+
+from app.core.config import settings
+from app.db import partitions
+from app.db.session import SessionLocal
+from app.jobs import queue as jobs
+from app.jobs.tasks import run_task
+from app.models.job import JobStatus
+
+
+logger = logging.getLogger("app.jobs.worker")
+
+
+# -------------------- METRICS --------------------
+
+class WorkerMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.processed = 0
+        self.failed = 0
+        self.dead = 0
+        self._window_start = self.started
+        self._window_done = 0
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+        self._lag_count = 0
+
+    def record(self, lag: float, status: JobStatus | None):
+        with self._lock:
+            if status is None:
+                self.processed += 1
+                self._window_done += 1
+            elif status == JobStatus.DEAD:
+                self.dead += 1
+            else:
+                self.failed += 1
+            self._lag_total += lag
+            self._lag_count += 1
+            self._lag_max = max(self._lag_max, lag)
+
+    def snapshot(self) -> dict:
+        # Throughput and lag since the previous snapshot, totals since start.
+        with self._lock:
+            now = time.monotonic()
+            window = max(now - self._window_start, 1e-9)
+            data = {
+                "processed": self.processed,
+                "failed": self.failed,
+                "dead": self.dead,
+                "jobs_per_sec": round(self._window_done / window, 2),
+                "lag_avg_ms": round(self._lag_total / self._lag_count * 1000, 1) if self._lag_count else 0.0,
+                "lag_max_ms": round(self._lag_max * 1000, 1),
+                "uptime_s": round(now - self.started, 1),
+            }
+            self._window_start = now
+            self._window_done = 0
+            self._lag_total = self._lag_max = 0.0
+            self._lag_count = 0
+            return data
+
+
+# -------------------- CONSUMER --------------------
+
+def consume(worker_id: str, queue: str, batch_size: int, poll_interval: float,
+            stop: threading.Event, metrics: WorkerMetrics):
+    db = SessionLocal()
+    try:
+        while not stop.is_set():
+            try:
+                batch = jobs.claim_batch(db, worker_id, queue, batch_size)
+            except Exception:
+                db.rollback()
+                logger.exception("claim failed")
+                stop.wait(poll_interval)
+                continue
+
+            if not batch:
+                stop.wait(poll_interval)
+                continue
+
+            # Finish the whole claimed batch even when asked to stop, so no
+            # job is left RUNNING until the visibility timeout.
+            for job in batch:
+                try:
+                    run_task(db, job.task, job.payload)
+                    if jobs.complete(db, job) is None:
+                        logger.warning("job %s (%s) finished after its claim expired", job.id, job.task)
+                    metrics.record(job.lag, None)
+                except Exception as exc:
+                    db.rollback()
+                    error = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+                    status = jobs.fail(db, job, error)
+                    if status is None:
+                        logger.warning("job %s (%s) failed after its claim expired: %s", job.id, job.task, error)
+                        continue
+                    metrics.record(job.lag, status)
+                    logger.warning("job %s (%s) failed -> %s: %s", job.id, job.task, status.value, error)
+    finally:
+        db.close()
+
+
+PARTITION_CHECK_SECONDS = 3600
+
+
+def maintenance(queue: str, interval: float, stop: threading.Event, metrics: WorkerMetrics):
+    # Requeue jobs orphaned by dead workers and print throughput / lag; also
+    # keeps upcoming rent_payments partitions in place (Postgres).
+    checked_partitions = 0.0
+    while not stop.wait(interval):
+        if time.monotonic() - checked_partitions > PARTITION_CHECK_SECONDS:
+            checked_partitions = time.monotonic()
+            try:
+                for name in partitions.ensure_partitions():
+                    print(json.dumps({"partition_created": name}), flush=True)
+            except Exception:
+                logger.exception("partition check failed")
+        with SessionLocal() as db:
+            try:
+                requeued, dead = jobs.requeue_stale(db)
+                stats = jobs.queue_stats(db, queue)
+            except Exception:
+                logger.exception("maintenance failed")
+                continue
+        line = {**metrics.snapshot(), "backlog": stats["queued"], "queue_lag_s": stats["lag_seconds"]}
+        if requeued:
+            line["requeued"] = requeued
+        if dead:
+            line["dead_lettered"] = dead
+        print(json.dumps(line), flush=True)
+
+
+# -------------------- CLI --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background job consumers.")
+    parser.add_argument("--queue", default="default")
+    parser.add_argument("--concurrency", type=int, default=4, help="number of consumer threads")
+    parser.add_argument("--batch-size", type=int, default=10, help="jobs claimed per round trip")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--stats-interval", type=float, default=10.0)
+    parser.add_argument("--stats", action="store_true", help="print queue stats and exit")
+    parser.add_argument("--retry-dead", action="store_true", help="requeue dead-lettered jobs and exit")
+    parser.add_argument("--purge-done", action="store_true", help="delete finished jobs older than a day and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if args.stats or args.retry_dead or args.purge_done:
+        with SessionLocal() as db:
+            if args.retry_dead:
+                print(f"Requeued {jobs.retry_dead(db, args.queue)} dead jobs")
+            if args.purge_done:
+                print(f"Purged {jobs.purge_done(db)} finished jobs")
+            print(json.dumps(jobs.queue_stats(db, args.queue)))
+        return
+
+    if settings.PUBSUB_BACKEND != "postgres":
+        logger.warning("PUBSUB_BACKEND=%s: live alerts sent by jobs will not reach the web workers",
+                       settings.PUBSUB_BACKEND)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    metrics = WorkerMetrics()
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    threads = [
+        threading.Thread(
+            target=consume,
+            args=(f"{prefix}:{n}", args.queue, args.batch_size, args.poll_interval, stop, metrics),
+            name=f"consumer-{n}",
+        )
+        for n in range(args.concurrency)
+    ]
+    threads.append(
+        threading.Thread(target=maintenance, args=(args.queue, args.stats_interval, stop, metrics), daemon=True)
+    )
+    for thread in threads:
+        thread.start()
+
+    print(f"Worker {prefix} consuming '{args.queue}' with {args.concurrency} consumers", flush=True)
+    while not stop.is_set():
+        stop.wait(0.5)
+    for thread in threads[:-1]:
+        thread.join()
+    print(json.dumps(metrics.snapshot()), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,29 @@
+import asyncio
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from starlette.middleware.sessions import SessionMiddleware
 from pathlib import Path
 
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
-from app.routers import auth, pages, owners, tenants, admin
+from app.core import metrics
+from app.core.lifespan import lifespan, on_shutdown, on_startup, warm_db_pool, warm_templates
+from app.core.profiling import ProfilingMiddleware, route_sampler
+from app.core.sessions import LeanSessionMiddleware, session_store
+from app.db.replicas import ReadYourWritesMiddleware, replicas
+from app.db.session import engine
+from app.routers import auth, pages, owners, tenants, admin, events
+from app.services.autocomplete import locations
+from app.services.listing_snapshot import listing_snapshot
+from app.services.pubsub import broker
+from app.services.recommendations import recommender
 
 
 # -------------------- APP INIT --------------------
 
-app = FastAPI(title="House Rent Service System")
+app = FastAPI(title="House Rent Service System", lifespan=lifespan)
 
 
 # -------------------- BASE DIR --------------------
@@ -20,15 +33,34 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 # -------------------- SESSION MIDDLEWARE --------------------
 
+# added first so they run inside the session middleware; the listing
+# snapshot lags writes too, so it uses the same pin
+if replicas or settings.LISTING_SNAPSHOT_DIR:
+    app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(ProfilingMiddleware)
+
 app.add_middleware(
-    SessionMiddleware,
+    LeanSessionMiddleware,
     secret_key=settings.SECRET_KEY,
     session_cookie=settings.SESSION_COOKIE_NAME,
+    max_age=settings.SESSION_MAX_AGE,
     same_site="lax",
     https_only=False,   # ✅ True only when using HTTPS
+    store=session_store,
 )
 
 
+# -------------------- COMPRESSION MIDDLEWARE --------------------
+
+app.add_middleware(CompressionMiddleware)
+
+
+# -------------------- METRICS MIDDLEWARE --------------------
+
+# added last so it is outermost and times the whole stack
+app.add_middleware(metrics.MetricsMiddleware, router=app.router)
+
+
 # -------------------- STATIC & TEMPLATES --------------------
 
 static_dir = BASE_DIR / "static"
@@ -38,6 +70,91 @@ app.mount("/static", StaticFiles(directory=static_dir), name="static")
 templates = Jinja2Templates(directory=templates_dir)
 
 
+# -------------------- WARMUP --------------------
+
+@on_startup
+def prime_templates():
+    warm_templates(templates)
+
+
+@on_startup
+def prime_db_pool():
+    warm_db_pool(engine)
+
+
+@on_startup(required=False)
+def prime_replica_pools():
+    # a replica that is down at boot is skipped per request until it recovers
+    for replica in replicas:
+        warm_db_pool(replica.engine)
+
+
+@on_startup
+def build_recommendation_index():
+    # loads in a background thread; detail pages skip suggestions until ready
+    recommender.start_background_rebuild()
+
+
+@on_startup
+def build_location_index():
+    locations.maybe_rebuild()
+
+
+@on_startup
+def start_listing_snapshot():
+    # one worker refreshes the shared snapshot; the others map it
+    listing_snapshot.start()
+
+
+@on_shutdown
+def stop_listing_snapshot():
+    listing_snapshot.stop()
+
+
+@on_startup
+def purge_expired_sessions():
+    if session_store is not None:
+        session_store.purge_expired()
+
+
+@on_startup
+async def start_event_broker():
+    await broker.start()
+
+
+@on_shutdown
+async def stop_event_broker():
+    await broker.stop()
+
+
+_metrics_flusher = None
+
+
+@on_startup
+async def start_metrics_flusher():
+    global _metrics_flusher
+    if settings.METRICS_MULTIPROC_DIR:
+        _metrics_flusher = asyncio.create_task(metrics.flush_periodically())
+
+
+@on_shutdown
+async def stop_metrics_flusher():
+    if _metrics_flusher is not None:
+        _metrics_flusher.cancel()
+        metrics.flush()
+
+
+@on_startup
+def start_route_sampler():
+    # no-op unless PROFILE_CONTINUOUS_HZ > 0
+    route_sampler.start()
+
+
+@on_shutdown
+def stop_route_sampler():
+    route_sampler.stop()
+
+
 # -------------------- ROUTERS --------------------
 
 app.include_router(auth.router)
@@ -45,6 +162,7 @@ app.include_router(pages.router)
 app.include_router(owners.router, prefix="/owner", tags=["owner"])
 app.include_router(tenants.router, prefix="/tenant", tags=["tenant"])
 app.include_router(admin.router, prefix="/admin", tags=["admin"])
+app.include_router(events.router, prefix="/events", tags=["events"])
 
 
 # -------------------- HEALTH CHECK --------------------
@@ -52,3 +170,13 @@ app.include_router(admin.router, prefix="/admin", tags=["admin"])
 @app.get("/health", tags=["health"])
 async def health_check():
     return {"status": "ok"}
+
+
+# -------------------- METRICS --------------------
+
+@app.get("/metrics", tags=["health"], include_in_schema=False)
+async def metrics_endpoint():
+    return PlainTextResponse(
+        metrics.render(metrics.collect()),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -0,0 +1,55 @@
+import enum
+from datetime import datetime, timezone
+
+from sqlalchemy import JSON, Column, DateTime, Enum, Index, Integer, String, Text
+
+from app.db.session import Base
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# -------------------- ENUM --------------------
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    DEAD = "dead"
+
+
+# -------------------- JOB MODEL --------------------
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    queue = Column(String(50), nullable=False, default="default")
+    task = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+
+    status = Column(
+        Enum(JobStatus, name="job_status_enum"),
+        nullable=False,
+        default=JobStatus.QUEUED,
+    )
+
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    last_error = Column(Text, nullable=True)
+
+    # earliest time the job may run (pushed forward on retry)
+    run_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+
+    locked_by = Column(String(100), nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+
+    __table_args__ = (
+        # the claim query: WHERE queue = ? AND status = 'queued' AND run_at <= now ORDER BY run_at
+        Index("ix_jobs_claim", "queue", "status", "run_at"),
+    )
@@ -9,6 +9,7 @@ from sqlalchemy import (
     ForeignKey,
     DateTime,
     Date,
+    UniqueConstraint,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -66,17 +67,23 @@ class Property(Base):
 
     main_image_path = Column(String(255), nullable=True)
 
+    # optimistic concurrency: bumped on every ORM update, which then only
+    # matches the row version it was loaded with
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
     created_at = Column(
         DateTime(timezone=True),
         server_default=func.now(),
         nullable=False,
     )
 
+    # indexed: the listing snapshot and the recommender refresh by it
     updated_at = Column(
         DateTime(timezone=True),
         server_default=func.now(),
         onupdate=func.now(),
         nullable=False,
+        index=True,
     )
 
     # Relationships
@@ -87,11 +94,17 @@ class Property(Base):
         cascade="all, delete-orphan",
     )
 
+    __mapper_args__ = {"version_id_col": version}
+
 
 # -------------------- RENT PAYMENT MODEL --------------------
 
 class RentPayment(Base):
     __tablename__ = "rent_payments"
+    __table_args__ = (
+        # one row per tenant per property per month; the upsert's conflict target
+        UniqueConstraint("property_id", "tenant_id", "month", name="uq_rent_payments_property_tenant_month"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
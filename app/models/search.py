@@ -0,0 +1,90 @@
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Integer,
+    Numeric,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.session import Base
+from app.models.property import PropertyType
+
+
+# -------------------- SAVED SEARCH MODEL --------------------
+
+class SavedSearch(Base):
+    # The pages.home filters a tenant wants to be alerted about. Every
+    # field is optional, with the same meaning as on the home page.
+    __tablename__ = "saved_searches"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    tenant_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+
+    location = Column(String(255), nullable=True)
+    min_rent = Column(Numeric(10, 2), nullable=True)
+    max_rent = Column(Numeric(10, 2), nullable=True)
+    property_type = Column(Enum(PropertyType, name="property_type_enum"), nullable=True)
+
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+    # Relationships
+    tenant = relationship("User")
+
+
+# -------------------- SEARCH ALERT MODEL --------------------
+
+class SearchAlert(Base):
+    __tablename__ = "search_alerts"
+    __table_args__ = (
+        # a listing that is re-saved or flips back to available alerts once
+        UniqueConstraint("saved_search_id", "property_id", name="uq_search_alerts_search_property"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    saved_search_id = Column(
+        Integer,
+        ForeignKey("saved_searches.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    tenant_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+
+    property_id = Column(
+        Integer,
+        ForeignKey("properties.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    seen = Column(Boolean, nullable=False, default=False, server_default="0")
+
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+    # Relationships
+    saved_search = relationship("SavedSearch")
+    property = relationship("Property")
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+
+from app.db.session import Base
+
+
+# -------------------- SERVER-SIDE SESSION MODEL --------------------
+
+class UserSession(Base):
+    __tablename__ = "user_sessions"
+
+    id = Column(String(32), primary_key=True)
+
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
+
+    # JSON-encoded session dict
+    data = Column(Text, nullable=False)
+
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -1,11 +1,20 @@
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from pathlib import Path
 
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import FileResponse, PlainTextResponse, RedirectResponse
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
+from app.core.profiling import route_sampler, saved_profiles
+from app.core.rendering import stream_template
+from app.core.sessions import revoke_user_sessions
+from app.db.replicas import get_read_db
 from app.db.session import get_db
+from app.jobs.tasks import delete_property_rows, delete_user_rows
 from app.models.property import Property
 from app.models.user import User, UserRole
 from app.routers.auth import get_current_user
+from app.services import listing_hooks
 
 
 router = APIRouter()
@@ -28,7 +37,7 @@ async def admin_dashboard(
     user_q: str | None = None,
     user_role: str | None = None,
     property_location: str | None = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     from app.main import templates
 
@@ -55,7 +64,8 @@ async def admin_dashboard(
     users = users_query.all()
 
     # ---- PROPERTIES FILTER ----
-    properties_query = db.query(Property)
+    # owner is eager-loaded: the page renders after the session is closed
+    properties_query = db.query(Property).options(joinedload(Property.owner))
 
     if property_location:
         properties_query = properties_query.filter(
@@ -64,7 +74,8 @@ async def admin_dashboard(
 
     properties = properties_query.all()
 
-    return templates.TemplateResponse(
+    return stream_template(
+        templates,
         "admin/dashboard.html",
         {
             "request": request,
@@ -89,8 +100,11 @@ async def remove_property(
 
     prop = db.query(Property).filter(Property.id == property_id).first()
     if prop:
-        db.delete(prop)
+        # bulk DELETEs, so a long payment history is not loaded row by row
+        previous = listing_hooks.snapshot(prop)
+        delete_property_rows(db, prop.id)
         db.commit()
+        listing_hooks.property_removed(previous)
 
     return RedirectResponse("/admin/dashboard", status_code=303)
 
@@ -111,7 +125,65 @@ async def remove_user(
 
     # ❗ SAFETY: do not allow deleting admin users
     if user and user.role != UserRole.ADMIN:
-        db.delete(user)
+        removed = [
+            listing_hooks.snapshot(prop)
+            for prop in db.query(Property).filter(Property.owner_id == user.id)
+        ]
+        delete_user_rows(db, user.id)
         db.commit()
+        revoke_user_sessions(user_id)
+        for previous in removed:
+            listing_hooks.property_removed(previous)
 
     return RedirectResponse("/admin/dashboard", status_code=303)
+
+
+# -------------------- PROFILING --------------------
+
+@router.get("/profiles")
+async def profiles(request: Request, db: Session = Depends(get_read_db)):
+    from app.main import templates
+
+    admin = require_admin(request, db)
+    if not admin:
+        return RedirectResponse("/login", status_code=303)
+
+    return templates.TemplateResponse(
+        "admin/profiles.html",
+        {
+            "request": request,
+            "admin": admin,
+            "sampler": route_sampler,
+            "routes": route_sampler.report(),
+            "saved": saved_profiles(),
+        },
+    )
+
+
+@router.get("/profiles/continuous.folded")
+async def continuous_profile(request: Request, db: Session = Depends(get_read_db)):
+    if not require_admin(request, db):
+        return RedirectResponse("/login", status_code=303)
+    return PlainTextResponse(
+        route_sampler.folded(),
+        headers={"Content-Disposition": 'attachment; filename="continuous.folded"'},
+    )
+
+
+@router.post("/profiles/reset")
+async def reset_profiles(request: Request, db: Session = Depends(get_db)):
+    if require_admin(request, db):
+        route_sampler.reset()
+    return RedirectResponse("/admin/profiles", status_code=303)
+
+
+@router.get("/profiles/{name}")
+async def download_profile(name: str, request: Request, db: Session = Depends(get_read_db)):
+    if not require_admin(request, db):
+        return RedirectResponse("/login", status_code=303)
+
+    directory = Path(settings.PROFILE_DIR).resolve()
+    path = (directory / name).resolve()
+    if path.parent != directory or path.suffix != ".folded" or not path.is_file():
+        return RedirectResponse("/admin/profiles", status_code=303)
+    return FileResponse(path, media_type="text/plain", filename=name)
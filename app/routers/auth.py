@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, Form, Request
 from fastapi.responses import RedirectResponse
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+from app.db.replicas import get_read_db
 from app.db.session import get_db
+from app.db.upsert import insert_user_if_absent
 from app.models.user import User, UserRole
 from app.core.security import hash_password, verify_password
 
@@ -22,7 +25,7 @@ def get_current_user(request: Request, db: Session) -> User | None:
 # -------------------- REGISTER --------------------
 
 @router.get("/register")
-async def register_form(request: Request, db: Session = Depends(get_db)):
+async def register_form(request: Request, db: Session = Depends(get_read_db)):
     # import here to avoid circular import
     from app.main import templates
 
@@ -61,14 +64,6 @@ async def register(
         }
         return RedirectResponse("/register", status_code=303)
 
-    # -------------------- EXISTING USER CHECK --------------------
-    if db.query(User).filter(User.email == email).first():
-        request.session["flash"] = {
-            "type": "danger",
-            "message": "Email already registered. Please log in.",
-        }
-        return RedirectResponse("/register", status_code=303)
-
     # -------------------- SAFE ENUM CONVERSION --------------------
     try:
         user_role = UserRole(role)
@@ -76,18 +71,20 @@ async def register(
         user_role = UserRole.TENANT
 
     # -------------------- CREATE USER --------------------
+    # INSERT ... ON CONFLICT (email) DO NOTHING: one round trip, and a
+    # duplicate (or a concurrent registration of the same email) comes back
+    # as None rather than an error.
     try:
-        user = User(
+        user_id = insert_user_if_absent(
+            db,
             full_name=full_name,
             email=email,
             phone=phone,
             hashed_password=hash_password(password),
             role=user_role,
         )
-        db.add(user)
         db.commit()
-        db.refresh(user)
-    except Exception:
+    except SQLAlchemyError:
         db.rollback()
         request.session["flash"] = {
             "type": "danger",
@@ -95,9 +92,16 @@ async def register(
         }
         return RedirectResponse("/register", status_code=303)
 
+    if user_id is None:
+        request.session["flash"] = {
+            "type": "danger",
+            "message": "Email already registered. Please log in.",
+        }
+        return RedirectResponse("/register", status_code=303)
+
     # -------------------- SESSION --------------------
-    request.session["user_id"] = user.id
-    request.session["role"] = user.role.value
+    request.session["user_id"] = user_id
+    request.session["role"] = user_role.value
     request.session["flash"] = {
         "type": "success",
         "message": "Registration successful. You are now logged in.",
@@ -109,7 +113,7 @@ async def register(
 # -------------------- LOGIN --------------------
 
 @router.get("/login")
-async def login_form(request: Request, db: Session = Depends(get_db)):
+async def login_form(request: Request, db: Session = Depends(get_read_db)):
     from app.main import templates
 
     flash = request.session.pop("flash", None)
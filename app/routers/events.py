@@ -0,0 +1,46 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, Request
+from fastapi.responses import Response, StreamingResponse
+
+from app.core.config import settings
+from app.services.pubsub import broker, user_topic
+
+
+router = APIRouter()
+
+
+def format_event(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+async def event_stream(request: Request, topic: str):
+    # One coroutine and one small queue per client; no DB connection or
+    # thread is held while the connection sits idle.
+    async with broker.subscribe(topic) as sub:
+        yield f"retry: {settings.SSE_RETRY_MS}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(sub.get(), settings.SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": ping\n\n"   # keeps proxies from closing the idle stream
+                continue
+            yield format_event(event)
+
+
+@router.get("/stream")
+async def stream(request: Request):
+    # Trusts the session alone so an idle stream never touches the database.
+    user_id = request.session.get("user_id")
+    role = request.session.get("role")
+    if not user_id or role not in ("owner", "tenant"):
+        return Response(status_code=204)   # tells EventSource not to reconnect
+
+    return StreamingResponse(
+        event_stream(request, user_topic(role, user_id)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
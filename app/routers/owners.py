@@ -2,13 +2,20 @@ from datetime import date
 
 from fastapi import APIRouter, Depends, File, Form, Request, UploadFile
 from fastapi.responses import RedirectResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 import os
 
+from app.db import partitions
+from app.db.replicas import get_read_db
 from app.db.session import get_db
+from app.db.upsert import upsert_payment
 from app.models.property import AvailabilityStatus, Property, PropertyType, PaymentStatus, RentPayment
 from app.models.user import UserRole
 from app.routers.auth import get_current_user
+from app.services import listing_hooks
+from app.services.pubsub import publish_payment
 
 
 router = APIRouter()
@@ -26,7 +33,7 @@ def require_owner(request: Request, db: Session):
 
 
 @router.get("/dashboard")
-async def owner_dashboard(request: Request, db: Session = Depends(get_db)):
+async def owner_dashboard(request: Request, db: Session = Depends(get_read_db)):
     from app.main import templates
 
     owner = require_owner(request, db)
@@ -34,15 +41,16 @@ async def owner_dashboard(request: Request, db: Session = Depends(get_db)):
         return RedirectResponse("/login", status_code=303)
 
     properties = db.query(Property).filter(Property.owner_id == owner.id).all()
+    flash = request.session.pop("flash", None)
 
     return templates.TemplateResponse(
         "owner/dashboard.html",
-        {"request": request, "owner": owner, "properties": properties},
+        {"request": request, "owner": owner, "properties": properties, "flash": flash},
     )
 
 
 @router.get("/properties/new")
-async def new_property_form(request: Request, db: Session = Depends(get_db)):
+async def new_property_form(request: Request, db: Session = Depends(get_read_db)):
     from app.main import templates
 
     owner = require_owner(request, db)
@@ -88,14 +96,16 @@ async def create_property(
         main_image_path=image_path,
     )
     db.add(prop)
+    listing_hooks.queue_jobs(db, prop)
     db.commit()
+    listing_hooks.property_saved(prop)
 
     return RedirectResponse("/owner/dashboard", status_code=303)
 
 
 @router.get("/properties/{property_id}/edit")
 async def edit_property_form(
-    property_id: int, request: Request, db: Session = Depends(get_db)
+    property_id: int, request: Request, db: Session = Depends(get_read_db)
 ):
     from app.main import templates
 
@@ -111,9 +121,11 @@ async def edit_property_form(
     if not prop:
         return RedirectResponse("/owner/dashboard", status_code=303)
 
+    flash = request.session.pop("flash", None)
+
     return templates.TemplateResponse(
         "owner/property_form.html",
-        {"request": request, "property": prop},
+        {"request": request, "property": prop, "flash": flash},
     )
 
 
@@ -127,6 +139,7 @@ async def update_property(
     rent_amount: float = Form(...),
     property_type: str = Form(...),
     availability_status: str = Form("available"),
+    version: int | None = Form(None),
     image: UploadFile | None = File(None),
     db: Session = Depends(get_db),
 ):
@@ -142,6 +155,12 @@ async def update_property(
     if not prop:
         return RedirectResponse("/owner/dashboard", status_code=303)
 
+    # the form carries the version it was rendered from; a save from a stale
+    # tab must not silently overwrite a newer edit
+    if version is not None and version != prop.version:
+        return _edit_conflict(request, property_id)
+
+    previous = listing_hooks.snapshot(prop)
     prop.title = title
     prop.description = description
     prop.location = location
@@ -156,11 +175,27 @@ async def update_property(
             f.write(await image.read())
         prop.main_image_path = f"/static/uploads/{filename}"
 
-    db.commit()
+    try:
+        # UPDATE ... WHERE id = ? AND version = ?; zero rows means another
+        # request saved first (raised by queue_jobs' flush or the commit)
+        listing_hooks.queue_jobs(db, prop, previous)
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        return _edit_conflict(request, property_id)
+    listing_hooks.property_saved(prop, previous)
 
     return RedirectResponse("/owner/dashboard", status_code=303)
 
 
+def _edit_conflict(request: Request, property_id: int):
+    request.session["flash"] = {
+        "type": "warning",
+        "message": "This property was changed by someone else. Review the current values and save again.",
+    }
+    return RedirectResponse(f"/owner/properties/{property_id}/edit", status_code=303)
+
+
 @router.post("/properties/{property_id}/delete")
 async def delete_property(
     property_id: int, request: Request, db: Session = Depends(get_db)
@@ -175,14 +210,21 @@ async def delete_property(
         .first()
     )
     if prop:
+        previous = listing_hooks.snapshot(prop)
         db.delete(prop)
-        db.commit()
+        try:
+            # DELETE ... WHERE id = ? AND version = ?, like the edit path
+            db.commit()
+        except StaleDataError:
+            db.rollback()
+            return _edit_conflict(request, property_id)
+        listing_hooks.property_removed(previous)
 
     return RedirectResponse("/owner/dashboard", status_code=303)
 
 
 @router.get("/properties/{property_id}/payments")
-async def view_payments(property_id: int, request: Request, db: Session = Depends(get_db)):
+async def view_payments(property_id: int, request: Request, db: Session = Depends(get_read_db)):
     from app.main import templates
 
     owner = require_owner(request, db)
@@ -203,10 +245,11 @@ async def view_payments(property_id: int, request: Request, db: Session = Depend
         .order_by(RentPayment.month.desc())
         .all()
     )
+    flash = request.session.pop("flash", None)
 
     return templates.TemplateResponse(
         "owner/payments.html",
-        {"request": request, "owner": owner, "property": prop, "payments": payments},
+        {"request": request, "owner": owner, "property": prop, "payments": payments, "flash": flash},
     )
 
 
@@ -226,29 +269,32 @@ async def add_or_update_payment(
 
     pay_month = date.fromisoformat(month)
 
-    payment = (
-        db.query(RentPayment)
-        .filter(
-            RentPayment.property_id == property_id,
-            RentPayment.tenant_id == tenant_id,
-            RentPayment.month == pay_month,
-        )
-        .first()
-    )
-
-    if payment:
-        payment.amount = amount
-        payment.status = PaymentStatus(status)
-    else:
-        payment = RentPayment(
-            tenant_id=tenant_id,
-            property_id=property_id,
-            month=pay_month,
-            amount=amount,
-            status=PaymentStatus(status),
-        )
-        db.add(payment)
-
-    db.commit()
+    # single INSERT ... ON CONFLICT (property_id, tenant_id, month) DO UPDATE;
+    # tried again if the month's partition was archived since this process
+    # last created it (Postgres)
+    for retry in (True, False):
+        try:
+            payment = upsert_payment(db, property_id, tenant_id, pay_month, amount, PaymentStatus(status))
+            db.commit()
+            break
+        except IntegrityError as exc:
+            db.rollback()
+            if retry and partitions.forget_missing(exc, pay_month.year):
+                continue
+            request.session["flash"] = {
+                "type": "danger",
+                "message": f"No tenant or property matches tenant ID {tenant_id}.",
+            }
+            return RedirectResponse(f"/owner/properties/{property_id}/payments", status_code=303)
+
+    publish_payment(owner.id, {
+        "property_id": property_id,
+        "tenant_id": tenant_id,
+        "tenant_name": payment.tenant_name,
+        "property_title": payment.property_title,
+        "month": pay_month.isoformat(),
+        "amount": amount,
+        "status": status,
+    })
 
     return RedirectResponse("/owner/dashboard", status_code=303)
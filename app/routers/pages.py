@@ -1,15 +1,22 @@
 from fastapi import APIRouter, Depends, Request, Form
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.rendering import stream_template
+from app.db.replicas import get_read_db, pinned_to_primary
 from app.db.session import get_db
 from app.models.property import Property, PropertyType
 from app.models.user import User
 from app.routers.auth import get_current_user
+from app.services.autocomplete import locations
+from app.services.listing_snapshot import listing_snapshot
 
 
 router = APIRouter()
 
+ID_CHUNK = 5_000    # ids per IN (...) when loading snapshot matches
+
 
 @router.get("/")
 async def home(
@@ -18,27 +25,47 @@ async def home(
     min_rent: float | None = None,
     max_rent: float | None = None,
     property_type: str | None = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     from app.main import templates
 
-    query = db.query(Property)
-
-    if location:
-        query = query.filter(Property.location.ilike(f"%{location}%"))
-    if min_rent is not None:
-        query = query.filter(Property.rent_amount >= min_rent)
-    if max_rent is not None:
-        query = query.filter(Property.rent_amount <= max_rent)
-    if property_type:
-        query = query.filter(Property.property_type == PropertyType(property_type))
-
-    properties = query.order_by(Property.created_at.desc()).all()
+    # Filter and sort on the shared columnar snapshot, then load just the
+    # matching rows by id; SQL when there is no snapshot yet or the user
+    # just wrote.
+    ids = None
+    if not pinned_to_primary(request):
+        ids = listing_snapshot.query(
+            location=location,
+            min_rent=min_rent,
+            max_rent=max_rent,
+            property_type=property_type or None,
+        )
+
+    if ids is not None:
+        found = {}
+        for start in range(0, len(ids), ID_CHUNK):
+            chunk = ids[start:start + ID_CHUNK]
+            found.update((p.id, p) for p in db.query(Property).filter(Property.id.in_(chunk)))
+        properties = [found[i] for i in ids if i in found]
+    else:
+        query = db.query(Property)
+
+        if location:
+            query = query.filter(Property.location.ilike(f"%{location}%"))
+        if min_rent is not None:
+            query = query.filter(Property.rent_amount >= min_rent)
+        if max_rent is not None:
+            query = query.filter(Property.rent_amount <= max_rent)
+        if property_type:
+            query = query.filter(Property.property_type == PropertyType(property_type))
+
+        properties = query.order_by(Property.created_at.desc(), Property.id.desc()).all()
 
     current_user = get_current_user(request, db)
     flash = request.session.pop("flash", None)
 
-    return templates.TemplateResponse(
+    return stream_template(
+        templates,
         "home.html",
         {
             "request": request,
@@ -49,8 +76,19 @@ async def home(
     )
 
 
+@router.get("/locations/suggest")
+async def suggest_locations(q: str = "", limit: int = 8):
+    # served from the in-memory prefix index, no DB round trip
+    locations.maybe_rebuild()
+    suggestions = locations.suggest(q, min(max(limit, 1), 20))
+    return JSONResponse(
+        {"query": q, "suggestions": [{"term": t, "count": c} for t, c in suggestions]},
+        headers={"Cache-Control": "public, max-age=30"},
+    )
+
+
 @router.get("/profile")
-async def profile(request: Request, db: Session = Depends(get_db)):
+async def profile(request: Request, db: Session = Depends(get_read_db)):
     from app.main import templates
 
     user = get_current_user(request, db)
@@ -1,11 +1,20 @@
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+import math
 
+from fastapi import APIRouter, Depends, Form, Request
+from fastapi.responses import FileResponse, RedirectResponse
+from sqlalchemy import update
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
+from app.db.replicas import get_read_db
 from app.db.session import get_db
-from app.models.property import Property, RentPayment
+from app.models.property import Property, PropertyType, RentPayment
+from app.models.search import SavedSearch, SearchAlert
 from app.models.user import UserRole
 from app.routers.auth import get_current_user
+from app.services import static_pages
+from app.services.autocomplete import WORD_RE
+from app.services.recommendations import recommender
 
 
 router = APIRouter()
@@ -20,24 +29,45 @@ def require_tenant(request: Request, db: Session):
 
 @router.get("/properties/{property_id}")
 async def property_detail(
-    property_id: int, request: Request, db: Session = Depends(get_db)
+    property_id: int, request: Request, db: Session = Depends(get_read_db)
 ):
     from app.main import templates
 
+    # anonymous visitors get the page pre-rendered by the job worker, no DB work
+    if settings.STATIC_PAGES_ENABLED and not request.session.get("user_id"):
+        page = static_pages.page_path(property_id)
+        if page.is_file():
+            return FileResponse(
+                page,
+                media_type="text/html; charset=utf-8",
+                headers={"Cache-Control": f"public, max-age={settings.STATIC_PAGES_MAX_AGE}"},
+            )
+
     prop = db.query(Property).filter(Property.id == property_id).first()
     if not prop:
         return RedirectResponse("/", status_code=303)
 
     current_user = get_current_user(request, db)
 
+    similar = []
+    similar_ids = recommender.similar(prop)
+    if similar_ids:
+        found = {p.id: p for p in db.query(Property).filter(Property.id.in_(similar_ids))}
+        similar = [found[i] for i in similar_ids if i in found]
+
     return templates.TemplateResponse(
         "tenant/property_detail.html",
-        {"request": request, "property": prop, "current_user": current_user},
+        {
+            "request": request,
+            "property": prop,
+            "current_user": current_user,
+            "similar": similar,
+        },
     )
 
 
 @router.get("/rent-history")
-async def rent_history(request: Request, db: Session = Depends(get_db)):
+async def rent_history(request: Request, db: Session = Depends(get_read_db)):
     from app.main import templates
 
     tenant = require_tenant(request, db)
@@ -55,3 +85,140 @@ async def rent_history(request: Request, db: Session = Depends(get_db)):
         "tenant/rent_history.html",
         {"request": request, "tenant": tenant, "payments": payments},
     )
+
+
+# -------------------- SAVED SEARCHES --------------------
+
+@router.get("/searches")
+async def saved_searches(request: Request, db: Session = Depends(get_read_db)):
+    from app.main import templates
+
+    tenant = require_tenant(request, db)
+    if not tenant:
+        return RedirectResponse("/login", status_code=303)
+
+    searches = (
+        db.query(SavedSearch)
+        .filter(SavedSearch.tenant_id == tenant.id)
+        .order_by(SavedSearch.created_at.desc())
+        .all()
+    )
+    alerts = (
+        db.query(SearchAlert)
+        .join(SearchAlert.property)
+        .options(joinedload(SearchAlert.property))
+        .filter(SearchAlert.tenant_id == tenant.id)
+        .order_by(SearchAlert.created_at.desc(), SearchAlert.id.desc())
+        .limit(50)
+        .all()
+    )
+    flash = request.session.pop("flash", None)
+
+    return templates.TemplateResponse(
+        "tenant/saved_searches.html",
+        {
+            "request": request,
+            "current_user": tenant,
+            "searches": searches,
+            "alerts": alerts,
+            "flash": flash,
+        },
+    )
+
+
+@router.post("/searches")
+async def save_search(
+    request: Request,
+    location: str = Form(""),
+    min_rent: str = Form(""),
+    max_rent: str = Form(""),
+    property_type: str = Form(""),
+    db: Session = Depends(get_db),
+):
+    # The home page filters as submitted; blanks mean "any".
+    tenant = require_tenant(request, db)
+    if not tenant:
+        return RedirectResponse("/login", status_code=303)
+
+    try:
+        low = float(min_rent) if min_rent.strip() else None
+        high = float(max_rent) if max_rent.strip() else None
+    except ValueError:
+        return _search_rejected(request, "Rent limits must be numbers.")
+    if any(v is not None and not (math.isfinite(v) and 0 <= v < 1e8) for v in (low, high)):
+        return _search_rejected(request, "Rent limits must be between 0 and 99,999,999.")
+    if low is not None and high is not None and low > high:
+        return _search_rejected(request, "Minimum rent cannot be above maximum rent.")
+    try:
+        ptype = PropertyType(property_type) if property_type else None
+    except ValueError:
+        return _search_rejected(request, "Unknown property type.")
+    location = location.strip()
+    if len(location) > 255:
+        return _search_rejected(request, "Location is too long.")
+    if location and not WORD_RE.search(location):
+        return _search_rejected(request, "Location must contain a letter or a digit.")
+
+    count = db.query(SavedSearch).filter(SavedSearch.tenant_id == tenant.id).count()
+    if count >= settings.SAVED_SEARCHES_PER_TENANT:
+        request.session["flash"] = {
+            "type": "warning",
+            "message": f"You can keep up to {settings.SAVED_SEARCHES_PER_TENANT} saved searches.",
+        }
+        return RedirectResponse("/tenant/searches", status_code=303)
+
+    search = SavedSearch(
+        tenant_id=tenant.id,
+        location=location or None,
+        min_rent=low,
+        max_rent=high,
+        property_type=ptype,
+    )
+    db.add(search)
+    db.commit()
+
+    request.session["flash"] = {
+        "type": "success",
+        "message": "Search saved. You will be alerted when a new listing matches it.",
+    }
+    return RedirectResponse("/tenant/searches", status_code=303)
+
+
+def _search_rejected(request: Request, message: str):
+    request.session["flash"] = {"type": "danger", "message": message}
+    return RedirectResponse("/tenant/searches", status_code=303)
+
+
+@router.post("/searches/{search_id}/delete")
+async def delete_search(search_id: int, request: Request, db: Session = Depends(get_db)):
+    tenant = require_tenant(request, db)
+    if not tenant:
+        return RedirectResponse("/login", status_code=303)
+
+    deleted = (
+        db.query(SavedSearch)
+        .filter(SavedSearch.id == search_id, SavedSearch.tenant_id == tenant.id)
+        .delete(synchronize_session=False)
+    )
+    if deleted:
+        # the job worker's index keeps the id until its next rebuild; the
+        # alert INSERT ... SELECT skips searches that no longer exist
+        db.query(SearchAlert).filter(SearchAlert.saved_search_id == search_id).delete(synchronize_session=False)
+        db.commit()
+
+    return RedirectResponse("/tenant/searches", status_code=303)
+
+
+@router.post("/alerts/seen")
+async def mark_alerts_seen(request: Request, db: Session = Depends(get_db)):
+    tenant = require_tenant(request, db)
+    if not tenant:
+        return RedirectResponse("/login", status_code=303)
+
+    db.execute(
+        update(SearchAlert)
+        .where(SearchAlert.tenant_id == tenant.id, SearchAlert.seen.is_(False))
+        .values(seen=True)
+    )
+    db.commit()
+    return RedirectResponse("/tenant/searches", status_code=303)
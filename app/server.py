@@ -0,0 +1,163 @@
+import argparse
+import multiprocessing
+import subprocess
+import sys
+import time
+import warnings
+
+from gunicorn.app.base import BaseApplication
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    from uvicorn.workers import UvicornWorker
+
+from app.core.config import BASE_DIR, settings
+
+
+# -------------------- WORKER --------------------
+
+class HouseRentWorker(UvicornWorker):
+    # Let in-flight requests finish for up to --graceful-timeout seconds when
+    # the worker is recycled (max requests) or the server is stopped.
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = self.cfg.graceful_timeout
+
+
+# -------------------- HOOKS --------------------
+
+def post_fork(server, worker):
+    # Connections opened in the master (if any) must not be shared with the
+    # forked worker; drop them without closing the parent's sockets.
+    from app.db.replicas import replicas
+    from app.db.session import engine
+
+    engine.dispose(close=False)
+    for replica in replicas:
+        replica.engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    server.log.info("Worker %s exited after draining", worker.pid)
+
+
+def on_starting(server):
+    from app.core.metrics import reset_multiproc_dir
+
+    reset_multiproc_dir()
+
+
+def child_exit(server, worker):
+    # keep the exited worker's counters in the /metrics totals
+    from app.core.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
+
+
+# -------------------- IMPORT REPORT --------------------
+
+def import_report(target: str = "app.main", top: int = 25):
+    # Run the import in a clean interpreter with -X importtime and print the
+    # slowest modules (cumulative time includes children).
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line.split(":", 1)[1].split("|")
+        rows.append((int(cumulative_us), int(self_us), module.strip()))
+
+    rows.sort(reverse=True)
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, module in rows[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {module}")
+    app_rows = [r for r in rows if r[2] == "app" or r[2].startswith("app.")]
+    if app_rows:
+        print("\napp modules:")
+        for cumulative_us, self_us, module in app_rows:
+            print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {module}")
+
+
+# -------------------- APPLICATION --------------------
+
+class HouseRentServer(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        # With preload_app this runs once in the master: routers are imported
+        # and templates compiled before fork, so workers share the pages.
+        started = time.perf_counter()
+        from app.core.lifespan import warm_templates
+        from app.main import app, templates
+
+        imported = time.perf_counter()
+        compiled = warm_templates(templates)
+        done = time.perf_counter()
+        print(
+            f"Preloaded app in {(imported - started) * 1000:.0f} ms, "
+            f"compiled {compiled} templates in {(done - imported) * 1000:.0f} ms",
+            flush=True,
+        )
+        return app
+
+
+def build_options(args) -> dict:
+    return {
+        "bind": args.bind,
+        "workers": args.workers or multiprocessing.cpu_count(),
+        "worker_class": "app.server.HouseRentWorker",
+        "preload_app": True,
+        "max_requests": args.max_requests,
+        "max_requests_jitter": args.max_requests_jitter,
+        "graceful_timeout": args.graceful_timeout,
+        "timeout": args.timeout,
+        "keepalive": args.keepalive,
+        "post_fork": post_fork,
+        "worker_exit": worker_exit,
+        "on_starting": on_starting,
+        "child_exit": child_exit,
+        "accesslog": "-" if args.access_log else None,
+        "errorlog": "-",
+    }
+
+
+# -------------------- CLI --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the app under a managed multi-worker server.")
+    parser.add_argument("--bind", default=settings.WEB_BIND)
+    parser.add_argument("--workers", type=int, default=settings.WEB_WORKERS)
+    parser.add_argument("--max-requests", type=int, default=settings.WEB_MAX_REQUESTS)
+    parser.add_argument("--max-requests-jitter", type=int, default=settings.WEB_MAX_REQUESTS_JITTER)
+    parser.add_argument("--graceful-timeout", type=int, default=settings.WEB_GRACEFUL_TIMEOUT)
+    parser.add_argument("--timeout", type=int, default=settings.WEB_TIMEOUT)
+    parser.add_argument("--keepalive", type=int, default=settings.WEB_KEEPALIVE)
+    parser.add_argument("--access-log", action="store_true")
+    parser.add_argument("--import-report", type=int, nargs="?", const=25, default=None, metavar="TOP",
+                        help="print per-module import times before starting")
+    parser.add_argument("--import-report-only", action="store_true", help="print the report and exit")
+    args = parser.parse_args()
+
+    if args.import_report is not None or args.import_report_only:
+        import_report(top=args.import_report or 25)
+        if args.import_report_only:
+            return
+
+    HouseRentServer(build_options(args)).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import heapq
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from app.core.config import settings
+
+
+logger = logging.getLogger("app.autocomplete")
+
+SPACE_RE = re.compile(r"\s+")
+WORD_RE = re.compile(r"[^\W_]+")
+MAX_TERM_LENGTH = 64
+
+
+def normalize(text: str | None) -> str:
+    return SPACE_RE.sub(" ", (text or "").lower()).strip()
+
+
+def location_terms(location: str | None) -> set[str]:
+    # The whole location ("mirpur, dhaka") plus each word in it; every term is
+    # a substring of the original, so it works as-is in the ilike filter.
+    phrase = normalize(location)
+    if not phrase:
+        return set()
+    terms = {w for w in WORD_RE.findall(phrase) if len(w) > 1}
+    terms.add(phrase[:MAX_TERM_LENGTH])
+    return terms
+
+
+# -------------------- PREFIX INDEX --------------------
+
+class LocationIndex:
+    # Sorted list of terms searched with bisect, plus listing counts per term.
+    # Bounded to max_terms: on overflow the least-used tenth is dropped.
+
+    def __init__(self, max_terms: int = settings.AUTOCOMPLETE_MAX_TERMS, max_scan: int = 512):
+        self.max_terms = max_terms
+        self.max_scan = max_scan
+        self.terms: list[str] = []
+        self.counts: dict[str, int] = {}
+        self._cache: dict[tuple[str, int], list[tuple[str, int]]] = {}
+        self._lock = threading.Lock()
+        self.built_at: float | None = None
+        self._rebuilding = False
+
+    # ---- writes ----
+
+    def add(self, location: str | None, count: int = 1):
+        with self._lock:
+            for term in location_terms(location):
+                self._bump(term, count)
+            self._evict()
+            self._cache.clear()
+
+    def remove(self, location: str | None, count: int = 1):
+        with self._lock:
+            for term in location_terms(location):
+                self._bump(term, -count)
+            self._cache.clear()
+
+    def _bump(self, term: str, delta: int):
+        current = self.counts.get(term)
+        if current is None:
+            if delta <= 0:
+                return
+            self.counts[term] = delta
+            insort(self.terms, term)
+            return
+        current += delta
+        if current > 0:
+            self.counts[term] = current
+            return
+        del self.counts[term]
+        i = bisect_left(self.terms, term)
+        if i < len(self.terms) and self.terms[i] == term:
+            del self.terms[i]
+
+    def _evict(self):
+        if len(self.terms) <= self.max_terms:
+            return
+        drop = set(heapq.nsmallest(max(len(self.terms) // 10, 1), self.counts, key=self.counts.get))
+        for term in drop:
+            del self.counts[term]
+        self.terms = [t for t in self.terms if t not in drop]
+
+    # ---- reads ----
+
+    def suggest(self, prefix: str, limit: int = 8) -> list[tuple[str, int]]:
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        key = (prefix, limit)
+        # the window scan is capped at max_scan terms, so holding the lock
+        # through it keeps writers from changing terms mid-read at little cost
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                return hit
+
+            terms = self.terms
+            lo = bisect_left(terms, prefix)
+            hi = min(bisect_left(terms, prefix + "\uffff", lo), lo + self.max_scan)
+            counts = self.counts
+            # window is in term order and nlargest is stable, so ties stay alphabetical
+            top = heapq.nlargest(limit, terms[lo:hi], key=lambda t: counts.get(t, 0))
+            result = [(t, counts.get(t, 0)) for t in top]
+
+            if len(self._cache) >= 4096:
+                self._cache.clear()
+            self._cache[key] = result
+        return result
+
+    def __len__(self):
+        return len(self.terms)
+
+    def cache_size(self) -> int:
+        return len(self._cache)
+
+    # ---- (re)building ----
+
+    def load(self, grouped):
+        # grouped: iterable of (location, listing_count); swapped in at once so
+        # readers never see a half-built index.
+        fresh = LocationIndex(self.max_terms, self.max_scan)
+        for location, count in grouped:
+            for term in location_terms(location):
+                fresh.counts[term] = fresh.counts.get(term, 0) + count
+        fresh.terms = sorted(fresh.counts)
+        fresh._evict()
+        with self._lock:
+            self.terms, self.counts = fresh.terms, fresh.counts
+            self._cache = {}
+            self.built_at = time.monotonic()
+
+    def rebuild(self):
+        from sqlalchemy import func
+
+        from app.db.session import SessionLocal
+        from app.models.property import Property
+
+        started = time.perf_counter()
+        with SessionLocal() as db:
+            grouped = db.query(Property.location, func.count()).group_by(Property.location).all()
+        self.load(grouped)
+        logger.info("location index: %d terms in %.2fs", len(self), time.perf_counter() - started)
+
+    def maybe_rebuild(self):
+        # Periodic full rebuild picks up writes handled by other workers.
+        with self._lock:
+            if self._rebuilding:
+                return
+            if self.built_at is not None and time.monotonic() - self.built_at < settings.AUTOCOMPLETE_REBUILD_SECONDS:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._background_rebuild, daemon=True, name="autocomplete-rebuild").start()
+
+    def _background_rebuild(self):
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception("location index rebuild failed")
+            with self._lock:
+                self.built_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+
+locations = LocationIndex()
@@ -0,0 +1,62 @@
+from app.core.config import settings
+from app.jobs.queue import enqueue
+from app.models.property import AvailabilityStatus
+from app.services.autocomplete import locations
+from app.services.listing_snapshot import listing_snapshot
+from app.services.pubsub import publish_property
+from app.services import static_pages
+from app.services.recommendations import recommender
+
+
+# -------------------- LISTING CHANGE HOOKS --------------------
+# queue_jobs() is called by the routers before a property write commits, so
+# its background jobs (matching a listing that becomes available against the
+# tenants' saved searches, re-rendering the anonymous detail page) commit or
+# roll back with the write; with JOBS_EAGER they run right after the commit. The other hooks run after the commit, to keep
+# the in-process listing indexes current and push the change to the owner's
+# open dashboards.
+
+def snapshot(prop) -> dict:
+    # The fields the hooks compare against; take it before changing the row.
+    return {
+        "id": prop.id,
+        "owner_id": prop.owner_id,
+        "location": prop.location,
+        "availability_status": prop.availability_status,
+    }
+
+
+def property_saved(prop, previous: dict | None = None):
+    recommender.upsert(prop)
+    listing_snapshot.nudge()
+    if previous is None:
+        locations.add(prop.location)
+    elif previous["location"] != prop.location:
+        locations.remove(previous["location"])
+        locations.add(prop.location)
+
+    publish_property(prop.owner_id, "saved", {
+        "id": prop.id,
+        "title": prop.title,
+        "location": prop.location,
+        "rent_amount": prop.rent_amount,
+        "availability_status": prop.availability_status.value,
+    })
+
+
+def queue_jobs(db, prop, previous: dict | None = None):
+    db.flush()   # a new listing needs its id and column defaults
+    if prop.availability_status == AvailabilityStatus.AVAILABLE and (
+        previous is None or previous["availability_status"] != AvailabilityStatus.AVAILABLE
+    ):
+        enqueue(db, "match_saved_searches", {"property_id": prop.id})
+    if settings.STATIC_PAGES_ENABLED:
+        enqueue(db, "render_property_page", {"property_id": prop.id})
+
+
+def property_removed(previous: dict):
+    recommender.remove(previous["id"])
+    listing_snapshot.nudge()
+    locations.remove(previous["location"])
+    static_pages.remove(previous["id"])
+    publish_property(previous["owner_id"], "removed", {"id": previous["id"]})
@@ -0,0 +1,288 @@
+import fcntl
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.property import AvailabilityStatus, PropertyType
+
+
+logger = logging.getLogger("app.listing_snapshot")
+
+PTYPES = list(PropertyType)
+STATUSES = list(AvailabilityStatus)
+PTYPE_CODE = {t: i for i, t in enumerate(PTYPES)}
+STATUS_CODE = {s: i for i, s in enumerate(STATUSES)}
+
+# one .npy per column, rows ordered newest first (created desc, id desc) so a
+# filtered page is just the first matches in storage order
+COLUMNS = {
+    "ids": np.int64,
+    "rent": np.float64,
+    "ptype": np.int8,       # index into PTYPES
+    "status": np.int8,      # index into STATUSES
+    "created": np.int64,    # microseconds since the epoch
+    "loc": np.int32,        # index into locations.npy
+}
+POINTER = "CURRENT"
+WRITER_LOCK = ".writer.lock"
+MASK_CACHE_SIZE = 256
+# updated_at is stamped when the writing transaction starts, so a row can
+# commit after the watermark has moved past it; each refresh re-reads this
+# window behind the watermark
+WATERMARK_OVERLAP = timedelta(seconds=60)
+
+
+def _micros(dt: datetime | None) -> int:
+    return int(dt.timestamp() * 1_000_000) if dt is not None else 0
+
+
+# -------------------- ONE GENERATION --------------------
+
+class Snapshot:
+    # Read-only view of one published generation. The column files are
+    # memory-mapped, so every worker shares one copy in the page cache.
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.columns = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in COLUMNS}
+        self.locations = np.load(path / "locations.npy", mmap_mode="r")
+        self.meta = json.loads((path / "meta.json").read_text())
+        self._location_masks: dict[str, np.ndarray] = {}
+
+    def __len__(self):
+        return len(self.columns["ids"])
+
+    def location_mask(self, text: str) -> np.ndarray:
+        # ilike '%text%' over the location dictionary, cached per generation
+        text = text.lower()
+        mask = self._location_masks.get(text)
+        if mask is None:
+            if len(self._location_masks) >= MASK_CACHE_SIZE:
+                self._location_masks.clear()
+            mask = np.char.find(self.locations, text) >= 0
+            self._location_masks[text] = mask
+        return mask
+
+    def query(self, location=None, min_rent=None, max_rent=None, property_type=None) -> list[int]:
+        # Same filters and order as the pages.home SQL; every matching id,
+        # newest first.
+        cols = self.columns
+        mask = np.ones(len(self), dtype=bool)
+        if location:
+            mask &= self.location_mask(location)[cols["loc"]]
+        if min_rent is not None:
+            mask &= cols["rent"] >= min_rent
+        if max_rent is not None:
+            mask &= cols["rent"] <= max_rent
+        if property_type is not None:
+            mask &= cols["ptype"] == PTYPE_CODE[PropertyType(property_type)]
+        return cols["ids"][mask].tolist()
+
+
+# -------------------- WRITER STATE --------------------
+
+class _Columns:
+    # The writer's in-memory copy of the table, merged from changed rows.
+
+    def __init__(self):
+        self.arrays = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self.locations: list[str] = []
+        self.location_code: dict[str, int] = {}
+        self.watermark: datetime | None = None
+        # rows merged inside the overlap window, by id; a re-read row is new
+        # only if it differs from these
+        self.recent: dict[int, tuple] = {}
+
+    def _code(self, location: str | None) -> int:
+        key = (location or "").lower()
+        code = self.location_code.get(key)
+        if code is None:
+            code = self.location_code[key] = len(self.locations)
+            self.locations.append(key)
+        return code
+
+    def merge(self, rows) -> bool:
+        # rows: (id, rent, type, status, created_at, updated_at, location)
+        # tuples changed since watermark - WATERMARK_OVERLAP. False when
+        # nothing is new.
+        fresh = [r for r in rows if self.recent.get(r[0]) != tuple(r)]
+        if not fresh:
+            return False
+
+        changed = {name: np.empty(len(fresh), dtype=dtype) for name, dtype in COLUMNS.items()}
+        for i, (prop_id, rent, ptype, status, created, updated, location) in enumerate(fresh):
+            changed["ids"][i] = prop_id
+            changed["rent"][i] = float(rent)
+            changed["ptype"][i] = PTYPE_CODE[ptype]
+            changed["status"][i] = STATUS_CODE[status]
+            changed["created"][i] = _micros(created)
+            changed["loc"][i] = self._code(location)
+
+        keep = ~np.isin(self.arrays["ids"], changed["ids"])
+        merged = {name: np.concatenate([self.arrays[name][keep], changed[name]]) for name in COLUMNS}
+        order = np.lexsort((-merged["ids"], -merged["created"]))
+        self.arrays = {name: column[order] for name, column in merged.items()}
+
+        latest = max(r[5] for r in fresh)
+        if self.watermark is None or latest > self.watermark:
+            self.watermark = latest
+        cutoff = self.watermark - WATERMARK_OVERLAP
+        self.recent.update((r[0], tuple(r)) for r in fresh if r[5] >= cutoff)
+        self.recent = {i: r for i, r in self.recent.items() if r[5] >= cutoff}
+        return True
+
+    def write(self, path: Path):
+        tmp = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        for name, column in self.arrays.items():
+            np.save(tmp / f"{name}.npy", column)
+        np.save(tmp / "locations.npy", np.array(self.locations or [""], dtype=str))
+        (tmp / "meta.json").write_text(json.dumps({
+            "rows": len(self.arrays["ids"]),
+            "locations": len(self.locations),
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "written_at": time.time(),
+        }))
+        os.rename(tmp, path)
+
+
+# -------------------- SHARED SNAPSHOT --------------------
+
+class ListingSnapshot:
+    # Every worker reads the generation named in <dir>/CURRENT. The worker
+    # holding <dir>/.writer.lock also refreshes it: changed rows by updated_at
+    # watermark every LISTING_SNAPSHOT_REFRESH_SECONDS, and a full reload
+    # every LISTING_SNAPSHOT_REBUILD_SECONDS to drop deleted listings. Other
+    # workers retry the lock, so a new writer takes over if it exits.
+
+    def __init__(self, directory: str = settings.LISTING_SNAPSHOT_DIR):
+        self.directory = Path(directory) if directory else None
+        self.current: Snapshot | None = None
+        self._pointer_id = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock_file = None
+
+    # ---- reads ----
+
+    def get(self) -> Snapshot | None:
+        if self.directory is None:
+            return None
+        # a stat per request; CURRENT is replaced (new inode) on publish
+        try:
+            stat = (self.directory / POINTER).stat()
+        except FileNotFoundError:
+            return None
+        pointer_id = (stat.st_ino, stat.st_mtime_ns)
+        if pointer_id != self._pointer_id:
+            try:
+                name = (self.directory / POINTER).read_text().strip()
+                self.current = Snapshot(self.directory / name)
+                self._pointer_id = pointer_id
+            except (OSError, ValueError):
+                logger.exception("could not open listing snapshot")
+        return self.current
+
+    def query(self, **filters) -> list[int] | None:
+        # None until a snapshot has been published; callers fall back to SQL
+        snapshot = self.get()
+        return snapshot.query(**filters) if snapshot is not None else None
+
+    # ---- writer ----
+
+    def nudge(self):
+        # a listing changed in this process; refresh now if we are the writer
+        self._wake.set()
+
+    def start(self):
+        if self.directory is None or self._thread is not None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="listing-snapshot")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _acquire(self) -> bool:
+        if self._lock_file is not None:
+            return True
+        lock_file = open(self.directory / WRITER_LOCK, "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _run(self):
+        state, rebuilt_at = None, 0.0
+        while not self._stop.is_set():
+            try:
+                if self._acquire():
+                    if state is None or time.monotonic() - rebuilt_at > settings.LISTING_SNAPSHOT_REBUILD_SECONDS:
+                        state, rebuilt_at = _Columns(), time.monotonic()
+                        started = time.perf_counter()
+                        self._refresh(state, force=True)
+                        logger.info("listing snapshot: %d rows in %.2fs",
+                                    len(state.arrays["ids"]), time.perf_counter() - started)
+                    else:
+                        self._refresh(state)
+            except Exception:
+                logger.exception("listing snapshot refresh failed")
+                state = None
+            self._wake.wait(settings.LISTING_SNAPSHOT_REFRESH_SECONDS)
+            self._wake.clear()
+
+    def _refresh(self, state: _Columns, force: bool = False):
+        from app.db.session import SessionLocal
+        from app.models.property import Property
+
+        with SessionLocal() as db:
+            query = db.query(
+                Property.id,
+                Property.rent_amount,
+                Property.property_type,
+                Property.availability_status,
+                Property.created_at,
+                Property.updated_at,
+                Property.location,
+            )
+            if state.watermark is not None:
+                query = query.filter(Property.updated_at >= state.watermark - WATERMARK_OVERLAP)
+            changed = state.merge(query.yield_per(10_000))
+        if changed or force:
+            self._publish(state)
+
+    def _publish(self, state: _Columns):
+        name = f"{time.time_ns():020d}"
+        state.write(self.directory / name)
+        pointer = self.directory / f"{POINTER}.tmp"
+        pointer.write_text(name)
+        os.replace(pointer, self.directory / POINTER)
+        # keep the previous generation for readers still switching over
+        generations = sorted(p for p in self.directory.iterdir() if p.is_dir() and p.name.isdigit())
+        for old in generations[:-2]:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+listing_snapshot = ListingSnapshot()
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+
+logger = logging.getLogger("app.pubsub")
+
+NOTIFY_CHANNEL = "house_rent_events"
+
+
+# -------------------- SUBSCRIPTION --------------------
+
+class Subscription:
+    # One open event stream. A bounded queue: a client that stops reading
+    # loses its oldest events instead of growing memory.
+
+    __slots__ = ("topics", "queue")
+
+    def __init__(self, topics: tuple[str, ...], size: int):
+        self.topics = topics
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+
+    def push(self, event: dict):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self) -> dict:
+        return await self.queue.get()
+
+
+# -------------------- BROKER --------------------
+
+class Broker:
+    # In-process topic fan-out for the SSE endpoint. With
+    # PUBSUB_BACKEND=postgres, publish() goes through NOTIFY and every worker
+    # (this one included) delivers what its LISTEN connection receives.
+    # Processes that serve no streams (the job worker) can only reach the
+    # web workers through postgres; with "memory" their events are dropped.
+
+    def __init__(self, backend: str = settings.PUBSUB_BACKEND, queue_size: int = settings.SSE_QUEUE_SIZE):
+        self.backend = backend
+        self.queue_size = queue_size
+        self.topics: dict[str, set[Subscription]] = {}
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self._listener: asyncio.Task | None = None
+        self._notifier: ThreadPoolExecutor | None = None
+        self._warned = False
+
+    # ---- subscribe ----
+
+    @asynccontextmanager
+    async def subscribe(self, *topics: str):
+        self.loop = asyncio.get_running_loop()
+        sub = Subscription(topics, self.queue_size)
+        for topic in topics:
+            self.topics.setdefault(topic, set()).add(sub)
+        try:
+            yield sub
+        finally:
+            for topic in topics:
+                subs = self.topics.get(topic)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del self.topics[topic]
+
+    def subscriber_count(self) -> int:
+        return len({sub for subs in self.topics.values() for sub in subs})
+
+    # ---- publish ----
+
+    def publish(self, topics: list[str], event: dict):
+        if self.backend == "postgres":
+            self._notify_soon(topics, event)
+        elif self.loop is None:
+            if not self._warned:
+                self._warned = True
+                logger.warning(
+                    "event published in a process with no running broker; with "
+                    "PUBSUB_BACKEND=memory it reaches nobody (set PUBSUB_BACKEND=postgres)"
+                )
+        else:
+            self.deliver(topics, event)
+
+    def deliver(self, topics: list[str], event: dict):
+        loop = self.loop
+        if loop is None or loop.is_closed() or not any(t in self.topics for t in topics):
+            return  # nobody in this process is listening
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._fan_out(topics, event)
+        else:
+            loop.call_soon_threadsafe(self._fan_out, topics, event)
+
+    def _fan_out(self, topics, event):
+        seen = set()
+        for topic in topics:
+            for sub in self.topics.get(topic, ()):
+                if sub not in seen:
+                    seen.add(sub)
+                    sub.push(event)
+
+    # ---- postgres bridge ----
+
+    def _notify_soon(self, topics, event):
+        # On the event loop the NOTIFY (pool checkout + round trip) goes to a
+        # single background thread, which also keeps events in publish order;
+        # job threads and scripts send it inline.
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self._notify(topics, event)
+            return
+        if self._notifier is None:
+            self._notifier = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pg-notify")
+        self._notifier.submit(self._notify, topics, event)
+
+    def _notify(self, topics, event):
+        from app.db.session import engine
+
+        payload = json.dumps({"topics": topics, "event": event}, default=str)
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": NOTIFY_CHANNEL, "payload": payload})
+                conn.commit()
+        except Exception:
+            logger.exception("NOTIFY failed; delivering locally only")
+            self.deliver(topics, event)
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        if self.backend == "postgres" and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._notifier is not None:
+            # let queued NOTIFYs go out without blocking the loop
+            await asyncio.to_thread(self._notifier.shutdown)
+            self._notifier = None
+        self.loop = None
+
+    async def _listen(self):
+        import psycopg
+
+        url = make_url(settings.DATABASE_URL).set(drivername="postgresql")
+        conninfo = url.render_as_string(hide_password=False)
+        delay = 1.0
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                    delay = 1.0
+                    async for note in conn.notifies():
+                        message = json.loads(note.payload)
+                        self._fan_out(message["topics"], message["event"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("LISTEN connection lost; retrying in %.0fs", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+
+broker = Broker()
+
+
+# -------------------- EVENTS --------------------
+
+def user_topic(role: str, user_id: int) -> str:
+    return f"{role}:{user_id}"
+
+
+def publish_payment(owner_id: int, payment: dict):
+    broker.publish(
+        [user_topic("owner", owner_id), user_topic("tenant", payment["tenant_id"])],
+        {"type": "payment", **payment},
+    )
+
+
+def publish_property(owner_id: int, action: str, prop: dict):
+    broker.publish([user_topic("owner", owner_id)], {"type": "property", "action": action, **prop})
+
+
+def publish_alert(tenant_id: int, alert: dict):
+    # sent from the job worker: needs PUBSUB_BACKEND=postgres to reach anyone
+    broker.publish([user_topic("tenant", tenant_id)], {"type": "alert", **alert})
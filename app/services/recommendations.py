@@ -0,0 +1,297 @@
+import logging
+import math
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.property import AvailabilityStatus, PropertyType
+
+
+logger = logging.getLogger("app.recommendations")
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {"a", "an", "and", "the", "in", "of", "for", "to", "with", "on", "at", "near", "is"}
+
+# feature layout: [rent | type one-hot | hashed location tokens | hashed text terms]
+RENT_SLOT = 0
+TYPE_SLOTS = {ptype: 1 + i for i, ptype in enumerate(PropertyType)}
+LOCATION_START = 1 + len(TYPE_SLOTS)
+
+RENT_WEIGHT = 1.5
+TYPE_WEIGHT = 1.0
+LOCATION_WEIGHT = 1.2
+TEXT_WEIGHT = 0.8
+
+RENT_FLOOR = math.log(1_000)
+RENT_CEIL = math.log(1_000_000)
+
+# refreshes re-read this far behind the watermark: a transaction that
+# commits late can carry an updated_at older than rows already seen
+WATERMARK_OVERLAP = timedelta(seconds=60)
+
+# the arrays and maps a rebuild swaps in as one unit
+STATE = ("matrix", "norms", "ids", "available", "size", "row_of", "locations", "postings", "watermark")
+
+
+def tokenize(text: str | None) -> list[str]:
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+@lru_cache(maxsize=65536)
+def _bucket(token: str, start: int, width: int) -> int:
+    # crc32 rather than hash(): stable across workers and restarts
+    return start + zlib.crc32(token.encode("utf-8")) % width
+
+
+# -------------------- POSTING LISTS --------------------
+
+class _Postings:
+    # Growable int32 array of matrix rows for one location token.
+
+    __slots__ = ("rows", "size")
+
+    def __init__(self):
+        self.rows = np.empty(8, dtype=np.int32)
+        self.size = 0
+
+    def append(self, row: int):
+        if self.size == len(self.rows):
+            self.rows = np.resize(self.rows, len(self.rows) * 2)
+        self.rows[self.size] = row
+        self.size += 1
+
+    def view(self) -> np.ndarray:
+        return self.rows[: self.size]
+
+
+# -------------------- INDEX --------------------
+
+class PropertyIndex:
+    # Dense feature matrix of every listing plus an inverted index from
+    # location token to rows. A query scores only rows that share a location
+    # token (capped to the rarest tokens), which keeps it well under a
+    # millisecond at hundreds of thousands of listings.
+
+    def __init__(self, dim: int = settings.RECOMMENDER_DIM, capacity: int = 1024):
+        self.dim = dim
+        self.location_width = max((dim - LOCATION_START) // 3, 1)
+        self.text_start = LOCATION_START + self.location_width
+        self.text_width = dim - self.text_start
+        self.max_candidates = settings.RECOMMENDER_MAX_CANDIDATES
+
+        self.matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self.norms = np.zeros(capacity, dtype=np.float32)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.available = np.zeros(capacity, dtype=bool)
+        self.size = 0
+        self.row_of: dict[int, int] = {}
+        self.locations: list[str | None] = []
+        self.postings: dict[str, _Postings] = {}
+
+        self.ready = False
+        self.watermark: datetime | None = None
+        self.refreshed_at = 0.0
+        self.rebuilt_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    # ---- encoding ----
+
+    def features(self, rent, property_type, location, title, description) -> dict[int, float]:
+        # Sparse {slot: value}; rows are written straight into the matrix
+        # without allocating a dense vector per listing.
+        rent = max(float(rent or 0), 1.0)
+        feats = {
+            RENT_SLOT: RENT_WEIGHT * min(max((math.log(rent) - RENT_FLOOR) / (RENT_CEIL - RENT_FLOOR), 0.0), 1.0)
+        }
+        if property_type is not None:
+            feats[TYPE_SLOTS[PropertyType(property_type)]] = TYPE_WEIGHT
+
+        self._hashed(feats, tokenize(location), LOCATION_START, self.location_width, LOCATION_WEIGHT)
+        self._hashed(feats, tokenize(title) + tokenize(description), self.text_start, self.text_width, TEXT_WEIGHT)
+        return feats
+
+    def encode(self, rent, property_type, location, title, description) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        feats = self.features(rent, property_type, location, title, description)
+        vec[list(feats)] = list(feats.values())
+        return vec
+
+    def _hashed(self, feats, tokens, start, width, weight):
+        if not tokens:
+            return
+        counts = {}
+        for token in tokens:
+            slot = _bucket(token, start, width)
+            counts[slot] = counts.get(slot, 0) + 1
+        scale = weight / math.sqrt(sum(c * c for c in counts.values()))
+        for slot, count in counts.items():
+            feats[slot] = count * scale
+
+    # ---- writes ----
+
+    def upsert(self, prop):
+        feats = self.features(prop.rent_amount, prop.property_type, prop.location, prop.title, prop.description)
+        available = prop.availability_status == AvailabilityStatus.AVAILABLE
+        with self._lock:
+            row = self.row_of.get(prop.id)
+            if row is None:
+                row = self._append_row(prop.id)
+            vec = self.matrix[row]
+            vec[:] = 0.0
+            vec[list(feats)] = list(feats.values())
+            self.norms[row] = sum(v * v for v in feats.values())
+            self.available[row] = available
+            if self.locations[row] != prop.location:
+                # old tokens keep pointing here; extra candidates are harmless
+                self.locations[row] = prop.location
+                for token in set(tokenize(prop.location)):
+                    self.postings.setdefault(token, _Postings()).append(row)
+
+    def remove(self, property_id: int):
+        with self._lock:
+            row = self.row_of.get(property_id)
+            if row is not None:
+                self.available[row] = False
+
+    def _append_row(self, property_id: int) -> int:
+        if self.size == len(self.ids):
+            capacity = len(self.ids) * 2
+            self.matrix = np.resize(self.matrix, (capacity, self.dim))
+            self.norms = np.resize(self.norms, capacity)
+            self.ids = np.resize(self.ids, capacity)
+            self.available = np.resize(self.available, capacity)
+            self.available[self.size :] = False
+        row = self.size
+        self.ids[row] = property_id
+        self.row_of[property_id] = row
+        self.locations.append(None)
+        self.size += 1
+        return row
+
+    # ---- reads ----
+
+    def similar(self, prop, k: int = settings.RECOMMENDER_TOP_K) -> list[int]:
+        if not self.ready or self.size == 0:
+            return []
+        self.maybe_refresh()
+
+        # upsert may grow (replace) the arrays and a rebuild swaps them all;
+        # hold the lock so one query sees a single consistent version
+        with self._lock:
+            return self._similar(prop, k)
+
+    def _similar(self, prop, k: int) -> list[int]:
+        row = self.row_of.get(prop.id)
+        if row is not None:
+            query = self.matrix[row]
+        else:
+            query = self.encode(prop.rent_amount, prop.property_type, prop.location, prop.title, prop.description)
+
+        candidates = self._candidates(tokenize(prop.location))
+        if candidates is None:
+            # no shared location token: fall back to the newest listings
+            candidates = np.arange(max(self.size - self.max_candidates, 0), self.size)
+        candidates = candidates[self.available[candidates]]
+        if row is not None:
+            candidates = candidates[candidates != row]
+        if len(candidates) == 0:
+            return []
+
+        # nearest by squared euclidean distance: |a|^2 - 2 a.q (|q|^2 is constant)
+        scores = self.norms[candidates] - 2.0 * (self.matrix[candidates] @ query)
+        # a row can sit in several posting lists, so over-fetch and dedupe
+        want = min(k * 3, len(candidates))
+        top = np.argpartition(scores, want - 1)[:want] if want < len(candidates) else np.arange(len(candidates))
+        top = top[np.argsort(scores[top], kind="stable")]
+        result = []
+        for prop_id in self.ids[candidates[top]].tolist():
+            if prop_id not in result:
+                result.append(prop_id)
+                if len(result) == k:
+                    break
+        return result
+
+    def _candidates(self, tokens: list[str]) -> np.ndarray | None:
+        # Rows sharing a location token, rarest token first and newest rows
+        # first within a token, up to max_candidates.
+        lists = [self.postings[t].view() for t in set(tokens) if t in self.postings]
+        if not lists:
+            return None
+        lists.sort(key=len)
+        picked, remaining = [], self.max_candidates
+        for rows in lists:
+            if remaining <= 0:
+                break
+            picked.append(rows[-remaining:])
+            remaining -= len(picked[-1])
+        return picked[0] if len(picked) == 1 else np.concatenate(picked)
+
+    # ---- (re)loading ----
+
+    def load(self, rows):
+        # rows: iterable of Property-like objects
+        latest = self.watermark
+        for prop in rows:
+            self.upsert(prop)
+            if prop.updated_at is not None and (latest is None or prop.updated_at > latest):
+                latest = prop.updated_at
+        self.watermark = latest
+        self.refreshed_at = time.monotonic()
+
+    def rebuild(self):
+        # Loads every listing into a fresh index and swaps it in, which also
+        # drops listings deleted by other processes.
+        from app.db.session import SessionLocal
+        from app.models.property import Property
+
+        started = time.perf_counter()
+        fresh = PropertyIndex(self.dim)
+        with SessionLocal() as db:
+            fresh.load(db.query(Property).yield_per(5_000))
+        with self._lock:
+            for name in STATE:
+                setattr(self, name, getattr(fresh, name))
+        self.refreshed_at = self.rebuilt_at = time.monotonic()
+        self.ready = True
+        logger.info("recommendation index: %d listings in %.2fs", self.size, time.perf_counter() - started)
+
+    def maybe_refresh(self):
+        # Pick up listings written by other workers (updated_at watermark) in
+        # the background, with a full rebuild every RECOMMENDER_REBUILD_SECONDS
+        # for deletions and anything the watermark missed.
+        if self._refreshing or time.monotonic() - self.refreshed_at < settings.RECOMMENDER_REFRESH_SECONDS:
+            return
+        self._refreshing = True
+        threading.Thread(target=self._refresh, daemon=True).start()
+
+    def _refresh(self):
+        from app.db.session import SessionLocal
+        from app.models.property import Property
+
+        try:
+            if time.monotonic() - self.rebuilt_at > settings.RECOMMENDER_REBUILD_SECONDS:
+                self.rebuild()
+                return
+            with SessionLocal() as db:
+                query = db.query(Property)
+                if self.watermark is not None:
+                    query = query.filter(Property.updated_at >= self.watermark - WATERMARK_OVERLAP)
+                self.load(query.yield_per(5_000))
+        except Exception:
+            logger.exception("recommendation refresh failed")
+            self.refreshed_at = time.monotonic()
+        finally:
+            self._refreshing = False
+
+    def start_background_rebuild(self):
+        threading.Thread(target=self.rebuild, daemon=True, name="recommender-rebuild").start()
+
+
+recommender = PropertyIndex()
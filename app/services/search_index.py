@@ -0,0 +1,188 @@
+import logging
+import math
+import threading
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.autocomplete import WORD_RE, normalize
+
+
+logger = logging.getLogger("app.search_index")
+
+MAX_KEY_LENGTH = 24     # longer query words are indexed by their first 24 chars
+BLOCK = 1024            # intervals per block in the skip list of max ends
+MERGE_AT = 512          # pending intervals before they are merged into the arrays
+
+
+def location_key(location: str | None) -> str | None:
+    # A saved location is a substring filter (ilike %q%), so any word in it
+    # lies inside one word of every matching listing. Index by the longest
+    # word: the most selective bucket.
+    words = WORD_RE.findall(normalize(location))
+    if not words:
+        return None
+    return max(words, key=len)[:MAX_KEY_LENGTH]
+
+
+def candidate_keys(location: str | None) -> set[str]:
+    # Every substring (up to MAX_KEY_LENGTH) of every word in a listing's
+    # location: the keys a matching saved search can be filed under.
+    keys = set()
+    for word in WORD_RE.findall(normalize(location)):
+        for start in range(len(word)):
+            for end in range(start + 1, min(len(word), start + MAX_KEY_LENGTH) + 1):
+                keys.add(word[start:end])
+    return keys
+
+
+# -------------------- RENT INTERVALS --------------------
+
+class RentIntervals:
+    # [min_rent, max_rent] of the saved searches in one bucket, answering
+    # "which ranges contain this rent?". Sorted by start in numpy arrays,
+    # with the max end per block of BLOCK rows so blocks that end below the
+    # rent are skipped; fresh intervals wait in a small pending list.
+
+    __slots__ = ("starts", "ends", "ids", "block_max", "pending")
+
+    def __init__(self):
+        self.starts = np.empty(0, dtype=np.float64)
+        self.ends = np.empty(0, dtype=np.float64)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.block_max = np.empty(0, dtype=np.float64)
+        self.pending: list[tuple[float, float, int]] = []
+
+    def add(self, search_id: int, low: float, high: float):
+        self.pending.append((low, high, search_id))
+        if len(self.pending) >= MERGE_AT:
+            self.merge()
+
+    def merge(self):
+        if not self.pending:
+            return
+        low, high, ids = zip(*self.pending)
+        starts = np.concatenate([self.starts, np.array(low, dtype=np.float64)])
+        ends = np.concatenate([self.ends, np.array(high, dtype=np.float64)])
+        ids = np.concatenate([self.ids, np.array(ids, dtype=np.int64)])
+        order = np.argsort(starts, kind="stable")
+        self.starts, self.ends, self.ids = starts[order], ends[order], ids[order]
+        self.block_max = np.maximum.reduceat(self.ends, np.arange(0, len(self.ends), BLOCK))
+        self.pending = []
+
+    def stab(self, rent: float) -> np.ndarray:
+        upto = int(np.searchsorted(self.starts, rent, side="right"))
+        parts = []
+        if upto:
+            blocks = np.flatnonzero(self.block_max[: (upto + BLOCK - 1) // BLOCK] >= rent)
+            for b in blocks.tolist():
+                lo, hi = b * BLOCK, min((b + 1) * BLOCK, upto)
+                parts.append(self.ids[lo:hi][self.ends[lo:hi] >= rent])
+        if self.pending:
+            parts.append(np.array([i for low, high, i in self.pending if low <= rent <= high], dtype=np.int64))
+        if not parts:
+            return self.ids[:0]
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def __len__(self):
+        return len(self.ids) + len(self.pending)
+
+
+# -------------------- REVERSE INDEX --------------------
+
+class SavedSearchIndex:
+    # Saved searches filed by (property type or None, location key or None),
+    # each bucket a RentIntervals. A listing is checked against only the
+    # buckets its type and location words can reach, and within those only
+    # the rent ranges that contain its rent.
+
+    def __init__(self):
+        self.buckets: dict[tuple[str | None, str | None], RentIntervals] = {}
+        # full phrase for searches whose location is more than their key
+        self.phrases: dict[int, str] = {}
+        self.size = 0
+        self.last_id = 0
+        self.built_at: float | None = None
+        self._lock = threading.Lock()
+
+    # ---- writes ----
+
+    def add(self, search):
+        with self._lock:
+            self._add(search)
+
+    def _add(self, search):
+        ptype = search.property_type.value if search.property_type is not None else None
+        key = location_key(search.location)
+        low = float(search.min_rent) if search.min_rent is not None else -math.inf
+        high = float(search.max_rent) if search.max_rent is not None else math.inf
+        self.buckets.setdefault((ptype, key), RentIntervals()).add(search.id, low, high)
+        # a location with no words ("--") has no key but is still a filter
+        phrase = normalize(search.location)
+        if phrase and phrase != key:
+            self.phrases[search.id] = phrase
+        self.size += 1
+        self.last_id = max(self.last_id, search.id)
+
+    # ---- reads ----
+
+    def match(self, prop) -> list[int]:
+        # ids of saved searches the listing satisfies, by the same rules as
+        # the pages.home filters
+        rent = float(prop.rent_amount)
+        types = (prop.property_type.value, None)
+        location = normalize(prop.location)
+        keys = [None, *candidate_keys(prop.location)]
+
+        found = []
+        with self._lock:
+            for ptype in types:
+                for key in keys:
+                    bucket = self.buckets.get((ptype, key))
+                    if bucket is not None:
+                        found.append(bucket.stab(rent))
+            if not found:
+                return []
+            ids = np.concatenate(found).tolist()
+            phrases = self.phrases
+            return [i for i in ids if i not in phrases or phrases[i] in location]
+
+    def __len__(self):
+        return self.size
+
+    # ---- (re)loading ----
+
+    def load(self, rows):
+        with self._lock:
+            self._load(rows)
+
+    def _load(self, rows):
+        for search in rows:
+            self._add(search)
+        for bucket in self.buckets.values():
+            bucket.merge()
+
+    def refresh(self, db):
+        # Called before each match: a full rebuild every
+        # SEARCH_INDEX_REBUILD_SECONDS (drops deleted searches), otherwise
+        # just the searches saved since the last one seen.
+        from app.models.search import SavedSearch
+
+        if self.built_at is None or time.monotonic() - self.built_at > settings.SEARCH_INDEX_REBUILD_SECONDS:
+            started = time.perf_counter()
+            fresh = SavedSearchIndex()
+            fresh.load(db.query(SavedSearch).order_by(SavedSearch.id).yield_per(10_000))
+            with self._lock:
+                self.buckets, self.phrases = fresh.buckets, fresh.phrases
+                self.size, self.last_id = fresh.size, fresh.last_id
+                self.built_at = time.monotonic()
+            logger.info("saved search index: %d searches in %.2fs", len(self), time.perf_counter() - started)
+            return
+        # under the lock, so concurrent refreshes can't both read the same
+        # last_id and file the new searches twice
+        with self._lock:
+            self._load(db.query(SavedSearch).filter(SavedSearch.id > self.last_id).order_by(SavedSearch.id))
+
+
+search_index = SavedSearchIndex()
@@ -0,0 +1,174 @@
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from starlette.requests import Request
+
+from app.core.config import settings
+
+
+logger = logging.getLogger("app.static_pages")
+
+# Anonymous visitors all see the same property page, so it is rendered once
+# per listing change instead of on every view: each write queues a
+# render_property_page job and the job worker writes the file. Files live in
+# STATIC_PAGES_DIR, outside the /static mount (a front proxy can serve
+# <dir>/<id>.html straight off disk); tenants.property_detail returns them
+# for anonymous requests and renders dynamically when the file is missing.
+# The web and job processes must share this directory.
+
+TEMPLATE = "tenant/property_detail.html"
+
+
+def pages_dir() -> Path:
+    return Path(settings.STATIC_PAGES_DIR)
+
+
+def page_path(property_id: int) -> Path:
+    return pages_dir() / f"{property_id}.html"
+
+
+def _anonymous_request(property_id: int) -> Request:
+    # the request the page would have been rendered for: no cookies, an empty
+    # session
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "scheme": "http",
+        "path": f"/tenant/properties/{property_id}",
+        "raw_path": f"/tenant/properties/{property_id}".encode(),
+        "query_string": b"",
+        "headers": [],
+        "session": {},
+    })
+
+
+# -------------------- RENDER / WRITE --------------------
+
+def render(prop, similar: list) -> str:
+    from app.main import templates
+
+    return templates.get_template(TEMPLATE).render(
+        request=_anonymous_request(prop.id),
+        property=prop,
+        current_user=None,
+        similar=similar,
+        flash=None,
+    )
+
+
+def write(property_id: int, html: str):
+    # write-then-rename: readers see the old page or the new one, never half
+    pages_dir().mkdir(parents=True, exist_ok=True)
+    path = page_path(property_id)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(html, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def remove(property_id: int):
+    if settings.STATIC_PAGES_ENABLED:
+        page_path(property_id).unlink(missing_ok=True)
+
+
+def publish(db, prop, similar_ids: list[int] | None = None):
+    # Renders the anonymous page for `prop`; similar listings come from the
+    # in-process recommender unless the caller already has them.
+    if not settings.STATIC_PAGES_ENABLED:
+        return
+    from app.models.property import Property
+    from app.services.recommendations import recommender
+
+    if similar_ids is None:
+        similar_ids = recommender.similar(prop)
+    similar = []
+    if similar_ids:
+        found = {p.id: p for p in db.query(Property).filter(Property.id.in_(similar_ids))}
+        similar = [found[i] for i in similar_ids if i in found]
+    write(prop.id, render(prop, similar))
+
+
+# -------------------- BULK REGENERATE --------------------
+
+def _init_worker():
+    # forked workers must not reuse the parent's pooled connections
+    from app.db.session import engine
+
+    engine.dispose(close=False)
+
+
+def _render_batch(batch: list[tuple[int, list[int]]]) -> int:
+    from app.db.session import SessionLocal
+    from app.models.property import Property
+
+    similar_of = dict(batch)
+    with SessionLocal() as db:
+        props = db.query(Property).filter(Property.id.in_(similar_of)).all()
+        for prop in props:
+            publish(db, prop, similar_of[prop.id])
+    return len(props)
+
+
+def regenerate_all(workers: int, batch_size: int = 500) -> dict:
+    # Similar listings are computed here from one recommender index; the
+    # rendering and file writes are spread over `workers` processes.
+    from app.core.lifespan import warm_templates
+    from app.db.session import SessionLocal
+    from app.main import templates
+    from app.models.property import Property
+    from app.services.recommendations import recommender
+
+    started = time.perf_counter()
+    # maps every model and compiles the templates once, before forking
+    warm_templates(templates)
+    recommender.rebuild()
+    with SessionLocal() as db:
+        batch, batches = [], []
+        for prop in db.query(Property).order_by(Property.id).yield_per(5_000):
+            batch.append((prop.id, recommender.similar(prop)))
+            if len(batch) == batch_size:
+                batches.append(batch)
+                batch = []
+        if batch:
+            batches.append(batch)
+
+    written = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for count in pool.map(_render_batch, batches):
+            written += count
+
+    # pages of listings deleted while nobody was watching
+    live = {prop_id for batch in batches for prop_id, _ in batch}
+    pruned = 0
+    for path in pages_dir().glob("*.html"):
+        if path.stem.isdigit() and int(path.stem) not in live:
+            path.unlink(missing_ok=True)
+            pruned += 1
+
+    return {
+        "written": written,
+        "pruned": pruned,
+        "workers": workers,
+        "elapsed_s": round(time.perf_counter() - started, 2),
+    }
+
+
+# -------------------- CLI --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate every pre-rendered property page.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if not settings.STATIC_PAGES_ENABLED:
+        raise SystemExit("STATIC_PAGES_ENABLED is off")
+    print(json.dumps(regenerate_all(args.workers, args.batch_size)))
+
+
+if __name__ == "__main__":
+    main()
@@ -15,3 +15,116 @@ document.addEventListener("DOMContentLoaded", () => {
     );
   });
 });
+
+// Location autocomplete: fills the <datalist> from /locations/suggest
+document.addEventListener("DOMContentLoaded", () => {
+  document.querySelectorAll("input[data-suggest-url]").forEach((input) => {
+    const list = document.getElementById(input.getAttribute("list"));
+    if (!list) return;
+    let timer = null;
+    let controller = null;
+
+    input.addEventListener("input", () => {
+      clearTimeout(timer);
+      const q = input.value.trim();
+      if (q.length < 1) {
+        list.replaceChildren();
+        return;
+      }
+      timer = setTimeout(async () => {
+        if (controller) controller.abort();
+        controller = new AbortController();
+        try {
+          const url = `${input.dataset.suggestUrl}?q=${encodeURIComponent(q)}`;
+          const response = await fetch(url, { signal: controller.signal });
+          if (!response.ok) return;
+          const data = await response.json();
+          list.replaceChildren(
+            ...data.suggestions.map((s) => {
+              const option = document.createElement("option");
+              option.value = s.term;
+              option.label = `${s.term} (${s.count})`;
+              return option;
+            }),
+          );
+        } catch (err) {
+          if (err.name !== "AbortError") console.error(err);
+        }
+      }, 120);
+    });
+  });
+});
+
+// Live updates: patches payment, property and alert tables from /events/stream
+document.addEventListener("DOMContentLoaded", () => {
+  const url = document.body.dataset.eventsUrl;
+  const tables = document.querySelectorAll("tbody[data-live]");
+  if (!url || tables.length === 0 || !window.EventSource) return;
+
+  const upsertRow = (tbody, key, fields, columns) => {
+    let row = tbody.querySelector(`tr[data-key="${CSS.escape(key)}"]`);
+    if (!row) {
+      tbody.querySelector("tr[data-empty]")?.remove();
+      row = document.createElement("tr");
+      row.dataset.key = key;
+      columns.forEach((name) => {
+        const cell = document.createElement("td");
+        cell.dataset.field = name;
+        row.appendChild(cell);
+      });
+      tbody.prepend(row);
+    }
+    Object.entries(fields).forEach(([name, value]) => {
+      const cell = row.querySelector(`[data-field="${name}"]`);
+      if (cell && value !== null && value !== undefined) cell.textContent = value;
+    });
+    row.classList.remove("table-info");
+    void row.offsetWidth;
+    row.classList.add("table-info");
+    setTimeout(() => row.classList.remove("table-info"), 2000);
+  };
+
+  const source = new EventSource(url);
+
+  source.addEventListener("payment", (message) => {
+    const p = JSON.parse(message.data);
+    tables.forEach((tbody) => {
+      if (tbody.dataset.live === "payments" && tbody.dataset.propertyId === String(p.property_id)) {
+        upsertRow(tbody, `${p.tenant_id}:${p.month}`, p, ["tenant_id", "tenant_name", "month", "amount", "status"]);
+      } else if (tbody.dataset.live === "rent-history") {
+        upsertRow(tbody, `${p.property_id}:${p.month}`, p, ["property_title", "month", "amount", "status"]);
+      }
+    });
+  });
+
+  source.addEventListener("property", (message) => {
+    const p = JSON.parse(message.data);
+    tables.forEach((tbody) => {
+      if (tbody.dataset.live !== "owner-properties") return;
+      const row = tbody.querySelector(`tr[data-key="${CSS.escape(String(p.id))}"]`);
+      if (p.action === "removed") {
+        row?.remove();
+      } else if (row) {
+        upsertRow(tbody, String(p.id), p, []);
+      } else {
+        // new listing from another tab: its action buttons need a server render
+        window.location.reload();
+      }
+    });
+  });
+
+  source.addEventListener("alert", (message) => {
+    const a = JSON.parse(message.data);
+    tables.forEach((tbody) => {
+      if (tbody.dataset.live !== "alerts") return;
+      upsertRow(tbody, String(a.property_id), { ...a, found: "just now" }, ["title", "location", "rent_amount", "found"]);
+      const title = tbody.querySelector(`tr[data-key="${CSS.escape(String(a.property_id))}"] [data-field="title"]`);
+      const link = document.createElement("a");
+      link.href = `/tenant/properties/${a.property_id}`;
+      link.textContent = a.title;
+      title.replaceChildren(link);
+    });
+  });
+
+  window.addEventListener("pagehide", () => source.close());
+});
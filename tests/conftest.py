@@ -0,0 +1,30 @@
+import os
+import tempfile
+
+# Settings are read when app.core.config is imported: point the app at a
+# throwaway SQLite database (and keep the optional background features off)
+# before any test module imports from app/.
+_tmp = tempfile.mkdtemp(prefix="house-rent-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/test.db"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ["LISTING_SNAPSHOT_DIR"] = ""
+os.environ["STATIC_PAGES_ENABLED"] = "false"
+os.environ["JOBS_EAGER"] = "false"
+
+import pytest
+
+from app.db.init_db import init_db
+from app.db.session import SessionLocal
+
+
+init_db()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
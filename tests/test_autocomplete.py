@@ -0,0 +1,60 @@
+from app.services import autocomplete
+from app.services.autocomplete import LocationIndex, location_terms
+
+
+def test_location_terms():
+    assert location_terms("  Mirpur,  Dhaka ") == {"mirpur, dhaka", "mirpur", "dhaka"}
+    assert location_terms(None) == set()
+
+
+def test_suggest_orders_by_count_then_alphabetically():
+    index = LocationIndex()
+    index.load([("Mirpur, Dhaka", 3), ("Mohammadpur, Dhaka", 3), ("Motijheel", 5)])
+
+    assert index.suggest("m", limit=3) == [("motijheel", 5), ("mirpur", 3), ("mirpur, dhaka", 3)]
+    assert index.suggest("dha") == [("dhaka", 6)]
+    assert index.suggest("  ") == []
+
+
+def test_writes_invalidate_cached_suggestions():
+    index = LocationIndex()
+    index.load([("Banani", 1)])
+    assert index.suggest("ban") == [("banani", 1)]
+
+    index.add("Banasree")
+    index.add("Banasree")
+    assert index.suggest("ban") == [("banasree", 2), ("banani", 1)]
+
+    index.remove("Banani")
+    assert index.cache_size() == 0
+    assert index.suggest("ban") == [("banasree", 2)]
+    assert index.cache_size() == 1
+
+
+def test_overflow_evicts_the_least_used_terms():
+    index = LocationIndex(max_terms=10)
+    index.load([(f"area{n}", n + 1) for n in range(10)])
+    index.add("area10", 100)
+
+    assert len(index) == 10
+    assert index.suggest("area0") == []
+    assert index.suggest("area10") == [("area10", 100)]
+
+
+def test_maybe_rebuild_starts_one_rebuild_at_a_time(monkeypatch):
+    started = []
+
+    class Thread:
+        def __init__(self, target, **kwargs):
+            self.target = target
+
+        def start(self):
+            started.append(self.target)
+
+    monkeypatch.setattr(autocomplete.threading, "Thread", Thread)
+    index = LocationIndex()
+
+    index.maybe_rebuild()
+    index.maybe_rebuild()
+    assert len(started) == 1
+    assert index._rebuilding
@@ -0,0 +1,33 @@
+import pytest
+
+from app.core import compression
+from app.core.compression import choose_encoding
+
+
+@pytest.fixture
+def with_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object())
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip, deflate, br", "br"),
+        ("br;q=0.1, gzip", "gzip"),
+        ("gzip;q=0.5, br;q=0.8", "br"),
+        ("br;q=0, gzip;q=0", None),
+        ("identity", None),
+        ("*", "br"),
+        ("gzip;q=0.2, *;q=0.5", "br"),
+        ("br;q=0, *", "gzip"),
+        ("", None),
+    ],
+)
+def test_choose_encoding_follows_q_values(with_brotli, header, expected):
+    assert choose_encoding(header) == expected
+
+
+def test_choose_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding("br, gzip;q=0.1") == "gzip"
+    assert choose_encoding("br") is None
@@ -0,0 +1,136 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.jobs import queue as jobs
+from app.models.job import Job, JobStatus, utcnow
+
+
+@pytest.fixture
+def queue_name():
+    # every test gets its own queue, so claims never see another test's jobs
+    return f"test-{uuid.uuid4().hex[:8]}"
+
+
+def _enqueue(db, queue_name, max_attempts=3) -> int:
+    job = jobs.enqueue(db, "noop", {"n": 1}, queue=queue_name, max_attempts=max_attempts)
+    db.commit()
+    return job.id
+
+
+def _age_claim(db, job_id: int, seconds: int = 3600):
+    db.execute(update(Job).where(Job.id == job_id).values(locked_at=utcnow() - timedelta(seconds=seconds)))
+    db.commit()
+
+
+def _job(db, job_id: int) -> Job:
+    db.expire_all()
+    return db.get(Job, job_id)
+
+
+# -------------------- CLAIM / COMPLETE --------------------
+
+def test_claim_then_complete(db, queue_name):
+    job_id = _enqueue(db, queue_name)
+
+    claimed = jobs.claim_batch(db, "w1", queue_name)
+    assert [(j.id, j.task, j.payload, j.attempts, j.worker_id) for j in claimed] == [(job_id, "noop", {"n": 1}, 1, "w1")]
+    assert jobs.claim_batch(db, "w2", queue_name) == []
+
+    assert jobs.complete(db, claimed[0]) == JobStatus.DONE
+    job = _job(db, job_id)
+    assert job.status == JobStatus.DONE and job.locked_by is None
+
+
+def test_delayed_job_is_not_claimed_early(db, queue_name):
+    jobs.enqueue(db, "noop", queue=queue_name, delay=3600)
+    db.commit()
+    assert jobs.claim_batch(db, "w1", queue_name) == []
+
+
+def test_fail_backs_off_then_dead_letters(db, queue_name):
+    job_id = _enqueue(db, queue_name, max_attempts=2)
+
+    first = jobs.claim_batch(db, "w1", queue_name)[0]
+    assert jobs.fail(db, first, "boom") == JobStatus.QUEUED
+    job = _job(db, job_id)
+    assert job.last_error == "boom" and job.locked_by is None
+    assert jobs.claim_batch(db, "w1", queue_name) == []     # still backing off
+
+    db.execute(update(Job).where(Job.id == job_id).values(run_at=utcnow()))
+    db.commit()
+    second = jobs.claim_batch(db, "w1", queue_name)[0]
+    assert second.attempts == 2
+    assert jobs.fail(db, second, "boom again") == JobStatus.DEAD
+    assert _job(db, job_id).status == JobStatus.DEAD
+
+
+# -------------------- LOST CLAIMS --------------------
+
+def test_outcome_of_a_lost_claim_is_ignored(db, queue_name):
+    job_id = _enqueue(db, queue_name)
+    stalled = jobs.claim_batch(db, "w1", queue_name)[0]
+
+    # w1 stalls past the visibility timeout; the job is requeued and w2 takes it
+    _age_claim(db, job_id)
+    jobs.requeue_stale(db, timeout=60)
+    current = jobs.claim_batch(db, "w2", queue_name)[0]
+    assert current.id == job_id and current.attempts == 2
+
+    assert jobs.complete(db, stalled) is None
+    assert jobs.fail(db, stalled, "late failure") is None
+    job = _job(db, job_id)
+    assert job.status == JobStatus.RUNNING and job.locked_by == "w2"
+
+    assert jobs.complete(db, current) == JobStatus.DONE
+
+
+def test_requeue_stale_requeues_with_attempts_left(db, queue_name):
+    job_id = _enqueue(db, queue_name, max_attempts=3)
+    jobs.claim_batch(db, "w1", queue_name)
+    _age_claim(db, job_id)
+
+    requeued, dead = jobs.requeue_stale(db, timeout=60)
+    assert (requeued, dead) == (1, 0)
+    job = _job(db, job_id)
+    assert job.status == JobStatus.QUEUED and job.attempts == 1 and job.last_error == jobs.STALE_ERROR
+
+
+def test_requeue_stale_dead_letters_exhausted_jobs(db, queue_name):
+    job_id = _enqueue(db, queue_name, max_attempts=1)
+    jobs.claim_batch(db, "w1", queue_name)
+    _age_claim(db, job_id)
+
+    requeued, dead = jobs.requeue_stale(db, timeout=60)
+    assert (requeued, dead) == (0, 1)
+    job = _job(db, job_id)
+    assert job.status == JobStatus.DEAD and job.locked_by is None
+    assert jobs.claim_batch(db, "w1", queue_name) == []
+
+
+def test_requeue_stale_leaves_fresh_claims(db, queue_name):
+    job_id = _enqueue(db, queue_name)
+    claimed = jobs.claim_batch(db, "w1", queue_name)[0]
+
+    assert jobs.requeue_stale(db, timeout=60) == (0, 0)
+    assert _job(db, job_id).status == JobStatus.RUNNING
+    jobs.complete(db, claimed)
+
+
+def test_eager_jobs_wait_for_the_commit(db, monkeypatch):
+    from app.jobs import tasks
+
+    ran = []
+    monkeypatch.setattr(jobs.settings, "JOBS_EAGER", True)
+    monkeypatch.setitem(tasks.TASKS, "record", lambda job_db, n: ran.append(n))
+
+    assert jobs.enqueue(db, "record", {"n": 1}) is None
+    db.rollback()
+    assert ran == []
+
+    jobs.enqueue(db, "record", {"n": 2})
+    assert ran == []
+    db.commit()
+    assert ran == [2]
@@ -0,0 +1,76 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.property import AvailabilityStatus, Property, PropertyType
+from app.models.user import User, UserRole
+from app.services.listing_snapshot import ListingSnapshot, _Columns
+
+
+@pytest.fixture
+def owner(db):
+    user = User(full_name="O", email=f"{uuid.uuid4().hex}@example.com", phone="0", hashed_password="x", role=UserRole.OWNER)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def _listing(db, owner, updated_at, rent=1000, location="Mirpur, Dhaka") -> Property:
+    prop = Property(
+        owner_id=owner.id, title="Flat", description="x", location=location, rent_amount=rent,
+        property_type=PropertyType.APARTMENT, created_at=updated_at, updated_at=updated_at,
+    )
+    db.add(prop)
+    db.commit()
+    return prop
+
+
+def _row(prop_id, updated_at, rent=1000.0):
+    return (prop_id, rent, PropertyType.APARTMENT, AvailabilityStatus.AVAILABLE, updated_at, updated_at, "mirpur")
+
+
+# -------------------- MERGE --------------------
+
+def test_merge_skips_rows_it_already_has():
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    state = _Columns()
+    assert state.merge([_row(1, now), _row(2, now)])
+    assert not state.merge([_row(1, now), _row(2, now)])
+    assert state.merge([_row(2, now, rent=2000.0)])
+    assert state.arrays["rent"][state.arrays["ids"] == 2].tolist() == [2000.0]
+
+
+def test_merge_takes_late_rows_behind_the_watermark():
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    state = _Columns()
+    state.merge([_row(1, now)])
+    # committed after row 1, stamped before it
+    assert state.merge([_row(1, now), _row(2, now - timedelta(seconds=5))])
+    assert sorted(state.arrays["ids"].tolist()) == [1, 2]
+    assert state.watermark == now
+
+
+# -------------------- REFRESH --------------------
+
+def test_refresh_picks_up_late_commits(db, owner, tmp_path):
+    snapshot = ListingSnapshot(str(tmp_path))
+    snapshot.directory.mkdir(parents=True, exist_ok=True)
+    state = _Columns()
+    now = datetime.now(timezone.utc)
+
+    first = _listing(db, owner, now)
+    snapshot._refresh(state, force=True)
+
+    # transactions that started before `first` was written but committed after
+    late = [_listing(db, owner, now - timedelta(seconds=s)) for s in (2, 5)]
+    snapshot._refresh(state)
+
+    ids = set(snapshot.query(location="mirpur"))
+    assert {first.id, *(p.id for p in late)} <= ids
+
+    # and a change to a row already in the snapshot
+    late[0].rent_amount = 99_999
+    db.commit()
+    snapshot._refresh(state)
+    assert late[0].id in snapshot.query(min_rent=99_000)
@@ -0,0 +1,66 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.db import replicas as replica_pool
+from app.db.replicas import PIN_KEY, Replica, pick_sessionmaker
+from app.db.session import SessionLocal
+
+
+@pytest.fixture
+def pool(monkeypatch, tmp_path):
+    # two SQLite "replicas"; lag checks run on every call
+    monkeypatch.setattr(replica_pool.settings, "REPLICA_LAG_CHECK_INTERVAL", 0)
+    monkeypatch.setattr(replica_pool.settings, "REPLICA_MAX_LAG_SECONDS", 5.0)
+    pool = [Replica(f"sqlite:///{tmp_path}/r{n}.db") for n in range(2)]
+    monkeypatch.setattr(replica_pool, "replicas", pool)
+    yield pool
+    for replica in pool:
+        replica.engine.dispose()
+
+
+def _request(**session):
+    return SimpleNamespace(session=session)
+
+
+def _lagging(replica, monkeypatch, lag=None):
+    # lag=None: the probe fails as if the replica were down
+    def measure():
+        if lag is None:
+            raise OSError("connection refused")
+        return lag
+    monkeypatch.setattr(replica, "_measure_lag", measure)
+
+
+def test_reads_rotate_over_healthy_replicas(pool):
+    picked = {pick_sessionmaker(_request()) for _ in range(4)}
+    assert picked == {r.SessionLocal for r in pool}
+
+
+def test_lagging_or_unreachable_replica_is_skipped(pool, monkeypatch):
+    _lagging(pool[0], monkeypatch, lag=30.0)
+    assert {pick_sessionmaker(_request()) for _ in range(4)} == {pool[1].SessionLocal}
+
+    _lagging(pool[1], monkeypatch)
+    assert pick_sessionmaker(_request()) is SessionLocal
+    assert not pool[1].healthy
+
+
+def test_replica_is_used_again_once_it_catches_up(pool, monkeypatch):
+    for replica in pool:
+        _lagging(replica, monkeypatch, lag=30.0)
+    assert pick_sessionmaker(_request()) is SessionLocal
+
+    _lagging(pool[0], monkeypatch, lag=0.5)
+    assert pick_sessionmaker(_request()) is pool[0].SessionLocal
+
+
+def test_recent_writer_reads_from_the_primary(pool):
+    assert pick_sessionmaker(_request(**{PIN_KEY: time.time() + 10})) is SessionLocal
+    assert pick_sessionmaker(_request(**{PIN_KEY: time.time() - 10})) is not SessionLocal
+
+
+def test_no_replicas_means_primary(monkeypatch):
+    monkeypatch.setattr(replica_pool, "replicas", [])
+    assert pick_sessionmaker(_request()) is SessionLocal
@@ -0,0 +1,57 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.search import SavedSearch
+from app.models.user import User
+
+
+@pytest.fixture
+def tenant():
+    # a freshly registered tenant; /register signs the client in
+    email = f"{uuid.uuid4().hex}@example.com"
+    with TestClient(app) as client:
+        client.post("/register", data=dict(full_name="T", email=email, phone="1", password="secret1"))
+        yield client, email
+
+
+def _saved(db, email: str) -> list[SavedSearch]:
+    tenant_id = db.query(User.id).filter(User.email == email).scalar()
+    return db.query(SavedSearch).filter(SavedSearch.tenant_id == tenant_id).all()
+
+
+def _form(**fields) -> dict:
+    return {"location": "", "min_rent": "", "max_rent": "", "property_type": "", **fields}
+
+
+def test_valid_search_is_saved(db, tenant):
+    client, email = tenant
+    r = client.post("/tenant/searches", data=_form(location="  Mirpur ", max_rent="2000", property_type="apartment"))
+    assert "Search saved" in r.text
+
+    [search] = _saved(db, email)
+    assert (search.location, search.min_rent, search.max_rent) == ("Mirpur", None, 2000)
+    assert search.property_type.value == "apartment"
+
+
+@pytest.mark.parametrize(
+    "fields, message",
+    [
+        (dict(min_rent="cheap"), "Rent limits must be numbers."),
+        (dict(max_rent="nan"), "Rent limits must be between"),
+        (dict(max_rent="inf"), "Rent limits must be between"),
+        (dict(min_rent="-1"), "Rent limits must be between"),
+        (dict(max_rent="100000000"), "Rent limits must be between"),
+        (dict(min_rent="5000", max_rent="1000"), "Minimum rent cannot be above maximum rent."),
+        (dict(property_type="castle"), "Unknown property type."),
+        (dict(location="x" * 256), "Location is too long."),
+        (dict(location=" -- "), "Location must contain a letter or a digit."),
+    ],
+)
+def test_invalid_search_is_rejected(db, tenant, fields, message):
+    client, email = tenant
+    r = client.post("/tenant/searches", data=_form(**fields))
+    assert r.status_code == 200 and message in r.text
+    assert _saved(db, email) == []
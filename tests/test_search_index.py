@@ -0,0 +1,74 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from app.models.property import PropertyType
+from app.services.search_index import SavedSearchIndex
+
+
+def _search(id, location=None, min_rent=None, max_rent=None, property_type=None):
+    return SimpleNamespace(
+        id=id, location=location, min_rent=min_rent, max_rent=max_rent, property_type=property_type,
+    )
+
+
+def _listing(location, rent, property_type=PropertyType.APARTMENT):
+    return SimpleNamespace(location=location, rent_amount=rent, property_type=property_type)
+
+
+def test_match_applies_every_filter():
+    index = SavedSearchIndex()
+    index.load([
+        _search(1),
+        _search(2, location="Mirpur"),
+        _search(3, location="mirpur, dhaka"),
+        _search(4, location="Gulshan"),
+        _search(5, max_rent=1000),
+        _search(6, property_type=PropertyType.HOUSE),
+        _search(7, location="pur", min_rent=1000, max_rent=3000),
+    ])
+
+    assert sorted(index.match(_listing("Mirpur, Dhaka", 2000))) == [1, 2, 3, 7]
+    assert sorted(index.match(_listing("Mirpur 10", 500))) == [1, 2, 5]
+
+
+def test_wordless_location_only_matches_itself():
+    index = SavedSearchIndex()
+    index.load([_search(1, location="--")])
+
+    assert index.match(_listing("Mirpur", 1000)) == []
+    assert index.match(_listing("Block C--D", 1000)) == [1]
+
+
+class _Query:
+    # the slice of Query that refresh() uses, over a fixed list of searches
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, clause):
+        last_id = clause.right.value
+        return _Query([r for r in self.rows if r.id > last_id])
+
+    def order_by(self, *args):
+        return self
+
+    def __iter__(self):
+        time.sleep(0.01)    # a slow query: the other refreshes catch up
+        return iter(self.rows)
+
+
+def test_concurrent_refreshes_add_each_search_once():
+    index = SavedSearchIndex()
+    index.load([_search(1)])
+    index.built_at = float("inf")   # incremental path only
+
+    rows = [_search(n) for n in range(1, 51)]
+    db = SimpleNamespace(query=lambda model: _Query(rows))
+    threads = [threading.Thread(target=index.refresh, args=(db,)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(index) == 50
+    assert sorted(index.match(_listing("Anywhere", 1))) == list(range(1, 51))
@@ -0,0 +1,114 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.db import upsert
+from app.models.property import PaymentStatus, Property, PropertyType, RentPayment
+from app.models.search import SavedSearch, SearchAlert
+from app.models.user import User, UserRole
+
+
+@pytest.fixture(params=["on_conflict", "fallback"])
+def dialect(request, monkeypatch):
+    # every helper runs twice: with INSERT ... ON CONFLICT, and with the
+    # select-then-insert path other backends get
+    if request.param == "fallback":
+        monkeypatch.setattr(upsert, "ON_CONFLICT_INSERTS", {})
+    return request.param
+
+
+def _user(db, role: UserRole) -> User:
+    user = User(
+        full_name="Test", email=f"{uuid.uuid4().hex}@example.com", phone="0", hashed_password="x", role=role
+    )
+    db.add(user)
+    db.flush()
+    return user
+
+
+@pytest.fixture
+def listing(db):
+    owner = _user(db, UserRole.OWNER)
+    tenant = _user(db, UserRole.TENANT)
+    prop = Property(
+        owner_id=owner.id, title="Flat", description="Two bed", location="Mirpur, Dhaka",
+        rent_amount=1000, property_type=PropertyType.APARTMENT,
+    )
+    db.add(prop)
+    db.commit()
+    return prop, tenant
+
+
+# -------------------- PAYMENTS --------------------
+
+def test_upsert_payment_updates_the_existing_month(db, dialect, listing):
+    prop, tenant = listing
+    month = date(2025, 10, 1)
+
+    first = upsert.upsert_payment(db, prop.id, tenant.id, month, 1200, PaymentStatus.PENDING)
+    second = upsert.upsert_payment(db, prop.id, tenant.id, month, 1300, PaymentStatus.PAID)
+    db.commit()
+
+    assert first.id == second.id
+    assert (second.tenant_name, second.property_title) == (tenant.full_name, prop.title)
+    db.expire_all()
+    rows = db.query(RentPayment).filter(RentPayment.property_id == prop.id).all()
+    assert [(r.amount, r.status) for r in rows] == [(Decimal("1300.00"), PaymentStatus.PAID)]
+
+
+def test_upsert_payment_keeps_months_apart(db, dialect, listing):
+    prop, tenant = listing
+    ids = {
+        upsert.upsert_payment(db, prop.id, tenant.id, date(2025, m, 1), 1000, PaymentStatus.PAID).id
+        for m in (1, 2, 3)
+    }
+    db.commit()
+    assert len(ids) == 3
+
+
+# -------------------- USERS --------------------
+
+def test_insert_user_if_absent(db, dialect):
+    email = f"{uuid.uuid4().hex}@example.com"
+    user_id = upsert.insert_user_if_absent(db, "A", email, "1", "hash", UserRole.TENANT)
+    db.commit()
+    assert user_id is not None
+
+    assert upsert.insert_user_if_absent(db, "B", email, "2", "other", UserRole.OWNER) is None
+    db.commit()
+    db.expire_all()
+    users = db.query(User).filter(User.email == email).all()
+    assert [(u.id, u.full_name) for u in users] == [(user_id, "A")]
+
+
+# -------------------- SEARCH ALERTS --------------------
+
+def test_insert_alerts_once_per_search(db, dialect, listing):
+    prop, tenant = listing
+    other = _user(db, UserRole.TENANT)
+    searches = [SavedSearch(tenant_id=tenant.id), SavedSearch(tenant_id=tenant.id), SavedSearch(tenant_id=other.id)]
+    db.add_all(searches)
+    db.commit()
+    ids = [s.id for s in searches]
+
+    assert upsert.insert_alerts(db, prop.id, ids) == {tenant.id, other.id}
+    db.commit()
+    assert upsert.insert_alerts(db, prop.id, ids) == set()
+    db.commit()
+
+    alerts = db.query(SearchAlert).filter(SearchAlert.property_id == prop.id).all()
+    assert sorted(a.saved_search_id for a in alerts) == sorted(ids)
+
+
+def test_insert_alerts_skips_deleted_searches(db, dialect, listing):
+    prop, tenant = listing
+    search = SavedSearch(tenant_id=tenant.id)
+    db.add(search)
+    db.commit()
+    gone = search.id + 10_000
+
+    assert upsert.insert_alerts(db, prop.id, [search.id, gone]) == {tenant.id}
+    db.commit()
+    assert db.query(SearchAlert).filter(SearchAlert.saved_search_id == gone).count() == 0